@@ -0,0 +1,513 @@
+"""
+Aurora Archive - Analytics Snapshot
+Typed columnar snapshots of members and card generations for dashboards
+
+Builds three datasets from the operational stores:
+
+    members           One row per user version, with the columns of the users
+                      CSV export (flattened card fields plus _-prefixed
+                      scanner fields)
+    generations       One row per card generated in the GUI, from
+                      generated_cards_log.csv (backend, model, steps, timing...)
+    generation_audit  One row per CardGenerator generation, from
+                      logs/generations.log (also covers CLI and batch runs)
+
+The two generation logs record the same GUI generations, so they are kept
+apart instead of being appended to one dataset twice.
+
+Each dataset is written as Parquet or Feather files partitioned by date
+(hive layout, e.g. members/date=2026-03-01/part-20260301T120000.parquet),
+so pandas/pyarrow load a date range without parsing any text.
+
+Runs are incremental: a state file records a high-water mark per source
+(last_scan for members, byte offset for each log file), and only newer
+members and log lines are appended as new part files. Members are mutable,
+so a user rescanned since the last run gets another row; take the latest
+_snapshot_at per _user_id for current state. Every members part file has the
+same columns (all card fields the database knows of); when new card fields
+appear, the members dataset is rebuilt so its schema stays uniform. --full
+rebuilds everything from scratch.
+
+Usage:
+    python analytics_snapshot.py --output snapshots
+    python analytics_snapshot.py --output snapshots --format feather --full
+
+Python 3.10+
+Dependencies: pandas, pyarrow
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import shutil
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    pd = None
+    PANDAS_AVAILABLE = False
+
+from card_scanner import UserDatabase
+from user_export import SCANNER_FIELDS, export_row
+
+STATE_FILE = "_snapshot_state.json"
+STATE_VERSION = 2  # 2: separate audit dataset, fixed member columns
+
+DATASETS = ("members", "generations", "generation_audit")
+
+FORMAT_PARQUET = "parquet"
+FORMAT_FEATHER = "feather"
+
+DEFAULT_CARD_LOG = "generated_cards_log.csv"
+DEFAULT_GENERATION_LOG = os.path.join("logs", "generations.log")
+
+# Scanner metadata columns, named as in the users CSV export
+MEMBER_META_COLUMNS = list(SCANNER_FIELDS)
+
+GENERATION_COLUMNS = {
+    "timestamp": "datetime64[ns]",
+    "backend": "string",
+    "model": "string",
+    "sampler": "string",
+    "steps": "Int64",
+    "cfg_scale": "Float64",
+    "width": "Int64",
+    "height": "Int64",
+    "generation_time_sec": "Float64",
+    "file_size_mb": "Float64",
+    "tier": "string",
+    "member_id": "string",
+    "member_name": "string",
+    "style": "string",
+    "prompt": "string",
+    "card_path": "string",
+}
+
+AUDIT_COLUMNS = {
+    "timestamp": "datetime64[ns]",
+    "backend": "string",
+    "generation_time_sec": "Float64",
+    "file_size_mb": "Float64",
+    "tier": "string",
+    "member_id": "string",
+    "prompt": "string",
+}
+
+# CardGenerator._log_generation line format
+GENERATION_LOG_PATTERN = re.compile(
+    r'^(?P<timestamp>[^|]+?) \| '
+    r'User: (?P<member_id>.*?) \| '
+    r'Tier: (?P<tier>.*?) \| '
+    r'Backend: (?P<backend>.*?) \| '
+    r'Time: (?P<generation_time_sec>[\d.]+)s \| '
+    r'Size: (?P<file_size_mb>[\d.]+)MB \| '
+    r'Prompt: (?P<prompt>.*?)(?:\.\.\.)?$'
+)
+
+# Placeholder written by log_card_to_csv for missing values
+MISSING_VALUES = {"", "N/A"}
+
+
+# ============================================
+# INCREMENTAL SOURCES
+# ============================================
+
+def _file_state(path: str) -> Optional[Dict]:
+    """Identity of a log file (None if it does not exist)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"inode": st.st_ino, "size": st.st_size}
+
+
+def read_new_lines(path: str, source_state: Optional[Dict]) -> Tuple[List[str], Optional[Dict]]:
+    """
+    Read complete lines appended to a log file since the last snapshot
+    
+    A file that shrank or was replaced (different inode) is read from the
+    start, dropping any header remembered for it. A trailing line without a
+    newline is left for the next run.
+    
+    Args:
+        path: Log file path
+        source_state: State saved by the previous run (None = first run)
+    
+    Returns:
+        (new lines without line endings, updated state or None if no file)
+    """
+    current = _file_state(path)
+    if current is None:
+        return [], source_state
+    
+    offset = 0
+    if source_state and source_state.get("inode") == current["inode"] \
+            and source_state.get("offset", 0) <= current["size"]:
+        offset = source_state["offset"]
+    
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    
+    end = data.rfind(b'\n') + 1
+    lines = data[:end].decode('utf-8', errors='replace').splitlines()
+    
+    state = dict(source_state or {}) if offset else {}
+    state.update(current)
+    state["offset"] = offset + end
+    return lines, state
+
+
+def _value(text: Optional[str]) -> Optional[str]:
+    """Normalize a logged value (N/A and blanks become None)"""
+    if text is None:
+        return None
+    text = text.strip()
+    return None if text in MISSING_VALUES else text
+
+
+def parse_card_log(lines: List[str], state: Dict) -> List[Dict]:
+    """
+    Parse rows of generated_cards_log.csv
+    
+    The header is taken from the first line of the file and kept in the
+    source state, so appended chunks without a header still parse.
+    
+    Args:
+        lines: Lines returned by read_new_lines
+        state: Source state (receives/provides "header")
+    
+    Returns:
+        Generation event dicts (GENERATION_COLUMNS keys)
+    """
+    if not lines:
+        return []
+    
+    if "header" not in state:
+        state["header"] = next(csv.reader([lines[0]]))
+        lines = lines[1:]
+    header = state["header"]
+    
+    events = []
+    for row in csv.DictReader(lines, fieldnames=header):
+        width, _, height = (row.get("resolution") or "").partition("x")
+        events.append({
+            "timestamp": _value(row.get("timestamp")),
+            "backend": _value(row.get("backend")),
+            "model": _value(row.get("model")),
+            "sampler": _value(row.get("sampler")),
+            "steps": _value(row.get("steps")),
+            "cfg_scale": _value(row.get("cfg_scale")),
+            "width": _value(width),
+            "height": _value(height),
+            "generation_time_sec": _value(row.get("generation_time_sec")),
+            "file_size_mb": _value(row.get("file_size_mb")),
+            "tier": _value(row.get("tier")),
+            "member_id": _value(row.get("member_id")),
+            "member_name": _value(row.get("member_name")),
+            "style": _value(row.get("style")),
+            "prompt": _value(row.get("prompt")),
+            "card_path": _value(row.get("card_path")),
+        })
+    return events
+
+
+def parse_generation_log(lines: List[str]) -> List[Dict]:
+    """
+    Parse CardGenerator audit lines from logs/generations.log
+    
+    Returns:
+        Audit event dicts (AUDIT_COLUMNS keys; unparseable lines are skipped)
+    """
+    events = []
+    for line in lines:
+        match = GENERATION_LOG_PATTERN.match(line)
+        if not match:
+            continue
+        fields = match.groupdict()
+        events.append({
+            "timestamp": _value(fields["timestamp"]),
+            "backend": _value(fields["backend"]),
+            "generation_time_sec": fields["generation_time_sec"],
+            "file_size_mb": fields["file_size_mb"],
+            "tier": _value(fields["tier"]),
+            "member_id": _value(fields["member_id"]),
+            "prompt": _value(fields["prompt"]),
+        })
+    return events
+
+
+def iter_member_rows(database: UserDatabase, since: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Flattened member rows scanned after a high-water mark
+    
+    Args:
+        database: User database
+        since: Only users with last_scan after this ISO timestamp (None = all)
+    
+    Yields:
+        Users CSV export rows (flattened card fields plus _ scanner fields)
+    """
+    for user in database.iter_users(since=since):
+        yield export_row(user)
+
+
+# ============================================
+# TYPED FRAMES AND PARTITIONED WRITES
+# ============================================
+
+def _require_pandas():
+    if not PANDAS_AVAILABLE:
+        raise RuntimeError("Analytics snapshots require pandas (and pyarrow for Parquet/Feather)")
+
+
+def members_frame(rows: List[Dict], snapshot_at: datetime, card_columns: List[str]) -> 'pd.DataFrame':
+    """
+    Build the typed members frame
+    
+    Args:
+        rows: Rows from iter_member_rows
+        snapshot_at: Time of this run (_snapshot_at column)
+        card_columns: Flattened card fields to write, in order (fields a
+            member lacks are null), so every part file has the same schema
+    """
+    _require_pandas()
+    frame = pd.DataFrame.from_records(rows, columns=MEMBER_META_COLUMNS + card_columns)
+    
+    # Flattened card fields are text; scanner metadata gets real types
+    for column in card_columns:
+        frame[column] = frame[column].map(
+            lambda v: None if v is None or (isinstance(v, float) and v != v) else str(v)
+        ).astype("string")
+    
+    frame["_first_scan"] = pd.to_datetime(frame["_first_scan"], errors="coerce")
+    frame["_last_scan"] = pd.to_datetime(frame["_last_scan"], errors="coerce")
+    frame["_scan_count"] = pd.to_numeric(frame["_scan_count"], errors="coerce").astype("Int64")
+    for column in ("_user_id", "_card_format", "_card_image_path"):
+        frame[column] = frame[column].astype("string")
+    frame["_snapshot_at"] = pd.Timestamp(snapshot_at)
+    frame["date"] = frame["_last_scan"].dt.strftime("%Y-%m-%d").fillna("unknown")
+    
+    # Metadata first, then card fields (matches the CSV export)
+    return frame[MEMBER_META_COLUMNS + ["_snapshot_at"] + card_columns + ["date"]]
+
+
+def generations_frame(events: List[Dict], columns: Dict[str, str] = GENERATION_COLUMNS) -> 'pd.DataFrame':
+    """
+    Build a typed generation events frame
+    
+    Args:
+        events: Event dicts from parse_card_log or parse_generation_log
+        columns: Column name -> dtype (GENERATION_COLUMNS or AUDIT_COLUMNS)
+    """
+    _require_pandas()
+    frame = pd.DataFrame.from_records(events, columns=list(columns))
+    
+    for column, dtype in columns.items():
+        if dtype == "datetime64[ns]":
+            frame[column] = pd.to_datetime(frame[column], errors="coerce", format="mixed")
+        elif dtype in ("Int64", "Float64"):
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(dtype)
+        else:
+            frame[column] = frame[column].astype(dtype)
+    
+    frame["date"] = frame["timestamp"].dt.strftime("%Y-%m-%d").fillna("unknown")
+    return frame
+
+
+def write_partitioned(
+    frame: 'pd.DataFrame',
+    dataset_dir: Path,
+    file_format: str,
+    run_id: str
+) -> List[str]:
+    """
+    Append a frame to a date-partitioned dataset
+    
+    Args:
+        frame: Rows to write (must have a "date" column)
+        dataset_dir: Dataset root (one of DATASETS)
+        file_format: FORMAT_PARQUET or FORMAT_FEATHER
+        run_id: Part file name suffix, unique per run
+    
+    Returns:
+        Paths of the files written
+    """
+    written = []
+    for date, part in frame.groupby("date", sort=True):
+        partition = dataset_dir / f"date={date}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"part-{run_id}.{file_format}"
+        
+        part = part.drop(columns=["date"]).reset_index(drop=True)
+        if file_format == FORMAT_FEATHER:
+            part.to_feather(path)
+        else:
+            part.to_parquet(path, index=False)
+        written.append(str(path))
+    return written
+
+
+# ============================================
+# SNAPSHOT RUN
+# ============================================
+
+def load_state(output_dir: Path) -> Dict:
+    """
+    Read the high-water marks of the previous run
+    
+    State from an older layout comes back fresh with "rebuild" set: its
+    datasets must be rebuilt rather than appended to.
+    """
+    path = output_dir / STATE_FILE
+    state = {"version": STATE_VERSION, "members": {}, "sources": {}}
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("version") == STATE_VERSION:
+                return stored
+            state["rebuild"] = True
+        except Exception as e:
+            print(f"Warning: Could not load snapshot state: {e}")
+    return state
+
+
+def save_state(output_dir: Path, state: Dict):
+    """Write the high-water marks (atomically, after the data files)"""
+    path = output_dir / STATE_FILE
+    temp_path = path.with_suffix('.json.part')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def build_snapshot(
+    output_dir: str,
+    database: UserDatabase,
+    card_log: str = DEFAULT_CARD_LOG,
+    generation_log: str = DEFAULT_GENERATION_LOG,
+    file_format: str = FORMAT_PARQUET,
+    full: bool = False
+) -> Dict:
+    """
+    Append new members and generation events to the snapshot datasets
+    
+    Args:
+        output_dir: Snapshot root (members/, generations/ and the state file)
+        database: User database to read members from
+        card_log: Path to generated_cards_log.csv
+        generation_log: Path to logs/generations.log
+        file_format: FORMAT_PARQUET or FORMAT_FEATHER
+        full: If True, delete existing datasets and rebuild from scratch
+    
+    Returns:
+        Counts: members, generations, audit_events, files
+    """
+    _require_pandas()
+    if file_format not in (FORMAT_PARQUET, FORMAT_FEATHER):
+        raise ValueError(f"Unknown snapshot format: {file_format}")
+    
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    
+    state = load_state(root)
+    if state.pop("rebuild", False) and not full:
+        print("Snapshot layout changed since the last run - rebuilding all datasets")
+        full = True
+    if full:
+        for dataset in DATASETS:
+            shutil.rmtree(root / dataset, ignore_errors=True)
+        state = {"version": STATE_VERSION, "members": {}, "sources": {}}
+    
+    snapshot_at = datetime.now()
+    run_id = snapshot_at.strftime("%Y%m%dT%H%M%S%f")
+    stats = {"members": 0, "generations": 0, "audit_events": 0, "files": 0}
+    
+    # Member columns only grow; a new card field means older part files
+    # lack it, so the members dataset is rebuilt with the wider schema
+    known_columns = state["members"].get("columns", [])
+    card_columns = sorted(set(known_columns) | set(database.get_export_columns()))
+    if known_columns and card_columns != sorted(known_columns):
+        shutil.rmtree(root / "members", ignore_errors=True)
+        state["members"] = {}
+    state["members"]["columns"] = card_columns
+    
+    # Members newer than the last snapshot's high-water mark
+    since = state["members"].get("last_scan")
+    rows = list(iter_member_rows(database, since=since))
+    if rows:
+        frame = members_frame(rows, snapshot_at, card_columns)
+        stats["files"] += len(write_partitioned(frame, root / "members", file_format, run_id))
+        stats["members"] = len(frame)
+        state["members"]["last_scan"] = max(row["_last_scan"] for row in rows)
+    
+    # Generation events appended to each log since the last snapshot
+    sources = state["sources"]
+    
+    lines, new_state = read_new_lines(card_log, sources.get(card_log))
+    if new_state is not None:
+        events = parse_card_log(lines, new_state)
+        sources[card_log] = new_state
+        if events:
+            frame = generations_frame(events, GENERATION_COLUMNS)
+            stats["files"] += len(write_partitioned(frame, root / "generations", file_format, run_id))
+            stats["generations"] = len(frame)
+    
+    lines, new_state = read_new_lines(generation_log, sources.get(generation_log))
+    if new_state is not None:
+        events = parse_generation_log(lines)
+        sources[generation_log] = new_state
+        if events:
+            frame = generations_frame(events, AUDIT_COLUMNS)
+            stats["files"] += len(write_partitioned(frame, root / "generation_audit", file_format, run_id))
+            stats["audit_events"] = len(frame)
+    
+    state["last_run"] = snapshot_at.isoformat()
+    save_state(root, state)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Aurora Archive analytics snapshot")
+    parser.add_argument("--output", default="snapshots", help="Snapshot directory")
+    parser.add_argument("--format", default=FORMAT_PARQUET, choices=[FORMAT_PARQUET, FORMAT_FEATHER])
+    parser.add_argument("--database", default="data/users_database.json", help="User database path")
+    parser.add_argument("--card-log", default=DEFAULT_CARD_LOG, help="Generated cards CSV log")
+    parser.add_argument("--generation-log", default=DEFAULT_GENERATION_LOG, help="Generation audit log")
+    parser.add_argument("--full", action="store_true", help="Rebuild instead of appending")
+    args = parser.parse_args(argv)
+    
+    if not PANDAS_AVAILABLE:
+        print("Error: pandas is required (pip install pandas pyarrow)", file=sys.stderr)
+        return 1
+    
+    database = UserDatabase(args.database)
+    try:
+        stats = build_snapshot(
+            args.output, database,
+            card_log=args.card_log,
+            generation_log=args.generation_log,
+            file_format=args.format,
+            full=args.full
+        )
+    finally:
+        database.close()
+    
+    print(
+        f"✓ Snapshot updated in {args.output}: {stats['members']} member rows, "
+        f"{stats['generations']} generation events, {stats['audit_events']} audit events, "
+        f"{stats['files']} files"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,22 +4,25 @@ Python 3.10+ | PyQt6
 """
 
 import sys
-import asyncio
 import os
 import json
 import csv
 import logging
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import CancelledError
 from typing import Dict, Optional
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QTabWidget, QFrame, QGridLayout, QTextEdit,
     QComboBox, QProgressBar, QScrollArea, QSizePolicy, QMessageBox,
     QDialog, QDialogButtonBox, QCheckBox, QTableWidget, QTableWidgetItem,
-    QHeaderView, QFileDialog, QLineEdit, QSpinBox, QSlider
+    QHeaderView, QFileDialog, QLineEdit, QSpinBox, QSlider, QTableView, QProgressDialog
+)
+from PyQt6.QtCore import (
+    Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QThread, pyqtSignal, QUrl,
+    QAbstractTableModel, QModelIndex
 )
-from PyQt6.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QThread, pyqtSignal, QUrl
 from PyQt6.QtGui import QFont, QPalette, QColor, QLinearGradient, QBrush, QPainter, QPixmap
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
@@ -36,6 +39,7 @@ except ImportError:
 # Import card generation module
 try:
     from card_generation import CardGenerator
+    from generation_scheduler import get_scheduler, shutdown_scheduler
     CARD_GEN_AVAILABLE = True
 except ImportError:
     CARD_GEN_AVAILABLE = False
@@ -49,6 +53,22 @@ except ImportError:
     CARD_SCANNER_AVAILABLE = False
     print("Warning: card_scanner module not available")
 
+# Import CSV re-import pipeline
+try:
+    from card_reimport import reimport_rows
+    CARD_REIMPORT_AVAILABLE = True
+except ImportError:
+    CARD_REIMPORT_AVAILABLE = False
+    print("Warning: card_reimport module not available")
+
+# Import streaming user export
+try:
+    from user_export import export_users_csv
+    USER_EXPORT_AVAILABLE = True
+except ImportError:
+    USER_EXPORT_AVAILABLE = False
+    print("Warning: user_export module not available")
+
 # Import steganography module
 try:
     from steganography_module import CardSteganography
@@ -587,6 +607,236 @@ class SteganographyDataViewer(QDialog):
             )
 
 
+class CsvReimportWorker(QThread):
+    """Background thread for CSV re-import (see card_reimport.reimport_rows)"""
+    
+    # Signals
+    progress = pyqtSignal(int, int, str)  # done, total, message
+    finished = pyqtSignal(dict)  # result
+    error = pyqtSignal(str)  # error message
+    
+    def __init__(self, scanner, rows, card_directory=None):
+        super().__init__()
+        self.scanner = scanner
+        self.rows = rows
+        self.card_directory = card_directory
+        self._is_cancelled = False
+    
+    def cancel(self):
+        """Request cancellation (the import is rolled back)"""
+        self._is_cancelled = True
+    
+    def run(self):
+        """Resolve, rescan and register every row"""
+        try:
+            result = reimport_rows(
+                self.scanner,
+                self.rows,
+                card_directory=self.card_directory,
+                progress_callback=self.progress.emit,
+                is_cancelled=lambda: self._is_cancelled
+            )
+            self.finished.emit(result)
+        except Exception as e:
+            self.scanner.database.rollback()
+            self.error.emit(f"Import error: {str(e)}")
+
+
+class CsvExportWorker(QThread):
+    """Background thread for streaming the users CSV export"""
+    
+    # Signals
+    progress = pyqtSignal(int, int, str)  # done, total, message
+    finished = pyqtSignal(dict)  # result
+    error = pyqtSignal(str)  # error message
+    
+    def __init__(self, database, filepath):
+        super().__init__()
+        self.database = database
+        self.filepath = filepath
+        self._is_cancelled = False
+    
+    def cancel(self):
+        """Request cancellation (no file is written)"""
+        self._is_cancelled = True
+    
+    def run(self):
+        """Stream every user to the CSV file"""
+        try:
+            result = export_users_csv(
+                self.database,
+                self.filepath,
+                progress_callback=self.progress.emit,
+                is_cancelled=lambda: self._is_cancelled
+            )
+            self.finished.emit(result)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class UserTableModel(QAbstractTableModel):
+    """
+    Registered users as a lazily paged table
+    
+    Rows are fetched from UserDatabase a page at a time as the view scrolls
+    (canFetchMore/fetchMore). Sorting and filtering are pushed down to the
+    database's indexed columns, and a rescan updates only its own row. Each
+    page query asks for one extra row to learn whether more follow, so no
+    full count is needed; a search considers at most SEARCH_RESULT_CAP
+    matches, which keeps type-ahead fast on large databases.
+    """
+    
+    PAGE_SIZE = 200
+    
+    # (header, summary key, UserDatabase sort column or None)
+    COLUMNS = [
+        ("Name", "name", "name"),
+        ("User ID", "user_id", "user_id"),
+        ("Format", "format", "format"),
+        ("Details", "detail", None),
+        ("Last Scan", "last_scan", "last_scan"),
+        ("Scans", "scan_count", "scan_count"),
+    ]
+    
+    def __init__(self, database, parent=None):
+        super().__init__(parent)
+        self.database = database
+        self.sort_by = "registered"
+        self.descending = False
+        self.search = None
+        self.card_format = None
+        self._rows = []
+        self._row_of = {}  # user_id -> row index
+        self._has_more = False
+        self._total = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Reset to the first page of the current sort and filter"""
+        self.beginResetModel()
+        self._rows = []
+        self._row_of = {}
+        self._total = self.database.count_user_summaries(self.search, self.card_format)
+        self._add_rows(self._fetch_page())
+        self.endResetModel()
+    
+    def _fetch_page(self) -> list:
+        """Fetch the next page from the database (plus one row to detect more)"""
+        page = self.database.query_user_summaries(
+            offset=len(self._rows),
+            limit=self.PAGE_SIZE + 1,
+            sort_by=self.sort_by,
+            descending=self.descending,
+            search=self.search,
+            card_format=self.card_format
+        )
+        self._has_more = len(page) > self.PAGE_SIZE
+        return page[:self.PAGE_SIZE]
+    
+    def _add_rows(self, page: list):
+        """Append fetched rows and index them"""
+        for summary in page:
+            self._row_of[summary["user_id"]] = len(self._rows)
+            self._rows.append(summary)
+    
+    def set_filter(self, search: Optional[str] = None, card_format: Optional[str] = None):
+        """
+        Filter by search words and card format
+        
+        Word-prefix matching over name, email, tier, card ID, soul name and
+        member ID (UserDatabase.search_users rules, not a substring match),
+        capped at UserDatabase.SEARCH_RESULT_CAP users.
+        """
+        self.search = search or None
+        self.card_format = card_format or None
+        self.refresh()
+    
+    def update_user(self, user_id: str):
+        """
+        Reflect a single user's change
+        
+        A loaded row is refreshed in place; a user not yet in the table
+        (newly registered) triggers a reload of the first page.
+        """
+        row = self._row_of.get(user_id)
+        summary = self.database.get_user_summary(user_id)
+        
+        if row is None or summary is None:
+            self.refresh()
+            return
+        
+        self._rows[row] = summary
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+    
+    def user_id_at(self, row: int) -> Optional[str]:
+        """User ID shown in a row"""
+        if 0 <= row < len(self._rows):
+            return self._rows[row]["user_id"]
+        return None
+    
+    @property
+    def total(self) -> int:
+        """Number of users matching the current filter (capped when searching)"""
+        return self._total
+    
+    @property
+    def total_capped(self) -> bool:
+        """True if the search matched more users than are shown"""
+        return bool(self.search) and self._total >= self.database.SEARCH_RESULT_CAP
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        
+        page = self._fetch_page()
+        if not page:
+            return
+        
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._add_rows(page)
+        self.endInsertRows()
+    
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        summary = self._rows[index.row()]
+        key = self.COLUMNS[index.column()][1]
+        
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = summary.get(key)
+            if key == "last_scan" and value:
+                return value[:19].replace("T", " ")
+            return "" if value is None else str(value)
+        
+        if role == Qt.ItemDataRole.TextAlignmentRole and key == "scan_count":
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        
+        return None
+    
+    def headerData(self, section: int, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+    
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """Re-query in the requested order (unsortable columns keep registration order)"""
+        in_range = 0 <= column < len(self.COLUMNS)
+        self.sort_by = (self.COLUMNS[column][2] if in_range else None) or "registered"
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.refresh()
+
+
 class CardScannerDialog(QDialog):
     """Dialog to scan cards and display account details"""
     def __init__(self, parent=None):
@@ -663,21 +913,76 @@ class CardScannerDialog(QDialog):
         """)
         self.tabs.addTab(self.details_display, "📋 Account Details")
         
-        # All Users Tab
-        self.users_display = QTextEdit()
-        self.users_display.setReadOnly(True)
-        self.users_display.setStyleSheet("""
-            QTextEdit {
+        # All Users Tab (paged table backed by the user database)
+        users_tab = QWidget()
+        users_layout = QVBoxLayout(users_tab)
+        
+        filter_layout = QHBoxLayout()
+        self.users_search = QLineEdit()
+        self.users_search.setPlaceholderText("Search name, email, tier or card ID...")
+        filter_layout.addWidget(self.users_search, stretch=1)
+        
+        self.users_format_filter = QComboBox()
+        self.users_format_filter.addItem("All formats", None)
+        if CARD_SCANNER_AVAILABLE:
+            self.users_format_filter.addItem("Aurora Member", CardFormat.AURORA_MEMBER)
+            self.users_format_filter.addItem("AetherCard Soul", CardFormat.AETHER_SOUL)
+            self.users_format_filter.addItem("Unknown", CardFormat.UNKNOWN)
+        filter_layout.addWidget(self.users_format_filter)
+        
+        self.users_count_label = QLabel("")
+        self.users_count_label.setStyleSheet("color: #c084fc;")
+        filter_layout.addWidget(self.users_count_label)
+        users_layout.addLayout(filter_layout)
+        
+        self.users_view = QTableView()
+        self.users_view.setStyleSheet("""
+            QTableView {
                 background-color: rgba(0, 0, 0, 0.5);
                 border: 1px solid rgba(168, 85, 247, 0.3);
                 border-radius: 8px;
-                padding: 12px;
                 color: white;
-                font-family: 'Courier New', monospace;
+                gridline-color: rgba(168, 85, 247, 0.2);
                 font-size: 12px;
             }
+            QHeaderView::section {
+                background-color: rgba(147, 51, 234, 0.4);
+                color: white;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
         """)
-        self.tabs.addTab(self.users_display, "👥 All Users")
+        self.users_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.users_view.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.users_view.setAlternatingRowColors(False)
+        self.users_view.verticalHeader().setVisible(False)
+        self.users_view.horizontalHeader().setStretchLastSection(True)
+        self.users_view.doubleClicked.connect(self.on_user_double_clicked)
+        users_layout.addWidget(self.users_view)
+        
+        self.tabs.addTab(users_tab, "👥 All Users")
+        
+        self.users_model = None
+        self.reimport_worker = None
+        self.reimport_progress = None
+        self.export_worker = None
+        self.export_progress = None
+        if self.scanner:
+            self.users_model = UserTableModel(self.scanner.database, self)
+            self.users_view.setModel(self.users_model)
+            # No sort indicator: rows start in registration order
+            self.users_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            self.users_view.setSortingEnabled(True)
+            self.users_model.modelReset.connect(self.update_users_count)
+            
+            # Debounce typing so each keystroke doesn't re-query
+            self.users_search_timer = QTimer(self)
+            self.users_search_timer.setSingleShot(True)
+            self.users_search_timer.setInterval(250)
+            self.users_search_timer.timeout.connect(self.apply_users_filter)
+            self.users_search.textChanged.connect(lambda _: self.users_search_timer.start())
+            self.users_format_filter.currentIndexChanged.connect(self.apply_users_filter)
         
         layout.addWidget(self.tabs)
         
@@ -809,8 +1114,10 @@ class CardScannerDialog(QDialog):
             details = self.scanner.display_account_details(data, card_format)
             self.details_display.setText(details)
             
-            # Refresh users list
-            self.refresh_users()
+            # Update only this user's row
+            if self.users_model and self.scanner.current_user_id:
+                self.users_model.update_user(self.scanner.current_user_id)
+                self.update_users_count()
             
             # Update parent window's member_data if parent is AuroraMainWindow
             if self.parent() and hasattr(self.parent(), 'member_data'):
@@ -861,11 +1168,39 @@ class CardScannerDialog(QDialog):
     
     def refresh_users(self):
         """Refresh the all users display"""
-        if not self.scanner:
+        if not self.scanner or not self.users_model:
+            return
+        
+        self.users_model.refresh()
+    
+    def apply_users_filter(self):
+        """Apply the search box and format filter to the users table"""
+        if not self.users_model:
             return
         
-        users_list = self.scanner.list_all_users()
-        self.users_display.setText(users_list)
+        self.users_model.set_filter(
+            self.users_search.text().strip(),
+            self.users_format_filter.currentData()
+        )
+    
+    def update_users_count(self):
+        """Show how many users match the current filter"""
+        if self.users_model:
+            total = self.users_model.total
+            if self.users_model.total_capped:
+                self.users_count_label.setText(f"{total}+ users (refine the search)")
+            else:
+                self.users_count_label.setText(f"{total} user{'s' if total != 1 else ''}")
+    
+    def on_user_double_clicked(self, index):
+        """Load the double-clicked user as the current account"""
+        user_id = self.users_model.user_id_at(index.row()) if self.users_model else None
+        if not user_id or not self.scanner.switch_user(user_id):
+            return
+        
+        details = self.scanner.display_account_details()
+        self.details_display.setText(details)
+        self.tabs.setCurrentIndex(0)
     
     def logout_current(self):
         """Logout current user"""
@@ -944,82 +1279,33 @@ class CardScannerDialog(QDialog):
                 else:
                     return  # User chose not to provide directory
             
-            # Process each row
-            success_count = 0
-            error_count = 0
-            errors = []
-            
-            progress = QProgressBar()
-            progress.setMaximum(len(rows))
-            progress_dialog = QMessageBox(self)
-            progress_dialog.setWindowTitle("Importing CSV")
-            progress_dialog.setText("Rescanning cards and updating database...")
-            progress_dialog.setStandardButtons(QMessageBox.StandardButton.NoButton)
-            progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
-            
-            for idx, row in enumerate(rows):
-                # Get image path from CSV or construct it
-                if has_image_paths:
-                    card_path = row.get('_card_image_path', '').strip()
-                else:
-                    # Try to construct path from card_id or member_id
-                    card_id = row.get('card_id', '').strip()
-                    member_id = row.get('member_id', '').strip()
-                    
-                    # Try various filename patterns
-                    possible_names = []
-                    if card_id:
-                        possible_names.append(f"{card_id}_member_card.png")
-                        possible_names.append(f"{card_id}_embedded.png")
-                        possible_names.append(f"{card_id}.png")
-                    if member_id:
-                        possible_names.append(f"aurora_{member_id}_000_member_card.png")
-                        possible_names.append(f"aurora_{member_id}_000_embedded.png")
-                    
-                    # Search for file in provided directory
-                    card_path = None
-                    for name in possible_names:
-                        test_path = Path(card_directory) / name
-                        if test_path.exists():
-                            card_path = str(test_path)
-                            break
-                
-                if not card_path or not Path(card_path).exists():
-                    error_count += 1
-                    name_hint = row.get('member_profile.name', row.get('name', f'Row {idx + 1}'))
-                    errors.append(f"{name_hint}: Image not found")
-                    continue
-                
-                try:
-                    # Rescan the card to get fresh data
-                    self.scanner.scan_card(card_path, register_user=True)
-                    success_count += 1
-                except Exception as e:
-                    error_count += 1
-                    errors.append(f"Row {idx + 1}: {str(e)}")
-            
-            # Refresh displays
-            self.refresh_users()
+            if not CARD_REIMPORT_AVAILABLE:
+                QMessageBox.warning(
+                    self,
+                    "Import Failed",
+                    "CSV re-import module not available."
+                )
+                return
             
-            # Show results
-            result_msg = f"✓ Import Complete!\n\n"
-            result_msg += f"Successfully rescanned: {success_count} cards\n"
-            result_msg += f"Errors: {error_count}\n\n"
-            result_msg += f"Database updated with fresh data from card images.\n"
+            # Resolve, rescan and commit in the background
+            self.reimport_has_image_paths = has_image_paths
+            self.reimport_progress = QProgressDialog(
+                "Resolving card images...", "Cancel", 0, len(rows), self
+            )
+            self.reimport_progress.setWindowTitle("Importing CSV")
+            self.reimport_progress.setWindowModality(Qt.WindowModality.WindowModal)
+            self.reimport_progress.setMinimumDuration(0)
+            self.reimport_progress.setAutoClose(False)
+            self.reimport_progress.setAutoReset(False)
             
-            if not has_image_paths:
-                result_msg += f"\n💡 Tip: Future exports will include image paths automatically."
+            self.reimport_worker = CsvReimportWorker(self.scanner, rows, card_directory)
+            self.reimport_worker.progress.connect(self.on_reimport_progress)
+            self.reimport_worker.finished.connect(self.on_reimport_finished)
+            self.reimport_worker.error.connect(self.on_reimport_error)
+            self.reimport_progress.canceled.connect(self.reimport_worker.cancel)
             
-            if errors and len(errors) <= 5:
-                result_msg += f"\n\nErrors:\n" + "\n".join(errors[:5])
-            elif errors:
-                result_msg += f"\n\nShowing first 5 errors:\n" + "\n".join(errors[:5])
-            
-            QMessageBox.information(
-                self,
-                "Import Complete",
-                result_msg
-            )
+            self.reimport_progress.show()
+            self.reimport_worker.start()
             
         except Exception as e:
             QMessageBox.critical(
@@ -1028,6 +1314,68 @@ class CardScannerDialog(QDialog):
                 f"Failed to import CSV:\n{str(e)}"
             )
     
+    def on_reimport_progress(self, done: int, total: int, message: str):
+        """Update the import progress dialog"""
+        if not self.reimport_progress:
+            return
+        
+        self.reimport_progress.setMaximum(max(total, 1))
+        self.reimport_progress.setValue(done)
+        self.reimport_progress.setLabelText(message)
+    
+    def _close_reimport_progress(self):
+        """Dismiss the import progress dialog"""
+        if self.reimport_progress:
+            self.reimport_progress.canceled.disconnect()
+            self.reimport_progress.close()
+            self.reimport_progress = None
+    
+    def on_reimport_finished(self, result: dict):
+        """Show the import summary and reload the users table"""
+        self._close_reimport_progress()
+        self.refresh_users()
+        
+        errors = result["errors"]
+        
+        if result["cancelled"]:
+            QMessageBox.information(
+                self,
+                "Import Cancelled",
+                "Import cancelled. The database was left unchanged."
+            )
+            return
+        
+        # Show results
+        result_msg = f"✓ Import Complete!\n\n"
+        result_msg += f"Successfully rescanned: {result['success_count']} cards\n"
+        result_msg += f"Errors: {result['error_count']}\n\n"
+        result_msg += f"Database updated with fresh data from card images.\n"
+        
+        if not self.reimport_has_image_paths:
+            result_msg += f"\n💡 Tip: Future exports will include image paths automatically."
+        
+        if errors and len(errors) <= 5:
+            result_msg += f"\n\nErrors:\n" + "\n".join(errors[:5])
+        elif errors:
+            result_msg += f"\n\nShowing first 5 errors:\n" + "\n".join(errors[:5])
+        
+        QMessageBox.information(
+            self,
+            "Import Complete",
+            result_msg
+        )
+    
+    def on_reimport_error(self, error_message: str):
+        """Report a failed import"""
+        self._close_reimport_progress()
+        self.refresh_users()
+        
+        QMessageBox.critical(
+            self,
+            "Import Error",
+            f"Failed to import CSV:\n{error_message}"
+        )
+    
     def export_all_users_csv(self):
         """Export all users to comprehensive CSV file with all member schema fields"""
         if not self.scanner:
@@ -1038,10 +1386,15 @@ class CardScannerDialog(QDialog):
             )
             return
         
-        # Get all users from database
-        all_users = self.scanner.database.get_all_users()
+        if not USER_EXPORT_AVAILABLE:
+            QMessageBox.warning(
+                self,
+                "Export Failed",
+                "User export module not available."
+            )
+            return
         
-        if not all_users:
+        if self.scanner.database.count_users() == 0:
             QMessageBox.information(
                 self,
                 "No Data",
@@ -1063,90 +1416,70 @@ class CardScannerDialog(QDialog):
         if not filepath:
             return  # User cancelled
         
-        try:
-            # Collect all possible field names from all users (for comprehensive headers)
-            all_fields = set()
-            flattened_users = []
-            
-            for user in all_users:
-                user_data = user.get('data', {})
-                flattened = self._flatten_dict_for_csv(user_data)
-                
-                # Add scanner metadata (prefixed with _ to appear first when sorted)
-                flattened['_user_id'] = user.get('user_id', '')
-                flattened['_card_format'] = user.get('format', '')
-                flattened['_card_image_path'] = user.get('card_image_path', '')  # ADDED
-                flattened['_first_scan'] = user.get('first_scan', '')
-                flattened['_last_scan'] = user.get('last_scan', '')
-                flattened['_scan_count'] = user.get('scan_count', 0)
-                
-                all_fields.update(flattened.keys())
-                flattened_users.append(flattened)
-            
-            # Sort fields for consistent column order
-            sorted_fields = sorted(all_fields)
-            
-            # Write CSV with proper escaping
-            import csv
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=sorted_fields, extrasaction='ignore')
-                writer.writeheader()
-                
-                for user_dict in flattened_users:
-                    # Ensure all fields are present (fill missing with empty string)
-                    row = {field: user_dict.get(field, '') for field in sorted_fields}
-                    writer.writerow(row)
-            
+        # Stream users to the file in the background
+        self.export_filepath = filepath
+        self.export_progress = QProgressDialog(
+            "Exporting users...", "Cancel", 0, self.scanner.database.count_users(), self
+        )
+        self.export_progress.setWindowTitle("Exporting CSV")
+        self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.export_progress.setMinimumDuration(500)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.setAutoReset(False)
+        
+        self.export_worker = CsvExportWorker(self.scanner.database, filepath)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_worker.error.connect(self.on_export_error)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.start()
+    
+    def on_export_progress(self, done: int, total: int, message: str):
+        """Update the export progress dialog"""
+        if not self.export_progress:
+            return
+        
+        self.export_progress.setMaximum(max(total, 1))
+        self.export_progress.setValue(done)
+        self.export_progress.setLabelText(message)
+    
+    def _close_export_progress(self):
+        """Dismiss the export progress dialog"""
+        if self.export_progress:
+            self.export_progress.canceled.disconnect()
+            self.export_progress.close()
+            self.export_progress = None
+    
+    def on_export_finished(self, result: dict):
+        """Report a completed (or cancelled) export"""
+        self._close_export_progress()
+        
+        if result["cancelled"]:
             QMessageBox.information(
                 self,
-                "Export Successful",
-                f"✓ Exported {len(all_users)} user(s) to:\n{filepath}\n\n"
-                f"Total fields: {len(sorted_fields)}\n"
-                f"Each user's data is in a separate row.\n"
-                f"Card images linked via _card_image_path column."
+                "Export Cancelled",
+                "Export cancelled. No file was written."
             )
-            
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Export Error",
-                f"Failed to export CSV:\n{str(e)}"
-            )
-    
-    def _flatten_dict_for_csv(self, data: dict, parent_key: str = '', sep: str = '.') -> dict:
-        """
-        Flatten nested dictionary for CSV export
+            return
         
-        Args:
-            data: Dictionary to flatten
-            parent_key: Parent key prefix
-            sep: Separator for nested keys
-            
-        Returns:
-            Flattened dictionary with dot-notation keys
-        """
-        items = []
-        for k, v in data.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            
-            if isinstance(v, dict):
-                # Recursively flatten nested dicts
-                items.extend(self._flatten_dict_for_csv(v, new_key, sep=sep).items())
-            elif isinstance(v, list):
-                # Handle lists - create indexed keys
-                if len(v) == 0:
-                    items.append((new_key, '[]'))
-                else:
-                    for i, item in enumerate(v):
-                        if isinstance(item, dict):
-                            items.extend(self._flatten_dict_for_csv(item, f"{new_key}[{i}]", sep=sep).items())
-                        else:
-                            items.append((f"{new_key}[{i}]", item))
-            else:
-                # Primitive value - convert to string
-                items.append((new_key, str(v) if v is not None else ''))
+        QMessageBox.information(
+            self,
+            "Export Successful",
+            f"✓ Exported {result['users']} user(s) to:\n{self.export_filepath}\n\n"
+            f"Total fields: {result['columns']}\n"
+            f"Each user's data is in a separate row.\n"
+            f"Card images linked via _card_image_path column."
+        )
+    
+    def on_export_error(self, error_message: str):
+        """Report a failed export"""
+        self._close_export_progress()
         
-        return dict(items)
+        QMessageBox.critical(
+            self,
+            "Export Error",
+            f"Failed to export CSV:\n{error_message}"
+        )
 
 
 class MemberRegistrationDialog(QDialog):
@@ -2105,25 +2438,25 @@ class CardGenerationWorker(QThread):
     error = pyqtSignal(str)  # error message
     backend_changed = pyqtSignal(str)  # backend name
     
-    def __init__(self, generator, prompt, style, color_palette):
+    def __init__(self, generator, prompt, style, color_palette, count=1):
         super().__init__()
         self.generator = generator
         self.prompt = prompt
         self.style = style
         self.color_palette = color_palette
+        self.count = count
+        self.job = None
         self._is_cancelled = False
     
     def cancel(self):
-        """Request cancellation"""
+        """Request cancellation (removes the job if it is still queued)"""
         self._is_cancelled = True
+        if self.job is not None:
+            self.job.cancel()
     
     def run(self):
-        """Run the async generation in a separate thread"""
+        """Queue the generation on the shared scheduler and wait for it"""
         try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
             # Check if we should generate video/animation
             is_animated = False
             if hasattr(self.generator, 'grok_mode'):
@@ -2131,28 +2464,29 @@ class CardGenerationWorker(QThread):
                 if 'Video' in grok_mode or 'GIF' in grok_mode:
                     is_animated = True
             
-            # Run the appropriate generation method
             if is_animated:
                 self.progress.emit("Preparing video generation...", 5)
-                result = loop.run_until_complete(
-                    self.generator.generate_animated_card(
-                        prompt=self.prompt,
-                        duration=5 if 'Video' in grok_mode else 3,
-                        effects=['fade', 'particle'],
-                        progress_callback=self.on_progress
-                    )
-                )
-            else:
-                result = loop.run_until_complete(
-                    self.generator.generate_static_card(
-                        prompt=self.prompt,
-                        style=self.style,
-                        color_palette=self.color_palette,
-                        progress_callback=self.on_progress
-                    )
-                )
             
-            loop.close()
+            # Jobs run in tier order within per-backend concurrency limits
+            self.job = get_scheduler().submit(
+                self.generator,
+                prompt=self.prompt,
+                style=self.style,
+                color_palette=self.color_palette,
+                count=1 if is_animated else self.count,
+                animated=is_animated,
+                duration=5 if is_animated and 'Video' in grok_mode else 3,
+                effects=['fade', 'particle'],
+                progress_callback=self.on_progress
+            )
+            if self._is_cancelled:
+                self.job.cancel()
+            
+            try:
+                result = self.job.result()
+            except CancelledError:
+                self.error.emit("Generation cancelled by user")
+                return
             
             if self._is_cancelled:
                 self.error.emit("Generation cancelled by user")
@@ -2719,6 +3053,25 @@ class AuroraMainWindow(QMainWindow):
         advanced_grid.addLayout(hr_scale_container, 10, 1)
         self.hr_scale_container = hr_scale_container  # Store reference
         
+        # Variants (generated together in one batch)
+        variants_label = QLabel("Variants")
+        variants_label.setStyleSheet("font-weight: bold; font-size: 13px;")
+        advanced_grid.addWidget(variants_label, 11, 0)
+        
+        variants_container = QHBoxLayout()
+        self.variants_combo = QComboBox()
+        self.variants_combo.addItems(['1', '2', '3', '4', '6', '8'])
+        self.variants_combo.setCurrentText('1')
+        self.variants_combo.setToolTip("Cards generated per click, batched into as few backend calls as possible")
+        variants_container.addWidget(self.variants_combo)
+        
+        variants_info = QLabel("cards")
+        variants_info.setStyleSheet("color: #a855f7; font-size: 11px;")
+        variants_container.addWidget(variants_info)
+        variants_container.addStretch()
+        
+        advanced_grid.addLayout(variants_container, 12, 0)
+        
         # Load samplers and upscalers
         self.refresh_samplers_and_upscalers()
         
@@ -3590,16 +3943,18 @@ class AuroraMainWindow(QMainWindow):
         enable_hr = self.hires_checkbox.isChecked()
         upscaler = self.upscaler_combo.currentText() if enable_hr else None
         hr_scale = float(self.hr_scale_combo.currentText()) if enable_hr else 2.0
+        variants = int(self.variants_combo.currentText())
         
         self.start_generation(prompt, style, color, model, steps, cfg, 
                             sampler, scheduler, width, height, 
-                            enable_hr, upscaler, hr_scale)
+                            enable_hr, upscaler, hr_scale, variants)
     
     def start_generation(self, prompt: str, style: str, color: str, 
                         model: str = None, steps: int = None, cfg: float = None,
                         sampler: str = None, scheduler: str = None,
                         width: int = None, height: int = None,
-                        enable_hr: bool = None, upscaler: str = None, hr_scale: float = None):
+                        enable_hr: bool = None, upscaler: str = None, hr_scale: float = None,
+                        variants: int = 1):
         """Start the card generation process"""
         try:
             # Determine backend based on Grok checkbox
@@ -3662,7 +4017,8 @@ class AuroraMainWindow(QMainWindow):
                 generator=generator,
                 prompt=prompt,
                 style=style,
-                color_palette=color
+                color_palette=color,
+                count=variants
             )
             self.active_workers.append(self.worker)  # Track worker
             
@@ -3691,6 +4047,44 @@ class AuroraMainWindow(QMainWindow):
                 "Make sure Stable Diffusion is running on localhost:7860"
             )
     
+    def _embed_generation_data(self, generated_path: str, metadata: dict):
+        """Embed generation metadata into a freshly generated card"""
+        # 🔐 EMBED STEGANOGRAPHY DATA (Pre-authentication)
+        # This "pre-codes" the card with metadata for later verification
+        if generated_path and STEG_AVAILABLE:
+            try:
+                steg = CardSteganography()
+                
+                # Prepare card data for embedding
+                card_data = {
+                    'card_id': metadata.get('card_id', 'unknown'),
+                    'timestamp': metadata.get('timestamp', ''),
+                    'generator': 'Aurora Archive Card Generator v2.0',
+                    'tier': 'Premium',  # Always Premium for standalone generator
+                    'user_id': 'guest',
+                    'style': metadata.get('style', 'Unknown'),
+                    'backend': metadata.get('backend', 'Unknown'),
+                    'prompt': metadata.get('prompt', '')[:200],  # First 200 chars
+                    'color_palette': metadata.get('color_palette', 'Unknown'),
+                    'model': metadata.get('model', 'Unknown'),
+                    'generation_params': {
+                        'steps': metadata.get('steps', 0),
+                        'cfg_scale': metadata.get('cfg_scale', 0),
+                        'sampler': metadata.get('sampler', 'Unknown'),
+                        'width': metadata.get('width', 0),
+                        'height': metadata.get('height', 0),
+                    }
+                }
+                
+                # Embed data into image (modifies in-place)
+                steg.embed_data(generated_path, card_data, overwrite=True)
+                
+                print(f"✅ Steganography embedded: {generated_path}")
+                
+            except Exception as steg_error:
+                print(f"⚠️  Steganography embedding failed: {steg_error}")
+                # Don't fail the whole generation if embedding fails
+    
     def on_generation_complete(self, result: dict):
         """Handle successful generation"""
         try:
@@ -3698,6 +4092,19 @@ class AuroraMainWindow(QMainWindow):
             if hasattr(self, 'progress_dialog'):
                 self.progress_dialog.accept()
             
+            # Batches return one result per variant: embed and log the extra
+            # variants here, then handle the first like a single card
+            variants = result.get('results') or []
+            for variant in variants[1:]:
+                self._embed_generation_data(variant['path'], variant['metadata'])
+                self.log_card_to_csv(
+                    card_path=variant['path'],
+                    metadata=variant['metadata'],
+                    member_data=None
+                )
+            if variants:
+                result = variants[0]
+            
             # Store generation metadata
             self.last_generation_metadata = result.get('metadata', {})
             self.last_generation_metadata['path'] = result.get('path', '')
@@ -3708,40 +4115,7 @@ class AuroraMainWindow(QMainWindow):
             metadata = result.get('metadata', {})
             
             # 🔐 EMBED STEGANOGRAPHY DATA (Pre-authentication)
-            # This "pre-codes" the card with metadata for later verification
-            if generated_path and STEG_AVAILABLE:
-                try:
-                    steg = CardSteganography()
-                    
-                    # Prepare card data for embedding
-                    card_data = {
-                        'card_id': metadata.get('card_id', 'unknown'),
-                        'timestamp': metadata.get('timestamp', ''),
-                        'generator': 'Aurora Archive Card Generator v2.0',
-                        'tier': 'Premium',  # Always Premium for standalone generator
-                        'user_id': 'guest',
-                        'style': metadata.get('style', 'Unknown'),
-                        'backend': metadata.get('backend', 'Unknown'),
-                        'prompt': metadata.get('prompt', '')[:200],  # First 200 chars
-                        'color_palette': metadata.get('color_palette', 'Unknown'),
-                        'model': metadata.get('model', 'Unknown'),
-                        'generation_params': {
-                            'steps': metadata.get('steps', 0),
-                            'cfg_scale': metadata.get('cfg_scale', 0),
-                            'sampler': metadata.get('sampler', 'Unknown'),
-                            'width': metadata.get('width', 0),
-                            'height': metadata.get('height', 0),
-                        }
-                    }
-                    
-                    # Embed data into image (modifies in-place)
-                    steg.embed_data(generated_path, card_data, overwrite=True)
-                    
-                    print(f"✅ Steganography embedded: {generated_path}")
-                    
-                except Exception as steg_error:
-                    print(f"⚠️  Steganography embedding failed: {steg_error}")
-                    # Don't fail the whole generation if embedding fails
+            self._embed_generation_data(generated_path, metadata)
             
             # Update card widget with generated image
             if generated_path:
@@ -3765,6 +4139,7 @@ class AuroraMainWindow(QMainWindow):
             
             # Show success message
             steg_status = "✓ Pre-authenticated with steganography" if STEG_AVAILABLE else "⚠️ No steganography (module unavailable)"
+            batch_status = f"🃏 Variants: {len(variants)} (saved next to this card)\n" if len(variants) > 1 else ""
             QMessageBox.information(
                 self,
                 "Card Generated! ✨",
@@ -3773,7 +4148,8 @@ class AuroraMainWindow(QMainWindow):
                 f"⏱️  Time: {metadata.get('generation_time', 0):.1f}s\n"
                 f"🎨 Style: {metadata.get('style', 'N/A')}\n"
                 f"💾 Size: {metadata.get('file_size_mb', 0):.2f} MB\n"
-                f"🖥️  Backend: {metadata.get('backend', 'N/A')}\n\n"
+                f"🖥️  Backend: {metadata.get('backend', 'N/A')}\n"
+                f"{batch_status}\n"
                 f"{steg_status}\n"
                 f"✓ Card logged to CSV tracking system"
             )
@@ -4049,6 +4425,8 @@ class AuroraMainWindow(QMainWindow):
         
         # Stop workers
         self.cleanup_workers()
+        if CARD_GEN_AVAILABLE:
+            shutdown_scheduler(wait=False)
         
         # Close dialogs
         self.cleanup_dialogs()
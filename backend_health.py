@@ -0,0 +1,375 @@
+"""
+Aurora Archive - Backend Health
+Circuit breakers and rolling health statistics for generation backends
+
+Every backend request reports its outcome and latency here. A backend that
+fails several times in a row has its circuit opened: routing skips it
+immediately instead of waiting for another request timeout. After a
+cooldown the circuit goes half-open and admits exactly one trial - a
+background probe or the next real request - which decides whether it closes
+again or reopens with a longer cooldown. Everyone else keeps seeing the
+backend as unavailable until then.
+
+Callers take a token with acquire() right before sending a request and hand
+it back with release() afterwards; record() reports the outcome.
+
+Routing also moves a backend behind its fallback while it is degraded:
+a poor rolling success rate, or a p95 latency above the configured limit.
+Samples age out of the window, so a demoted backend that gets no traffic
+is tried first again later.
+
+Outcomes count against a backend only when the service misbehaves
+(connection errors, timeouts, 5xx/429). A rejected request (4xx) shows the
+service is up.
+
+Python 3.10+
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from enum import Enum
+from collections import deque
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Async probe: True if the backend answered
+Probe = Callable[[], Awaitable[bool]]
+
+# acquire() token for requests to a closed circuit
+_CLOSED_PASS = object()
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"        # Healthy, requests flow
+    OPEN = "open"            # Known down, requests are skipped
+    HALF_OPEN = "half_open"  # Cooldown over, one trial request decides
+
+
+class BackendHealth:
+    """Rolling outcome window and circuit breaker for one backend"""
+    
+    def __init__(self, window: int, cooldown: float, max_age: float):
+        self.samples = deque(maxlen=window)  # (timestamp, success, latency or None)
+        self.max_age = max_age
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+        self.retry_at = 0.0
+        self.cooldown = cooldown
+        self.trial = None  # Token of the request deciding a half-open circuit
+    
+    def prune(self, now: float):
+        """Drop samples older than max_age"""
+        while self.samples and self.samples[0][0] < now - self.max_age:
+            self.samples.popleft()
+    
+    def success_rate(self) -> Optional[float]:
+        """Share of successful outcomes in the window (None without samples)"""
+        if not self.samples:
+            return None
+        return sum(1 for _, success, _ in self.samples if success) / len(self.samples)
+    
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Nearest-rank latency percentile of successful requests"""
+        latencies = sorted(latency for _, success, latency in self.samples if success and latency is not None)
+        if not latencies:
+            return None
+        rank = max(1, -(-len(latencies) * percentile // 100))
+        return latencies[int(rank) - 1]
+    
+    def latency_samples(self) -> int:
+        return sum(1 for _, success, latency in self.samples if success and latency is not None)
+
+
+class HealthMonitor:
+    """
+    Per-backend circuit breakers with a background half-open prober
+    
+    Thread-safe: generators on any thread or event loop report to the shared
+    monitor. The probe thread only runs while some circuit is not closed.
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0,
+        window: int = 50,
+        max_age: float = 600.0,
+        degraded_success_rate: float = 0.5,
+        degraded_latency: float = 60.0,
+        min_samples: int = 5
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open a circuit
+            cooldown: Seconds an opened circuit waits before going half-open
+            max_cooldown: Cap for the cooldown, which doubles on every failed retry
+            window: Outcomes kept per backend for rates and percentiles
+            max_age: Seconds an outcome stays in the window
+            degraded_success_rate: Below this rolling success rate a backend is degraded
+            degraded_latency: Above this p95 latency (seconds) a backend is degraded
+            min_samples: Samples needed before a backend can count as degraded
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.window = window
+        self.max_age = max_age
+        self.degraded_success_rate = degraded_success_rate
+        self.degraded_latency = degraded_latency
+        self.min_samples = min_samples
+        
+        self._backends: Dict[Hashable, BackendHealth] = {}
+        self._probes: Dict[Hashable, Probe] = {}
+        self._lock = threading.Lock()
+        self._prober = None
+    
+    def _get(self, backend: Hashable) -> BackendHealth:
+        health = self._backends.get(backend)
+        if health is None:
+            health = self._backends[backend] = BackendHealth(self.window, self.base_cooldown, self.max_age)
+        health.prune(time.time())
+        return health
+    
+    # ============================================
+    # OUTCOMES
+    # ============================================
+    
+    def record(self, backend: Hashable, success: bool, latency: Optional[float] = None):
+        """
+        Report the outcome of a request or probe
+        
+        Args:
+            backend: Backend the request went to
+            success: False for connection errors, timeouts and server errors
+            latency: Seconds until the backend answered (None for probes)
+        """
+        start_prober = False
+        with self._lock:
+            health = self._get(backend)
+            if success and health.state != CircuitState.CLOSED:
+                # Outage samples no longer describe the backend
+                logger.info(f"Backend {self._name(backend)} recovered - circuit closed")
+                health.samples.clear()
+            health.samples.append((time.time(), success, latency))
+            health.trial = None
+            
+            if success:
+                health.consecutive_failures = 0
+                health.state = CircuitState.CLOSED
+                health.cooldown = self.base_cooldown
+                return
+            
+            health.consecutive_failures += 1
+            if health.state == CircuitState.HALF_OPEN:
+                # Failed retry: back off further
+                health.cooldown = min(health.cooldown * 2, self.max_cooldown)
+                start_prober = self._open(backend, health)
+            elif health.state == CircuitState.CLOSED and health.consecutive_failures >= self.failure_threshold:
+                start_prober = self._open(backend, health)
+        
+        if start_prober:
+            self._start_prober()
+    
+    def _open(self, backend: Hashable, health: BackendHealth) -> bool:
+        """Open a circuit (caller holds the lock). Returns True to start probing."""
+        health.state = CircuitState.OPEN
+        health.retry_at = time.time() + health.cooldown
+        logger.warning(
+            f"Backend {self._name(backend)} unavailable after {health.consecutive_failures} "
+            f"failures - skipping it for {health.cooldown:.0f}s"
+        )
+        return self._prober is None
+    
+    # ============================================
+    # ROUTING
+    # ============================================
+    
+    def _admits(self, health: BackendHealth) -> bool:
+        """True if a request may go out now (caller holds the lock)"""
+        if health.state == CircuitState.OPEN and time.time() >= health.retry_at:
+            health.state = CircuitState.HALF_OPEN
+        if health.state == CircuitState.HALF_OPEN:
+            return health.trial is None
+        return health.state == CircuitState.CLOSED
+    
+    def is_available(self, backend: Hashable) -> bool:
+        """False while the circuit is open or its half-open trial is taken"""
+        with self._lock:
+            return self._admits(self._get(backend))
+    
+    def acquire(self, backend: Hashable) -> Optional[object]:
+        """
+        Ask to send a request to a backend
+        
+        On a half-open circuit the first caller becomes the trial; everyone
+        else is refused until its outcome is recorded or it is released.
+        
+        Returns:
+            Token for release(), or None if the backend is unavailable
+        """
+        with self._lock:
+            health = self._get(backend)
+            if not self._admits(health):
+                return None
+            if health.state == CircuitState.HALF_OPEN:
+                health.trial = object()
+                return health.trial
+            return _CLOSED_PASS
+    
+    def release(self, backend: Hashable, token: Optional[object]):
+        """
+        Finish a request started with acquire()
+        
+        Frees the half-open trial if the request ended without an outcome
+        (e.g. it was cancelled or never reached the backend).
+        """
+        with self._lock:
+            health = self._get(backend)
+            if token is not None and health.trial is token:
+                health.trial = None
+    
+    def is_degraded(self, backend: Hashable) -> bool:
+        """True if the rolling success rate or p95 latency is poor"""
+        with self._lock:
+            health = self._get(backend)
+            if len(health.samples) >= self.min_samples:
+                if health.success_rate() < self.degraded_success_rate:
+                    return True
+            if health.latency_samples() >= self.min_samples:
+                if health.latency_percentile(95) > self.degraded_latency:
+                    return True
+            return False
+    
+    def retry_in(self, backend: Hashable) -> float:
+        """Seconds until an open circuit goes half-open (0 if not open)"""
+        with self._lock:
+            health = self._get(backend)
+            if health.state != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, health.retry_at - time.time())
+    
+    def route(self, candidates: List[Hashable], probes: Optional[Dict[Hashable, Probe]] = None) -> List[Hashable]:
+        """
+        Order backends for a request
+        
+        Unavailable backends (open circuit, half-open trial taken) are
+        dropped; degraded ones move behind healthy ones, otherwise the
+        preference order is kept. Routing claims nothing: call acquire()
+        before each request.
+        
+        Args:
+            candidates: Backends in preference order (primary first)
+            probes: Availability probes to use while a circuit is open
+        
+        Returns:
+            Backends to try, in order (empty if all are known down)
+        """
+        if probes:
+            with self._lock:
+                self._probes.update(probes)
+        
+        available = [backend for backend in candidates if self.is_available(backend)]
+        healthy = [backend for backend in available if not self.is_degraded(backend)]
+        return healthy + [backend for backend in available if backend not in healthy]
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current state and statistics per backend"""
+        with self._lock:
+            return {
+                self._name(backend): {
+                    'state': health.state.value,
+                    'success_rate': health.success_rate(),
+                    'p50_latency': health.latency_percentile(50),
+                    'p95_latency': health.latency_percentile(95),
+                    'consecutive_failures': health.consecutive_failures,
+                    'retry_in': max(0.0, health.retry_at - time.time()) if health.state == CircuitState.OPEN else 0.0,
+                }
+                for backend, health in self._backends.items()
+            }
+    
+    # ============================================
+    # HALF-OPEN PROBING
+    # ============================================
+    
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is not None:
+                return
+            self._prober = threading.Thread(target=self._probe_loop, name="backend-health-probe", daemon=True)
+            self._prober.start()
+    
+    def _probe_loop(self):
+        """Probe backends whose cooldown is over until every circuit is closed"""
+        while True:
+            with self._lock:
+                waiting = {
+                    backend: health.retry_at for backend, health in self._backends.items()
+                    if health.state != CircuitState.CLOSED
+                }
+                if not waiting:
+                    self._prober = None
+                    return
+            
+            now = time.time()
+            for backend, retry_at in waiting.items():
+                if retry_at <= now:
+                    self._probe(backend)
+            
+            # Sleep until the next cooldown ends (re-check half-open ones meanwhile)
+            with self._lock:
+                pending = [
+                    health.retry_at for health in self._backends.values()
+                    if health.state == CircuitState.OPEN
+                ]
+            next_retry = min(pending, default=now + self.base_cooldown)
+            time.sleep(min(max(next_retry - time.time(), 1.0), self.base_cooldown))
+    
+    def _probe(self, backend: Hashable):
+        probe = self._probes.get(backend)
+        if probe is None:
+            return
+        token = self.acquire(backend)
+        if token is None:
+            return  # Still open, or a real request is the trial
+        try:
+            success = bool(asyncio.run(probe()))
+        except Exception as e:
+            logger.debug(f"Health probe for {self._name(backend)} failed: {e}")
+            success = False
+        self.record(backend, success)
+        self.release(backend, token)
+    
+    @staticmethod
+    def _name(backend: Hashable) -> str:
+        return str(getattr(backend, 'value', backend))
+
+
+# Shared monitor for every CardGenerator
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor() -> HealthMonitor:
+    """
+    Get the shared health monitor, creating it on first use
+    
+    Thresholds can be set in sd_config.env / .env: BACKEND_FAILURE_THRESHOLD,
+    BACKEND_COOLDOWN_SECONDS, BACKEND_MAX_COOLDOWN_SECONDS and
+    BACKEND_DEGRADED_LATENCY_SECONDS.
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor(
+                failure_threshold=int(os.getenv('BACKEND_FAILURE_THRESHOLD', '3')),
+                cooldown=float(os.getenv('BACKEND_COOLDOWN_SECONDS', '30')),
+                max_cooldown=float(os.getenv('BACKEND_MAX_COOLDOWN_SECONDS', '300')),
+                degraded_latency=float(os.getenv('BACKEND_DEGRADED_LATENCY_SECONDS', '60'))
+            )
+        return _monitor
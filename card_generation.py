@@ -4,17 +4,24 @@ Dual Backend Support: Grok API (xAI) + Local Stable Diffusion
 """
 
 import os
+import json
 import asyncio
 import aiohttp
 import base64
 import time
+import shutil
 import logging
+import weakref
+import contextlib
 from enum import Enum
 from typing import Optional, Dict, List, Tuple, Callable
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from generation_cache import GenerationCache, generation_cache_key, get_generation_cache
+from backend_health import HealthMonitor, get_health_monitor
+
 # Load environment variables from sd_config.env
 load_dotenv('sd_config.env')
 load_dotenv()  # Also load .env if exists (will override sd_config.env)
@@ -30,6 +37,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pooled HTTP sessions shared by every CardGenerator on the same event loop:
+# {event loop: {(backend, base url): aiohttp.ClientSession}}
+_SESSION_POOL = weakref.WeakKeyDictionary()
+
+# Fixed-seed renders in progress, so identical requests share one:
+# {event loop: {cache key: asyncio.Task}}
+_IN_FLIGHT = weakref.WeakKeyDictionary()
+
+
+def _save_image(image_b64: str, filepath: Path) -> int:
+    """Decode a base64 image and write it to disk. Returns the size in bytes."""
+    image_bytes = base64.b64decode(image_b64)
+    with open(filepath, 'wb') as f:
+        f.write(image_bytes)
+    return len(image_bytes)
+
 
 class GenerationBackend(Enum):
     """Available image generation backends"""
@@ -119,6 +142,24 @@ class CardGenerator:
         ]
     }
     
+    # Connection pool settings per backend (keep-alive avoids a DNS/TCP/TLS
+    # handshake per request; the local SD WebUI handles one job at a time)
+    CONNECTION_LIMITS = {
+        GenerationBackend.GROK: {
+            'limit': 16,
+            'limit_per_host': 8,
+            'keepalive_timeout': 60,
+        },
+        GenerationBackend.STABLE_DIFFUSION: {
+            'limit': 4,
+            'limit_per_host': 4,
+            'keepalive_timeout': 300,
+        },
+    }
+    
+    # Most images the Grok API returns per request (n)
+    GROK_MAX_IMAGES_PER_REQUEST = 10
+    
     def __init__(
         self,
         backend: str = 'grok',
@@ -158,6 +199,7 @@ class CardGenerator:
         self.sd_enable_hr = os.getenv('ENABLE_HIRES_FIX', 'False').lower() == 'true'
         self.sd_hr_upscaler = os.getenv('HR_UPSCALER', 'R-ESRGAN 4x+ Anime6B')
         self.sd_hr_scale = float(os.getenv('HR_SCALE', '2.0'))
+        self.sd_max_batch_size = max(1, int(os.getenv('SD_MAX_BATCH_SIZE', '4')))
         
         # Output directory
         self.output_dir = Path('Assets/generated_cards')
@@ -165,7 +207,7 @@ class CardGenerator:
         
         # Generation tracking
         self.generation_count = 0
-        self.session_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.session_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')  # Unique per generator
         
         # Custom overrides (can be set after initialization)
         self.custom_steps = None
@@ -173,6 +215,21 @@ class CardGenerator:
         self.custom_width = None
         self.custom_height = None
         
+        # Deterministic mode (opt-in): with a fixed seed, identical SD requests
+        # render the same image and are served from the generation cache
+        # (None = shared cache from get_generation_cache())
+        seed = os.getenv('GENERATION_SEED', '')
+        self.seed = int(seed) if seed else None
+        self.result_cache: Optional[GenerationCache] = None
+        
+        # Request slots per backend, set by the generation scheduler so that
+        # fallbacks count against the backend that is actually called
+        # (None = no limit)
+        self.backend_slots: Optional[Dict[GenerationBackend, asyncio.Semaphore]] = None
+        
+        # Shared circuit breakers: backends known to be down are skipped
+        self.health_monitor: HealthMonitor = get_health_monitor()
+        
         logger.info(
             f"CardGenerator initialized: backend={backend}, tier={tier}, "
             f"user={self.user_id}"
@@ -191,6 +248,53 @@ class CardGenerator:
         else:
             logger.warning(f"Invalid Grok API key format. Should start with 'xai-'")
     
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """
+        Close the pooled backend sessions of the running event loop.
+        
+        The sessions are shared with other generators on the same loop, so
+        call this once when the loop is done with generation (before
+        loop.close()); later calls on the loop open fresh sessions.
+        """
+        await close_sessions()
+    
+    def _get_session(self, backend: GenerationBackend) -> aiohttp.ClientSession:
+        """
+        Get the pooled HTTP session for a backend on the running event loop.
+        
+        Sessions are keyed by backend and base URL, so every generator on
+        the loop reuses the same keep-alive connections.
+        
+        Args:
+            backend: Backend the session talks to
+            
+        Returns:
+            Open aiohttp session (timeouts are set per request)
+        """
+        base_url = self.grok_base_url if backend == GenerationBackend.GROK else self.sd_url
+        key = (backend.value, base_url)
+        
+        sessions = _SESSION_POOL.setdefault(asyncio.get_running_loop(), {})
+        session = sessions.get(key)
+        if session is None or session.closed:
+            limits = self.CONNECTION_LIMITS[backend]
+            connector = aiohttp.TCPConnector(
+                limit=limits['limit'],
+                limit_per_host=limits['limit_per_host'],
+                keepalive_timeout=limits['keepalive_timeout'],
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            sessions[key] = session
+        
+        return session
+    
     async def generate_static_card(
         self,
         prompt: str,
@@ -237,22 +341,30 @@ class CardGenerator:
                 'color_palette': color_palette
             }, self.tier)
             
-            if progress_callback:
-                progress_callback(f"Generating with {self.backend.value}...", 30)
+            # Skip backends that are known to be down
+            backends = self._route_backends()
+            if not backends:
+                return {
+                    'success': False,
+                    'error': self._unavailable_error(self.backend),
+                    'path': None,
+                    'metadata': None
+                }
             
-            # Try primary backend
-            result = await self._generate_with_backend(
-                self.backend, params, progress_callback
-            )
+            if progress_callback:
+                progress_callback(f"Generating with {backends[0].value}...", 30)
             
-            # Fallback logic
-            if not result['success'] and self.backend == GenerationBackend.GROK:
-                logger.warning("Grok generation failed, falling back to Stable Diffusion")
-                if progress_callback:
-                    progress_callback("Trying fallback backend...", 50)
+            # Try backends in order, falling back after a failure
+            for attempt, backend in enumerate(backends):
+                if attempt > 0:
+                    logger.warning(f"{backends[attempt - 1].value} generation failed, falling back to {backend.value}")
+                    if progress_callback:
+                        progress_callback("Trying fallback backend...", 50)
                 result = await self._generate_with_backend(
-                    GenerationBackend.STABLE_DIFFUSION, params, progress_callback
+                    backend, params, progress_callback
                 )
+                if result['success']:
+                    break
             
             if result['success']:
                 if progress_callback:
@@ -378,6 +490,160 @@ class CardGenerator:
                 'metadata': None
             }
     
+    async def generate_batch(
+        self,
+        prompt: str,
+        count: int = 4,
+        style: str = 'Fantasy',
+        color_palette: str = 'Crimson & Gold',
+        progress_callback: Optional[Callable[[str, int], None]] = None
+    ) -> Dict:
+        """
+        Generate several variants of a static card in as few backend calls
+        as the backend allows.
+        
+        Stable Diffusion renders the variants as batch_size x n_iter of one
+        txt2img request (batch_size capped by SD_MAX_BATCH_SIZE), so the model
+        is loaded and warmed up once. Grok returns up to 10 images per
+        request. Returned images are decoded and saved in parallel.
+        
+        Args:
+            prompt: Character description
+            count: Number of variants
+            style: Art style
+            color_palette: Color palette name
+            progress_callback: Optional callback(message, percentage)
+            
+        Returns:
+            Dict with 'success', 'results' (one generate_static_card-style
+            dict per saved variant), 'path' (first variant), 'error'
+        """
+        try:
+            # A batch may not exceed the tier's daily allowance
+            max_daily = self.TIER_CONSTRAINTS[self.tier]['max_daily_generations']
+            error = None
+            if count < 1:
+                error = 'Variant count must be at least 1'
+            elif max_daily > 0 and count > max_daily:
+                error = f"{self.tier.value} tier allows up to {max_daily} cards per day"
+            if error:
+                return {
+                    'success': False,
+                    'error': error,
+                    'path': None,
+                    'results': []
+                }
+            
+            if progress_callback:
+                progress_callback("Validating prompt...", 10)
+            
+            validation = self.validate_prompt(prompt, self.tier)
+            if not validation['valid']:
+                return {
+                    'success': False,
+                    'error': validation['reason'],
+                    'path': None,
+                    'results': []
+                }
+            
+            if progress_callback:
+                progress_callback("Building generation parameters...", 20)
+            
+            full_prompt = self._build_prompt(prompt, style, color_palette)
+            params = self.apply_tier_constraints({
+                'prompt': full_prompt,
+                'style': style,
+                'color_palette': color_palette
+            }, self.tier)
+            
+            # Skip backends that are known to be down
+            backends = self._route_backends()
+            if not backends:
+                return {
+                    'success': False,
+                    'error': self._unavailable_error(self.backend),
+                    'path': None,
+                    'results': []
+                }
+            
+            if progress_callback:
+                progress_callback(f"Generating {count} variants with {backends[0].value}...", 30)
+            
+            # Try backends in order; fallbacks only render the missing variants
+            images = []
+            error = None
+            for attempt, backend in enumerate(backends):
+                if attempt > 0:
+                    logger.warning(f"{backends[attempt - 1].value} batch generation incomplete, falling back to {backend.value}")
+                    if progress_callback:
+                        progress_callback("Trying fallback backend...", 50)
+                result = await self._generate_batch_with_backend(
+                    backend, params, count - len(images), progress_callback
+                )
+                images = images + result['images']
+                error = error or result['error']
+                if len(images) >= count:
+                    break
+            
+            if not images:
+                return {
+                    'success': False,
+                    'error': error or 'No images generated',
+                    'path': None,
+                    'results': []
+                }
+            
+            if progress_callback:
+                progress_callback("Finalizing...", 95)
+            
+            # Save per-variant metadata
+            batch_id = f"{self.session_id}_{datetime.now().strftime('%H%M%S%f')}"
+            results = []
+            for variant, image in enumerate(images, start=1):
+                metadata = {
+                    'prompt': full_prompt,
+                    'style': style,
+                    'color_palette': color_palette,
+                    'tier': self.tier.value,
+                    'backend': image['backend'],
+                    'generation_time': image['generation_time'],
+                    'file_size_mb': image['file_size_mb'],
+                    'timestamp': datetime.now().isoformat(),
+                    'user_id': self.user_id,
+                    'session_id': self.session_id,
+                    'batch_id': batch_id,
+                    'variant': variant,
+                    'variant_count': len(images),
+                    'seed': image.get('seed'),
+                    'revised_prompt': image.get('revised_prompt')
+                }
+                self._log_generation(metadata)
+                results.append({
+                    'success': True,
+                    'path': image['path'],
+                    'metadata': metadata,
+                    'error': None
+                })
+            
+            if progress_callback:
+                progress_callback(f"Complete! {len(results)} of {count} variants", 100)
+            
+            return {
+                'success': True,
+                'path': results[0]['path'],
+                'results': results,
+                'error': error if len(results) < count else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Batch generation error: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': f"Batch generation failed: {str(e)}",
+                'path': None,
+                'results': []
+            }
+    
     def validate_prompt(self, prompt: str, tier: MembershipTier) -> Dict:
         """
         Validate prompt against tier restrictions.
@@ -486,21 +752,26 @@ class CardGenerator:
         Returns:
             Dict with backend names as keys and availability as values
         """
+        # Probe both backends concurrently
+        grok_ok, sd_ok = await asyncio.gather(
+            self._test_grok_connection(),
+            self._test_sd_connection(),
+            return_exceptions=True
+        )
+        
         results = {}
         
         # Test Grok
-        try:
-            results['grok'] = await self._test_grok_connection()
-        except Exception as e:
-            logger.error(f"Grok availability check failed: {e}")
-            results['grok'] = False
+        if isinstance(grok_ok, Exception):
+            logger.error(f"Grok availability check failed: {grok_ok}")
+            grok_ok = False
+        results['grok'] = grok_ok
         
         # Test Stable Diffusion
-        try:
-            results['stable_diffusion'] = await self._test_sd_connection()
-        except Exception as e:
-            logger.error(f"SD availability check failed: {e}")
-            results['stable_diffusion'] = False
+        if isinstance(sd_ok, Exception):
+            logger.error(f"SD availability check failed: {sd_ok}")
+            sd_ok = False
+        results['stable_diffusion'] = sd_ok
         
         return results
     
@@ -540,6 +811,42 @@ class CardGenerator:
         
         return full_prompt
     
+    def _route_backends(self) -> List[GenerationBackend]:
+        """
+        Backends to try for a request, in order.
+        
+        The configured backend comes first, with Stable Diffusion as the
+        fallback for Grok. Backends with an open circuit are dropped and
+        degraded ones (low success rate, slow p95) are tried last.
+        """
+        candidates = [self.backend]
+        if self.backend == GenerationBackend.GROK:
+            candidates.append(GenerationBackend.STABLE_DIFFUSION)
+        
+        probes = {backend: (lambda backend=backend: self._probe_backend(backend)) for backend in candidates}
+        backends = self.health_monitor.route(candidates, probes)
+        if backends and backends[0] != self.backend:
+            logger.info(f"{self.backend.value} unavailable or degraded, routing to {backends[0].value}")
+        return backends
+    
+    def _unavailable_error(self, backend: GenerationBackend) -> str:
+        """Error message for a request to a backend whose circuit is open."""
+        retry_in = self.health_monitor.retry_in(backend)
+        return (
+            f"{backend.value} is temporarily unavailable - "
+            f"please try again in {max(1, round(retry_in))} seconds"
+        )
+    
+    def _record_health(self, backend: GenerationBackend, started: float, status: Optional[int] = None):
+        """
+        Report a request outcome to the health monitor.
+        
+        Only server-side trouble counts as a failure: no response (status
+        None), 5xx or 429. A rejected request (4xx) means the backend is up.
+        """
+        success = status is not None and status < 500 and status != 429
+        self.health_monitor.record(backend, success, time.time() - started)
+    
     async def _generate_with_backend(
         self,
         backend: GenerationBackend,
@@ -548,27 +855,150 @@ class CardGenerator:
     ) -> Dict:
         """Generate image using specified backend."""
         
-        start_time = time.time()
+        async def generate() -> Dict:
+            start_time = time.time()
+            
+            if backend == GenerationBackend.GROK:
+                result = await self._generate_with_grok(params, progress_callback)
+            else:
+                result = await self._generate_with_sd(params, progress_callback)
+            
+            if result['success']:
+                result['generation_time'] = time.time() - start_time
+                result['backend'] = backend.value
+            
+            return result
+        
+        return await self._call_in_slot(backend, generate)
+    
+    def _backend_slot(self, backend: GenerationBackend):
+        """Async context manager holding one request slot of a backend."""
+        if self.backend_slots and backend in self.backend_slots:
+            return self.backend_slots[backend]
+        return contextlib.nullcontext()
+    
+    async def _call_in_slot(self, backend: GenerationBackend, call: Callable) -> Dict:
+        """
+        Run one backend call (a coroutine factory) while holding a slot.
         
+        The circuit is checked once the slot is ours, since it may have
+        opened while we waited. A half-open circuit lets one call through as
+        its trial; other calls fail at once so the caller can fall back.
+        """
+        async with self._backend_slot(backend):
+            token = self.health_monitor.acquire(backend)
+            if token is None:
+                return {
+                    'success': False,
+                    'error': self._unavailable_error(backend),
+                    'path': None
+                }
+            try:
+                return await call()
+            finally:
+                self.health_monitor.release(backend, token)
+    
+    def _plan_sd_batches(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Split a variant count into (batch_size, n_iter) txt2img requests.
+        
+        Full batches share one request via n_iter; a remainder that does not
+        fill a batch gets a second request, so no extra images are rendered.
+        """
+        full_batches, remainder = divmod(count, self.sd_max_batch_size)
+        plan = []
+        if full_batches:
+            plan.append((self.sd_max_batch_size, full_batches))
+        if remainder:
+            plan.append((remainder, 1))
+        return plan
+    
+    async def _generate_batch_with_backend(
+        self,
+        backend: GenerationBackend,
+        params: Dict,
+        count: int,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict:
+        """
+        Generate `count` images with one backend in as few calls as possible.
+        
+        Returns:
+            Dict with 'images' (saved image dicts tagged with backend and the
+            per-image share of the call time) and 'error' (first failure)
+        """
+        start_time = time.time()
         if backend == GenerationBackend.GROK:
-            result = await self._generate_with_grok(params, progress_callback)
+            # Grok requests run side by side, each in its own slot
+            per_call = self.GROK_MAX_IMAGES_PER_REQUEST
+            results = await asyncio.gather(*(
+                self._call_in_slot(backend, lambda n=min(per_call, count - start): self._generate_with_grok(
+                    params, progress_callback, count=n
+                ))
+                for start in range(0, count, per_call)
+            ))
         else:
-            result = await self._generate_with_sd(params, progress_callback)
+            # The local WebUI renders one request at a time: send them in turn
+            results = []
+            for batch_size, n_iter in self._plan_sd_batches(count):
+                results.append(await self._call_in_slot(backend, lambda: self._generate_with_sd(
+                    params, progress_callback, batch_size=batch_size, n_iter=n_iter
+                )))
+        elapsed = time.time() - start_time
         
-        if result['success']:
-            result['generation_time'] = time.time() - start_time
-            result['backend'] = backend.value
+        images = [image for result in results if result['success'] for image in result['images']]
+        for image in images:
+            image['backend'] = backend.value
+            image['generation_time'] = elapsed / len(images)
         
-        return result
+        errors = [result['error'] for result in results if not result['success']]
+        return {
+            'images': images,
+            'error': errors[0] if errors else None
+        }
+    
+    def _reserve_filepaths(self, count: int) -> List[Path]:
+        """Allocate output file names for the next `count` images."""
+        filepaths = []
+        for _ in range(count):
+            filename = f"card_{self.session_id}_{self.generation_count:04d}.png"
+            filepaths.append(self.output_dir / filename)
+            self.generation_count += 1
+        return filepaths
+    
+    async def _save_images(self, images_b64: List[str]) -> List[Dict]:
+        """
+        Decode and save returned images in parallel worker threads.
+        
+        Returns:
+            One dict per image with 'path' and 'file_size_mb'
+        """
+        # Reserve file names first so concurrent saves never collide
+        filepaths = self._reserve_filepaths(len(images_b64))
+        
+        loop = asyncio.get_running_loop()
+        sizes = await asyncio.gather(*(
+            loop.run_in_executor(None, _save_image, image_b64, filepath)
+            for image_b64, filepath in zip(images_b64, filepaths)
+        ))
+        
+        return [
+            {'path': str(filepath), 'file_size_mb': size / (1024 * 1024)}
+            for filepath, size in zip(filepaths, sizes)
+        ]
     
     async def _generate_with_grok(
         self,
         params: Dict,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        count: int = 1
     ) -> Dict:
         """
         Generate image using Grok API.
         Uses /v1/images/generations endpoint.
+        
+        Args:
+            count: Images to request in this call (n, at most GROK_MAX_IMAGES_PER_REQUEST)
         """
         if not self.grok_api_key or self.grok_api_key == 'your_key_here':
             return {
@@ -591,22 +1021,27 @@ class CardGenerator:
             payload = {
                 'model': 'grok-2-image-1212',
                 'prompt': params['prompt'],
-                'n': 1,
+                'n': count,
                 'response_format': 'b64_json'
             }
             
             if progress_callback:
                 progress_callback("Generating with Grok...", 60)
             
-            timeout = aiohttp.ClientTimeout(total=120)  # 2 minute timeout
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            # 2 minute timeout, plus time for extra images
+            timeout = aiohttp.ClientTimeout(total=120 + 30 * (count - 1))
+            session = self._get_session(GenerationBackend.GROK)
+            request_started = time.time()
+            try:
                 async with session.post(
                     f'{self.grok_base_url}/images/generations',
                     headers=headers,
-                    json=payload
+                    json=payload,
+                    timeout=timeout
                 ) as response:
                     
                     if response.status != 200:
+                        self._record_health(GenerationBackend.GROK, request_started, response.status)
                         error_text = await response.text()
                         logger.error(f"Grok API error: {response.status} - {error_text}")
                         return {
@@ -619,31 +1054,27 @@ class CardGenerator:
                         progress_callback("Downloading image...", 80)
                     
                     data = await response.json()
-                    
-                    # Extract image data
-                    image_data = data['data'][0]['b64_json']
-                    image_bytes = base64.b64decode(image_data)
-                    
-                    # Save image
-                    filename = f"card_{self.session_id}_{self.generation_count:04d}.png"
-                    filepath = self.output_dir / filename
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(image_bytes)
-                    
-                    file_size_mb = len(image_bytes) / (1024 * 1024)
-                    
-                    if progress_callback:
-                        progress_callback("Image saved!", 90)
-                    
-                    self.generation_count += 1
-                    
-                    return {
-                        'success': True,
-                        'path': str(filepath),
-                        'file_size_mb': file_size_mb,
-                        'error': None
-                    }
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self._record_health(GenerationBackend.GROK, request_started)
+                raise
+            self._record_health(GenerationBackend.GROK, request_started, response.status)
+            
+            # Extract and save image data
+            items = data['data']
+            images = await self._save_images([item['b64_json'] for item in items])
+            for image, item in zip(images, items):
+                image['revised_prompt'] = item.get('revised_prompt')
+            
+            if progress_callback:
+                progress_callback("Image saved!", 90)
+            
+            return {
+                'success': True,
+                'path': images[0]['path'],
+                'file_size_mb': images[0]['file_size_mb'],
+                'images': images,
+                'error': None
+            }
         
         except asyncio.TimeoutError:
             logger.error("Grok API timeout")
@@ -686,9 +1117,17 @@ class CardGenerator:
     async def _generate_with_sd(
         self,
         params: Dict,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        batch_size: int = 1,
+        n_iter: int = 1
     ) -> Dict:
-        """Generate image using local Stable Diffusion WebUI."""
+        """
+        Generate image using local Stable Diffusion WebUI.
+        
+        Args:
+            batch_size: Images rendered together per batch (bounded by VRAM)
+            n_iter: Batches run back to back in this request
+        """
         
         try:
             if progress_callback:
@@ -712,8 +1151,9 @@ class CardGenerator:
                 'width': width,
                 'height': height,
                 'sampler_name': ["Euler A", "Euler a", "Euler_Automatic"].count(self.sd_sampler) and self.sd_sampler or "Euler A",
-                'seed': -1,  # Random seed
-                'batch_size': 1,
+                'seed': self.seed if self.seed is not None else -1,  # -1 = random seed
+                'batch_size': batch_size,
+                'n_iter': n_iter,
                 # High-res fix settings
                 'enable_hr': self.sd_enable_hr,
                 'hr_upscaler': self.sd_hr_upscaler,
@@ -734,51 +1174,11 @@ class CardGenerator:
                 settings_info = f"Steps: {steps}, CFG: {cfg_scale}"
                 progress_callback(f"Generating with {self.sd_model.split('.')[0]} ({settings_info})...", 60)
             
-            timeout = aiohttp.ClientTimeout(total=180)  # 3 minute timeout
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    f'{self.sd_url}/sdapi/v1/txt2img',
-                    json=payload
-                ) as response:
-                    
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"SD API error: {response.status} - {error_text}")
-                        return {
-                            'success': False,
-                            'error': f'Stable Diffusion error: {response.status}',
-                            'path': None
-                        }
-                    
-                    if progress_callback:
-                        progress_callback("Processing image...", 80)
-                    
-                    data = await response.json()
-                    
-                    # Extract first image
-                    image_data = data['images'][0]
-                    image_bytes = base64.b64decode(image_data)
-                    
-                    # Save image
-                    filename = f"card_{self.session_id}_{self.generation_count:04d}.png"
-                    filepath = self.output_dir / filename
-                    
-                    with open(filepath, 'wb') as f:
-                        f.write(image_bytes)
-                    
-                    file_size_mb = len(image_bytes) / (1024 * 1024)
-                    
-                    if progress_callback:
-                        progress_callback("Image saved!", 90)
-                    
-                    self.generation_count += 1
-                    
-                    return {
-                        'success': True,
-                        'path': str(filepath),
-                        'file_size_mb': file_size_mb,
-                        'error': None
-                    }
+            # Deterministic mode: fixed-seed single images are served from the cache
+            if self.seed is not None and batch_size * n_iter == 1:
+                return await self._cached_txt2img(payload, progress_callback)
+            
+            return await self._txt2img(payload, progress_callback)
         
         except aiohttp.ClientConnectorError:
             logger.error("Cannot connect to Stable Diffusion - is it running?")
@@ -802,6 +1202,154 @@ class CardGenerator:
                 'path': None
             }
     
+    async def _txt2img(
+        self,
+        payload: Dict,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict:
+        """Send a txt2img request and save the returned images."""
+        # 3 minute timeout, plus time for extra images
+        image_count = payload['batch_size'] * payload['n_iter']
+        timeout = aiohttp.ClientTimeout(total=180 + 90 * (image_count - 1))
+        session = self._get_session(GenerationBackend.STABLE_DIFFUSION)
+        request_started = time.time()
+        try:
+            async with session.post(
+                f'{self.sd_url}/sdapi/v1/txt2img',
+                json=payload,
+                timeout=timeout
+            ) as response:
+                
+                if response.status != 200:
+                    self._record_health(GenerationBackend.STABLE_DIFFUSION, request_started, response.status)
+                    error_text = await response.text()
+                    logger.error(f"SD API error: {response.status} - {error_text}")
+                    return {
+                        'success': False,
+                        'error': f'Stable Diffusion error: {response.status}',
+                        'path': None
+                    }
+                
+                if progress_callback:
+                    progress_callback("Processing image...", 80)
+                
+                data = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._record_health(GenerationBackend.STABLE_DIFFUSION, request_started)
+            raise
+        self._record_health(GenerationBackend.STABLE_DIFFUSION, request_started, response.status)
+        
+        # Batches of more than one image start with a grid preview
+        info = data.get('info') or '{}'
+        if isinstance(info, str):
+            info = json.loads(info)
+        first = info.get('index_of_first_image', 0)
+        image_data = data['images'][first:first + image_count]
+        
+        images = await self._save_images(image_data)
+        seeds = info.get('all_seeds', [])
+        for index, image in enumerate(images):
+            image['seed'] = seeds[index] if index < len(seeds) else None
+        
+        if progress_callback:
+            progress_callback("Image saved!", 90)
+        
+        return {
+            'success': True,
+            'path': images[0]['path'],
+            'file_size_mb': images[0]['file_size_mb'],
+            'images': images,
+            'error': None
+        }
+    
+    async def _cached_txt2img(
+        self,
+        payload: Dict,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict:
+        """
+        Serve a fixed-seed txt2img request from the generation cache.
+        
+        On a miss the first request renders and fills the cache; identical
+        requests arriving meanwhile on this event loop wait for it instead
+        of rendering again. Every caller gets its own copy of the cached
+        image, so embedding card data never touches the cached file; if the
+        image could not be cached, waiters render their own.
+        """
+        cache = self.result_cache or get_generation_cache()
+        key = generation_cache_key(payload)
+        
+        cached_path = cache.get(key)
+        if cached_path:
+            if progress_callback:
+                progress_callback("Found identical card in cache...", 80)
+            return await self._copy_cached_image(cached_path, payload['seed'], progress_callback)
+        
+        loop = asyncio.get_running_loop()
+        flights = _IN_FLIGHT.setdefault(loop, {})
+        flight = flights.get(key)
+        if flight is None:
+            flight = loop.create_task(self._render_into_cache(cache, key, payload, progress_callback))
+            flights[key] = flight
+            flight.add_done_callback(lambda _: flights.pop(key, None))
+            # Shielded so a cancelled caller does not abort the render others wait on
+            return await asyncio.shield(flight)
+        
+        if progress_callback:
+            progress_callback("Identical card already rendering - waiting for it...", 60)
+        result = await asyncio.shield(flight)
+        if not result['success']:
+            return result
+        
+        # Never copy the leader's own card: its caller embeds data into it in
+        # place. If caching failed, render a card of our own instead.
+        cached_path = cache.get(key)
+        if cached_path is None:
+            return await self._txt2img(payload, progress_callback)
+        return await self._copy_cached_image(cached_path, payload['seed'], progress_callback)
+    
+    async def _render_into_cache(
+        self,
+        cache: GenerationCache,
+        key: str,
+        payload: Dict,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict:
+        """Render a request and store the image under its cache key."""
+        result = await self._txt2img(payload, progress_callback)
+        if result['success']:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, cache.put_file, key, result['path']
+                )
+            except Exception as e:
+                logger.warning(f"Could not cache generated image: {e}")
+        return result
+    
+    async def _copy_cached_image(
+        self,
+        source_path: str,
+        seed: int,
+        progress_callback: Optional[Callable] = None
+    ) -> Dict:
+        """Copy a cached image to a new card file."""
+        filepath = self._reserve_filepaths(1)[0]
+        await asyncio.get_running_loop().run_in_executor(None, shutil.copyfile, source_path, filepath)
+        file_size_mb = filepath.stat().st_size / (1024 * 1024)
+        
+        if progress_callback:
+            progress_callback("Image saved!", 90)
+        
+        image = {'path': str(filepath), 'file_size_mb': file_size_mb, 'seed': seed, 'cached': True}
+        return {
+            'success': True,
+            'path': image['path'],
+            'file_size_mb': file_size_mb,
+            'images': [image],
+            'cached': True,
+            'error': None
+        }
+    
     async def _create_animation(
         self,
         static_path: str,
@@ -834,7 +1382,6 @@ class CardGenerator:
             
             # Placeholder: copy static as fallback
             # In production: ffmpeg command here
-            import shutil
             shutil.copy(static_path, animated_path.with_suffix('.png'))
             
             if progress_callback:
@@ -856,12 +1403,13 @@ class CardGenerator:
             headers = {'Authorization': f'Bearer {self.grok_api_key}'}
             timeout = aiohttp.ClientTimeout(total=10)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(
-                    f'{self.grok_base_url}/models',
-                    headers=headers
-                ) as response:
-                    return response.status == 200
+            session = self._get_session(GenerationBackend.GROK)
+            async with session.get(
+                f'{self.grok_base_url}/models',
+                headers=headers,
+                timeout=timeout
+            ) as response:
+                return response.status == 200
         except:
             return False
     
@@ -870,14 +1418,29 @@ class CardGenerator:
         try:
             timeout = aiohttp.ClientTimeout(total=5)
             
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(
-                    f'{self.sd_url}/sdapi/v1/sd-models'
-                ) as response:
-                    return response.status == 200
+            session = self._get_session(GenerationBackend.STABLE_DIFFUSION)
+            async with session.get(
+                f'{self.sd_url}/sdapi/v1/sd-models',
+                timeout=timeout
+            ) as response:
+                return response.status == 200
         except:
             return False
     
+    async def _probe_backend(self, backend: GenerationBackend) -> bool:
+        """
+        Availability probe for the health monitor.
+        
+        Runs on the monitor's own short-lived event loop, so the pooled
+        sessions it opens are closed again afterwards.
+        """
+        try:
+            if backend == GenerationBackend.GROK:
+                return await self._test_grok_connection()
+            return await self._test_sd_connection()
+        finally:
+            await close_sessions()
+    
     def _log_generation(self, metadata: Dict):
         """Log generation to audit trail."""
         log_dir = Path('logs')
@@ -900,6 +1463,18 @@ class CardGenerator:
 
 
 # Helper functions for standalone use
+async def close_sessions():
+    """
+    Close the pooled backend sessions of the running event loop.
+    
+    Call before closing an event loop that ran generations, so keep-alive
+    connections are released cleanly.
+    """
+    sessions = _SESSION_POOL.pop(asyncio.get_running_loop(), {})
+    for session in sessions.values():
+        await session.close()
+
+
 async def test_grok_connection() -> bool:
     """Test Grok API availability."""
     generator = CardGenerator(backend='grok')
@@ -988,4 +1563,10 @@ if __name__ == '__main__':
         else:
             print(f"\n❌ Generation failed: {result['error']}")
     
-    asyncio.run(main())
+    async def run():
+        try:
+            await main()
+        finally:
+            await close_sessions()
+    
+    asyncio.run(run())
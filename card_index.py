@@ -0,0 +1,257 @@
+"""
+Aurora Archive - Card Discovery Index
+Persistent index of which image files are Aurora cards
+
+A crawler walks directory trees with os.scandir and probes only the payload
+header of each PNG (auRa chunk, or length + magic in the first few dozen
+pixels). Files whose header matches are extracted once to record their
+card_id, member_id and format. Every file is stored with its size and
+mtime, so later crawls skip anything unchanged and only re-probe new or
+modified files.
+
+Lookups by card_id / member_id replace filename guessing and exists() loops.
+
+Python 3.10+
+"""
+
+import os
+import json
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from mutable_steganography import MutableCardSteganography, ExtractResult
+from card_scanner import identify_card_format
+
+INDEX_VERSION = 1
+DEFAULT_EXTENSIONS = ('.png',)
+
+
+class CardIndex:
+    """
+    Path -> card record index persisted as JSON
+    
+    Record fields:
+        size, mtime_ns: File identity when last probed
+        is_card: True if the file holds a readable Aurora payload
+        card_id, member_id, format: Taken from the payload (None if absent)
+        error: Extraction error for files whose header matched but failed
+    """
+    
+    def __init__(
+        self,
+        index_path: str = "data/card_index.json",
+        stego: Optional[MutableCardSteganography] = None
+    ):
+        """
+        Initialize card index
+        
+        Args:
+            index_path: Path to the JSON index file
+            stego: Steganography instance used for probing (default: new instance)
+        """
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stego = stego or MutableCardSteganography()
+        self.entries = self._load_index()
+        self._rebuild_lookups()
+    
+    def _load_index(self) -> Dict[str, Dict]:
+        """Load index entries from file"""
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index.get("version") == INDEX_VERSION:
+                    return index.get("entries", {})
+            except Exception as e:
+                print(f"Warning: Could not load card index: {e}")
+        return {}
+    
+    def _save_index(self):
+        """Save index entries to file"""
+        try:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "last_updated": datetime.now().isoformat(),
+                    "entries": self.entries
+                }, f, ensure_ascii=False)
+        except Exception as e:
+            print(f"Error saving card index: {e}")
+    
+    def _rebuild_lookups(self):
+        """Rebuild the card_id / member_id -> paths maps"""
+        self._by_card_id = {}
+        self._by_member_id = {}
+        
+        for path, record in self.entries.items():
+            if not record.get("is_card"):
+                continue
+            if record.get("card_id"):
+                self._by_card_id.setdefault(record["card_id"], []).append(path)
+            if record.get("member_id"):
+                self._by_member_id.setdefault(record["member_id"], []).append(path)
+    
+    def _walk(self, root: str, recursive: bool, extensions: Tuple[str, ...]) -> Iterator[os.DirEntry]:
+        """Yield matching file entries under root (symlinked directories are not followed)"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    stack.append(entry.path)
+                            elif entry.is_file() and entry.name.lower().endswith(extensions):
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Warning: Cannot read directory {directory}: {e}")
+    
+    def crawl(
+        self,
+        root: str,
+        recursive: bool = True,
+        extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+        workers: Optional[int] = 1,
+        on_result: Optional[Callable[[ExtractResult], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Update the index for a directory tree
+        
+        Unchanged files (same size and mtime) are skipped without opening them.
+        Changed files get a header probe; only those that look like cards are
+        extracted, optionally across a process pool. Entries for files that
+        have disappeared from the crawled tree are dropped.
+        
+        Args:
+            root: Directory to crawl
+            recursive: If True, descend into subdirectories
+            extensions: File extensions to consider (lowercase)
+            workers: Processes for payload extraction (None = CPU count, 1 = in-process)
+            on_result: Called with each ExtractResult, so callers can reuse the
+                decoded payloads instead of extracting the cards again
+        
+        Returns:
+            Counts: files, skipped, probed, cards, removed
+        """
+        root = os.path.abspath(root)
+        stats = {"files": 0, "skipped": 0, "probed": 0, "cards": 0, "removed": 0}
+        seen = set()
+        candidates = []
+        
+        for entry in self._walk(root, recursive, extensions):
+            path = entry.path
+            seen.add(path)
+            stats["files"] += 1
+            
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            
+            record = self.entries.get(path)
+            if record and record["size"] == st.st_size and record["mtime_ns"] == st.st_mtime_ns:
+                stats["skipped"] += 1
+                continue
+            
+            self.entries[path] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "is_card": False,
+                "card_id": None,
+                "member_id": None,
+                "format": None,
+            }
+            stats["probed"] += 1
+            
+            if self.stego.probe_header(path):
+                candidates.append(path)
+        
+        # Only files whose header matched are decoded, to read their IDs
+        for result in self.stego.extract_many(candidates, workers=workers):
+            if on_result:
+                on_result(result)
+            
+            record = self.entries[result.path]
+            if result.error is not None:
+                record["error"] = result.error
+                continue
+            
+            record.update({
+                "is_card": True,
+                "card_id": result.data.get("card_id"),
+                "member_id": result.data.get("member_id"),
+                "format": identify_card_format(result.data),
+            })
+        
+        # Forget files that vanished from the crawled tree
+        for path in list(self.entries):
+            parent = os.path.dirname(path)
+            in_scope = parent == root or (recursive and parent.startswith(root + os.sep))
+            if in_scope and path not in seen:
+                del self.entries[path]
+                stats["removed"] += 1
+        
+        stats["cards"] = sum(1 for path in seen if self.entries.get(path, {}).get("is_card"))
+        
+        self._rebuild_lookups()
+        self._save_index()
+        return stats
+    
+    def get(self, path: str) -> Optional[Dict]:
+        """Get the index record for a file"""
+        return self.entries.get(os.path.abspath(path))
+    
+    def find_by_card_id(self, card_id: str) -> List[str]:
+        """Paths of indexed cards with this card_id"""
+        return list(self._by_card_id.get(card_id, []))
+    
+    def find_by_member_id(self, member_id: str) -> List[str]:
+        """Paths of indexed cards with this member_id"""
+        return list(self._by_member_id.get(member_id, []))
+    
+    def find_card(
+        self,
+        card_id: Optional[str] = None,
+        member_id: Optional[str] = None,
+        root: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Resolve a card image from its IDs
+        
+        Args:
+            card_id: Card ID to match first
+            member_id: Member ID to match if no card_id match
+            root: Only return cards under this directory
+        
+        Returns:
+            Path of the most recently modified match that still exists, or None
+        """
+        prefix = os.path.abspath(root) + os.sep if root else None
+        
+        for paths in (
+            self.find_by_card_id(card_id) if card_id else [],
+            self.find_by_member_id(member_id) if member_id else [],
+        ):
+            if prefix:
+                paths = [p for p in paths if p.startswith(prefix)]
+            
+            paths.sort(key=lambda p: self.entries[p]["mtime_ns"], reverse=True)
+            for path in paths:
+                if os.path.exists(path):
+                    return path
+        
+        return None
+    
+    def cards(self, root: Optional[str] = None) -> List[str]:
+        """Paths of all indexed cards (optionally under a directory)"""
+        prefix = os.path.abspath(root) + os.sep if root else None
+        return [
+            path for path, record in self.entries.items()
+            if record.get("is_card") and (prefix is None or path.startswith(prefix))
+        ]
@@ -0,0 +1,235 @@
+"""
+Aurora Archive - CSV Re-import
+Rebuild the user database from an exported users CSV and the card images
+
+Each CSV row is resolved to a card image with one directory listing per
+folder, falling back to the card discovery index for cards not found by
+name. Cards the index crawl already decoded are registered from its
+results; the rest are extracted in parallel across processes. All
+registrations are committed to the database in a single transaction at the
+end. Cancelling rolls the whole import back.
+
+No Qt dependency: CardScannerDialog runs this from a worker thread.
+
+Python 3.10+
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from card_scanner import CardScanner, ScanResult, identify_card_format
+
+try:
+    from card_index import CardIndex
+    CARD_INDEX_AVAILABLE = True
+except ImportError:
+    CARD_INDEX_AVAILABLE = False
+
+# progress_callback(done, total, message)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def _list_directory(directory: str, listings: Dict[str, Set[str]]) -> Set[str]:
+    """File names in a directory, listed once per import"""
+    if directory not in listings:
+        try:
+            with os.scandir(directory) as it:
+                listings[directory] = {entry.name for entry in it}
+        except OSError:
+            listings[directory] = set()
+    return listings[directory]
+
+
+def _candidate_names(card_id: str, member_id: str) -> List[str]:
+    """Filenames older exports used for a card"""
+    names = []
+    if card_id:
+        names.append(f"{card_id}_member_card.png")
+        names.append(f"{card_id}_embedded.png")
+        names.append(f"{card_id}.png")
+    if member_id:
+        names.append(f"aurora_{member_id}_000_member_card.png")
+        names.append(f"aurora_{member_id}_000_embedded.png")
+    return names
+
+
+def row_label(row: Dict, index: int) -> str:
+    """Human-readable name for a CSV row in error messages"""
+    return row.get('member_profile.name') or row.get('name') or f"Row {index + 1}"
+
+
+def resolve_card_paths(
+    rows: List[Dict],
+    card_directory: Optional[str] = None,
+    card_index: Optional['CardIndex'] = None
+) -> List[Optional[str]]:
+    """
+    Resolve each CSV row to an existing card image
+    
+    Rows with a _card_image_path column use it directly; otherwise the card
+    is found by the legacy filename patterns inside card_directory, then by
+    card_id / member_id through the discovery index. Existence is checked
+    against one listing per directory rather than a stat per candidate.
+    
+    Args:
+        rows: CSV rows (csv.DictReader dicts)
+        card_directory: Directory holding the cards (rows without image paths)
+        card_index: Crawled index of card_directory (optional)
+    
+    Returns:
+        Absolute card path per row, or None where no image was found
+    """
+    listings: Dict[str, Set[str]] = {}
+    resolved = []
+    
+    for row in rows:
+        card_path = (row.get('_card_image_path') or '').strip()
+        
+        if not card_path and card_directory:
+            card_id = (row.get('card_id') or '').strip()
+            member_id = (row.get('member_id') or '').strip()
+            
+            names = _list_directory(card_directory, listings)
+            card_path = next(
+                (os.path.join(card_directory, name)
+                 for name in _candidate_names(card_id, member_id) if name in names),
+                ''
+            )
+            
+            # Only cards not under a known export name need the index
+            if not card_path and card_index is not None:
+                card_path = card_index.find_card(
+                    card_id or None, member_id or None, root=card_directory
+                ) or ''
+        
+        if not card_path:
+            resolved.append(None)
+            continue
+        
+        card_path = os.path.abspath(card_path)
+        directory, name = os.path.split(card_path)
+        resolved.append(card_path if name in _list_directory(directory, listings) else None)
+    
+    return resolved
+
+
+def reimport_rows(
+    scanner: CardScanner,
+    rows: List[Dict],
+    card_directory: Optional[str] = None,
+    workers: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Dict:
+    """
+    Rescan the cards behind exported CSV rows and register them
+    
+    Args:
+        scanner: Scanner whose database receives the users
+        rows: CSV rows (csv.DictReader dicts)
+        card_directory: Directory to search for rows without _card_image_path
+        workers: Extraction processes (None = CPU count, 1 = in-process)
+        progress_callback: Called with (done, total, message) as cards finish
+        is_cancelled: Polled between cards; True stops and rolls back
+    
+    Returns:
+        Dict with success_count, error_count, errors (list of str) and cancelled
+    """
+    def report(done: int, total: int, message: str):
+        if progress_callback:
+            progress_callback(done, total, message)
+    
+    def cancelled() -> bool:
+        return bool(is_cancelled and is_cancelled())
+    
+    errors = []
+    
+    # Resolve every row before touching the database
+    report(0, len(rows), "Resolving card images...")
+    paths = resolve_card_paths(rows, card_directory)
+    
+    # Cards the crawl decodes are registered from its results, not extracted again
+    crawled: Dict[str, ScanResult] = {}
+    
+    def keep_result(result):
+        card_format = identify_card_format(result.data) if result.error is None else None
+        crawled[result.path] = ScanResult(result.path, result.data, card_format, result.error)
+    
+    missing = [
+        index for index, (row, card_path) in enumerate(zip(rows, paths))
+        if card_path is None and not (row.get('_card_image_path') or '').strip()
+    ]
+    if missing and card_directory and CARD_INDEX_AVAILABLE:
+        report(0, len(rows), "Indexing card directory...")
+        card_index = CardIndex()
+        card_index.crawl(card_directory, workers=workers, on_result=keep_result)
+        
+        found = resolve_card_paths([rows[index] for index in missing], card_directory, card_index)
+        for index, card_path in zip(missing, found):
+            paths[index] = card_path
+    
+    rows_by_path: Dict[str, List[int]] = {}
+    for index, (row, card_path) in enumerate(zip(rows, paths)):
+        if card_path is None:
+            errors.append(f"{row_label(row, index)}: Image not found")
+        else:
+            rows_by_path.setdefault(card_path, []).append(index)
+    
+    # Cards the crawl could not read never match a row - report them here
+    for result in crawled.values():
+        if result.error is not None and result.path not in rows_by_path:
+            errors.append(f"{os.path.basename(result.path)}: {result.error}")
+    
+    # Extract the rest in parallel; register without committing until the end
+    total = len(rows_by_path)
+    done = 0
+    success_count = 0
+    database = scanner.database
+    
+    def scan_results():
+        yield from (crawled[path] for path in rows_by_path if path in crawled)
+        yield from scanner.scan_many(
+            [path for path in rows_by_path if path not in crawled],
+            workers=workers, register_users=False
+        )
+    
+    results = scan_results()
+    try:
+        for result in results:
+            if cancelled():
+                break
+            
+            done += 1
+            if result.error is not None:
+                for index in rows_by_path[result.path]:
+                    errors.append(f"Row {index + 1}: {result.error}")
+            else:
+                database.add_user(
+                    result.data, result.card_format, str(Path(result.path).absolute()), save=False
+                )
+                success_count += len(rows_by_path[result.path])
+            
+            report(done, total, f"Rescanned {done} of {total} cards")
+    finally:
+        results.close()
+    
+    if cancelled():
+        database.rollback()
+        report(done, total, "Import cancelled - no changes saved")
+        return {
+            "success_count": 0,
+            "error_count": len(errors),
+            "errors": errors,
+            "cancelled": True,
+        }
+    
+    report(total, total, "Saving database...")
+    database.save()
+    
+    return {
+        "success_count": success_count,
+        "error_count": len(errors),
+        "errors": errors,
+        "cancelled": False,
+    }
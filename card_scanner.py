@@ -7,11 +7,16 @@ Supports multiple card formats:
 - AetherCards soul cards (SOUL_MANIFEST.json format)
 """
 
+import re
 import json
+import sqlite3
+import unicodedata
 import hashlib
+import threading
 from pathlib import Path
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Iterable, Iterator, NamedTuple
 from mutable_steganography import MutableCardSteganography
 
 
@@ -27,44 +32,481 @@ class CardFormat:
     UNKNOWN = "unknown"
 
 
+def identify_card_format(data: Dict) -> str:
+    """
+    Identify the card format from extracted data
+    
+    Args:
+        data: Extracted card data
+    
+    Returns:
+        Card format identifier
+    """
+    # Check for Aurora Archive member card markers (full schema)
+    if "member_profile" in data and "subscription" in data:
+        return CardFormat.AURORA_MEMBER
+    
+    # Check for Aurora Archive member card markers (simplified/legacy)
+    if "member_id" in data and ("tier" in data or "subscription" in data):
+        return CardFormat.AURORA_MEMBER
+    
+    # Check for basic Aurora card markers
+    if "card_id" in data and data.get("card_id", "").startswith("aurora_"):
+        return CardFormat.AURORA_MEMBER
+    
+    # Check for AetherCards soul markers
+    if "soul_name" in data and ("species" in data or "archetype" in data):
+        return CardFormat.AETHER_SOUL
+    
+    # Check for SOUL_MANIFEST format (external file reference)
+    if "files" in data and "soul_data" in data.get("files", {}):
+        return CardFormat.AETHER_SOUL
+    
+    return CardFormat.UNKNOWN
+
+
+class ScanResult(NamedTuple):
+    """One card's outcome from CardScanner.scan_many()"""
+    path: str
+    data: Optional[Dict]        # Extracted data (None on error)
+    card_format: Optional[str]  # CardFormat value (None on error)
+    error: Optional[str]        # Error description (None on success)
+
+
+def summarize_user(user_data: Dict, card_format: str) -> Tuple[str, str]:
+    """
+    Get the display name and one-line detail for a user list entry
+    
+    Args:
+        user_data: Card data
+        card_format: CardFormat value
+    
+    Returns:
+        Tuple of (name, detail)
+    """
+    if card_format == CardFormat.AURORA_MEMBER:
+        name = user_data.get("member_profile", {}).get("name", "Unknown")
+        tier = user_data.get("subscription", {}).get("tier", "N/A")
+        return name, f"Tier: {tier}"
+    
+    if card_format == CardFormat.AETHER_SOUL:
+        name = user_data.get("soul_name", user_data.get("name", "Unknown"))
+        species = user_data.get("species", "N/A")
+        return name, f"Species: {species}"
+    
+    return "Unknown User", "Unknown Format"
+
+
+def flatten_card_data(data: Dict, parent_key: str = '', sep: str = '.') -> Dict:
+    """
+    Flatten nested card data for CSV export
+    
+    Args:
+        data: Dictionary to flatten
+        parent_key: Parent key prefix
+        sep: Separator for nested keys
+    
+    Returns:
+        Flattened dictionary with dot-notation keys (list items as key[i])
+    """
+    items = []
+    for k, v in data.items():
+        new_key = f"{parent_key}{sep}{k}" if parent_key else k
+        
+        if isinstance(v, dict):
+            # Recursively flatten nested dicts
+            items.extend(flatten_card_data(v, new_key, sep=sep).items())
+        elif isinstance(v, list):
+            # Handle lists - create indexed keys
+            if len(v) == 0:
+                items.append((new_key, '[]'))
+            else:
+                for i, item in enumerate(v):
+                    if isinstance(item, dict):
+                        items.extend(flatten_card_data(item, f"{new_key}[{i}]", sep=sep).items())
+                    else:
+                        items.append((f"{new_key}[{i}]", item))
+        else:
+            # Primitive value - convert to string
+            items.append((new_key, str(v) if v is not None else ''))
+    
+    return dict(items)
+
+
+_TERM_SPLIT = re.compile(r'[\W_]+')
+
+# Upper bound appended to a prefix for B-tree range scans
+_PREFIX_END = '\U0010ffff'
+
+
+def search_tokens(text: str) -> List[str]:
+    """
+    Split text into normalized search tokens
+    
+    Used for both indexed values and queries: casefolded, accents stripped,
+    split on anything that is not a letter or digit.
+    """
+    if not text:
+        return []
+    decomposed = unicodedata.normalize('NFKD', str(text).casefold())
+    normalized = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return [token for token in _TERM_SPLIT.split(normalized) if token]
+
+
+def search_terms(user_id: str, user_data: Dict, card_format: str) -> set:
+    """
+    Collect the (field, token) pairs a user is findable by
+    
+    Fields: name, email, tier, card_id, soul_name, member_id, user_id
+    """
+    profile = user_data.get("member_profile", {})
+    subscription = user_data.get("subscription", {})
+    if not isinstance(profile, dict):
+        profile = {}
+    if not isinstance(subscription, dict):
+        subscription = {}
+    
+    values = [
+        ("user_id", user_id),
+        ("member_id", user_data.get("member_id")),
+        ("name", profile.get("name") or user_data.get("name")),
+        ("email", profile.get("email") or user_data.get("email")),
+        ("tier", subscription.get("tier") or user_data.get("tier")),
+        ("card_id", user_data.get("card_id")),
+    ]
+    
+    cards = user_data.get("cards", [])
+    if isinstance(cards, list):
+        values.extend(("card_id", card.get("card_id")) for card in cards if isinstance(card, dict))
+    
+    if card_format == CardFormat.AETHER_SOUL:
+        values.append(("soul_name", user_data.get("soul_name")))
+    
+    return {
+        (field, token)
+        for field, value in values
+        if isinstance(value, (str, int))
+        for token in search_tokens(value)
+    }
+
+
 class UserDatabase:
     """
     Manages multiple user accounts in a side database
     Stores all registered users and their associated cards
+    
+    Backed by SQLite (WAL journal) so a scan upserts one row instead of
+    rewriting the whole database. The legacy JSON database is imported once
+    on first open.
+    
+    Only a summary of each user (name, detail, format, scan info) is held in
+    memory. Full card data is loaded on demand by get_user() and kept in a
+    small LRU, so startup cost does not grow with payload size.
+    
+    Search goes through a term table (one row per word of name, email, tier,
+    card IDs, soul name and member/user ID) kept in step with every write;
+    each query word is a prefix range scan on its primary key.
+    
+    The union of flattened card data keys (the CSV export header) is kept in
+    an export_columns table, extended on every upsert.
     """
     
-    def __init__(self, db_path: str = "data/users_database.json"):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            format TEXT NOT NULL,
+            card_image_path TEXT NOT NULL DEFAULT '',
+            first_scan TEXT NOT NULL,
+            last_scan TEXT NOT NULL,
+            scan_count INTEGER NOT NULL DEFAULT 1,
+            name TEXT,
+            detail TEXT,
+            payload_digest TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_format ON users(format);
+        CREATE INDEX IF NOT EXISTS idx_users_last_scan ON users(last_scan);
+        CREATE TABLE IF NOT EXISTS user_terms (
+            term TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            field TEXT NOT NULL,
+            PRIMARY KEY (term, user_id, field)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_user_terms_user_id ON user_terms(user_id);
+        CREATE TABLE IF NOT EXISTS export_columns (
+            name TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+    
+    COLUMNS = "user_id, data, format, card_image_path, first_scan, last_scan, scan_count"
+    
+    # Bump to rebuild user_terms on open when search_terms() changes
+    SEARCH_INDEX_VERSION = "1"
+    
+    # Columns query_user_summaries() can sort on (all indexed, or the rowid)
+    SORT_COLUMNS = ("registered", "name", "user_id", "format", "last_scan", "scan_count")
+    SUMMARY_COLUMNS = "user_id, format, card_image_path, first_scan, last_scan, scan_count, name, detail"
+    
+    # Matches a searched summary query considers at most, so type-ahead cost
+    # stays bounded however broad the search words are
+    SEARCH_RESULT_CAP = 2000
+    
+    def __init__(self, db_path: str = "data/users_database.json", payload_cache_size: int = 64):
         """
         Initialize user database
         
         Args:
-            db_path: Path to the JSON database file
+            db_path: Path to the database file. A legacy '.json' path maps to
+                     the SQLite file next to it (same name, '.db' suffix) and
+                     its contents are migrated on first open.
+            payload_cache_size: Number of full user payloads kept in memory
         """
-        self.db_path = Path(db_path)
+        path = Path(db_path)
+        if path.suffix.lower() == '.json':
+            self.json_path = path
+            self.db_path = path.with_suffix('.db')
+        else:
+            self.json_path = None
+            self.db_path = path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.users = self._load_database()
+        
+        self.payload_cache_size = payload_cache_size
+        self._payloads = OrderedDict()  # user_id -> card data, LRU order
+        self._summaries = {}            # user_id -> summary record, registration order
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._upgrade_schema()
+        
+        if self.json_path is not None:
+            self._migrate_legacy_json()
+        
+        if self._get_meta("search_index_version") != self.SEARCH_INDEX_VERSION:
+            self.rebuild_search_index()
+        
+        self._load_summaries()
     
-    def _load_database(self) -> Dict:
-        """Load user database from file"""
-        if self.db_path.exists():
-            try:
-                with open(self.db_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Warning: Could not load database: {e}")
-                return {"users": [], "last_updated": None}
-        return {"users": [], "last_updated": None}
+    def _upgrade_schema(self):
+        """Add columns introduced after a database was created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+        missing = [c for c in ("name", "detail", "payload_digest") if c not in columns]
+        
+        for column in missing:
+            self._conn.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_users_payload_digest ON users(payload_digest)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users(name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_scan_count ON users(scan_count)")
+        
+        if "name" in missing:
+            self._backfill_summaries()
     
-    def _save_database(self):
-        """Save user database to file"""
+    def _backfill_summaries(self):
+        """Compute name/detail for rows that have none (one payload at a time)"""
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT user_id, data, format FROM users WHERE name IS NULL"
+            ).fetchall()
+            for user_id, data, card_format in pending:
+                name, detail = summarize_user(json.loads(data), card_format)
+                self._conn.execute(
+                    "UPDATE users SET name = ?, detail = ? WHERE user_id = ?",
+                    (name, detail, user_id)
+                )
+            self._save_database()
+    
+    def _index_user(self, user_id: str, user_data: Dict, card_format: str):
+        """Replace a user's search terms (caller holds the lock)"""
+        self._conn.execute("DELETE FROM user_terms WHERE user_id = ?", (user_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO user_terms (term, user_id, field) VALUES (?, ?, ?)",
+            [(token, user_id, field) for field, token in search_terms(user_id, user_data, card_format)]
+        )
+    
+    def rebuild_search_index(self):
+        """Recompute the search terms of every user"""
+        with self._lock:
+            self._conn.execute("DELETE FROM user_terms")
+            rows = self._conn.execute("SELECT user_id, data, format FROM users")
+            for user_id, data, card_format in rows.fetchall():
+                self._index_user(user_id, json.loads(data), card_format)
+            self._set_meta("search_index_version", self.SEARCH_INDEX_VERSION)
+            self._save_database()
+    
+    def _register_export_columns(self, user_data: Dict):
+        """Add a user's flattened keys to the export schema (caller holds the lock)"""
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO export_columns (name) VALUES (?)",
+            [(key,) for key in flatten_card_data(user_data)]
+        )
+    
+    def rebuild_export_columns(self):
+        """Recompute the export schema from every user (streamed, one batch at a time)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM export_columns")
+            for user in self.iter_users():
+                self._register_export_columns(user["data"])
+            self._set_meta("export_columns", "current")
+            self._save_database()
+    
+    def get_export_columns(self) -> List[str]:
+        """
+        Flattened card data keys across all users, sorted
+        
+        Served from the export_columns table; it is rebuilt first only if a
+        removal may have left stale columns behind (or it was never built).
+        """
+        with self._lock:
+            if self._get_meta("export_columns") != "current":
+                self.rebuild_export_columns()
+            rows = self._conn.execute("SELECT name FROM export_columns ORDER BY name").fetchall()
+        return [row[0] for row in rows]
+    
+    def _load_summaries(self):
+        """Load the in-memory summary table (no card data)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM users ORDER BY rowid"
+            ).fetchall()
+            self._summaries = {row[0]: self._row_to_summary(row) for row in rows}
+            self._payloads.clear()
+    
+    def _migrate_legacy_json(self):
+        """Import the JSON database once, if the SQLite database is still empty"""
+        if not self.json_path.exists() or self._get_meta("migrated_from_json"):
+            return
+        
         try:
-            self.users["last_updated"] = datetime.now().isoformat()
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.users, f, indent=2, ensure_ascii=False)
+            if self.count_users() == 0:
+                migrated = self.migrate_from_json(str(self.json_path))
+                print(f"Migrated {migrated} users from {self.json_path} to {self.db_path}")
+            self._set_meta("migrated_from_json", datetime.now().isoformat())
+            self._save_database()
         except Exception as e:
-            print(f"Error saving database: {e}")
+            print(f"Warning: Could not migrate JSON database: {e}")
     
-    def add_user(self, user_data: Dict, card_format: str, card_image_path: str = "") -> str:
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        Import users from a legacy JSON database file
+        
+        Existing rows with the same user_id are replaced.
+        
+        Args:
+            json_path: Path to a {"users": [...], "last_updated": ...} file
+        
+        Returns:
+            Number of users imported
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        
+        now = datetime.now().isoformat()
+        rows = []
+        for user in legacy.get("users", []):
+            data = user.get("data", {})
+            card_format = user.get("format", CardFormat.UNKNOWN)
+            rows.append((
+                user["user_id"],
+                json.dumps(data, ensure_ascii=False),
+                card_format,
+                user.get("card_image_path", ""),
+                user.get("first_scan") or now,
+                user.get("last_scan") or now,
+                user.get("scan_count", 1),
+                *summarize_user(data, card_format),
+            ))
+        
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO users ({self.COLUMNS}, name, detail) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            for user in legacy.get("users", []):
+                self._index_user(
+                    user["user_id"], user.get("data", {}), user.get("format", CardFormat.UNKNOWN)
+                )
+                self._register_export_columns(user.get("data", {}))
+            self._save_database()
+            self._load_summaries()
+        return len(rows)
+    
+    def _get_meta(self, key: str) -> Optional[str]:
+        """Read a value from the meta table"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: str):
+        """Write a value to the meta table (committed with the next save)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+    
+    def _save_database(self):
+        """Commit pending changes"""
+        with self._lock:
+            try:
+                self._set_meta("last_updated", datetime.now().isoformat())
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error saving database: {e}")
+    
+    @staticmethod
+    def _row_to_user(row: Tuple) -> Dict:
+        """Convert a users row to the record dict callers expect"""
+        user_id, data, card_format, card_image_path, first_scan, last_scan, scan_count = row
+        return {
+            "user_id": user_id,
+            "data": json.loads(data),
+            "format": card_format,
+            "card_image_path": card_image_path,
+            "first_scan": first_scan,
+            "last_scan": last_scan,
+            "scan_count": scan_count
+        }
+    
+    @staticmethod
+    def _row_to_summary(row: Tuple) -> Dict:
+        """Convert a summary row to a record without card data"""
+        user_id, card_format, card_image_path, first_scan, last_scan, scan_count, name, detail = row
+        return {
+            "user_id": user_id,
+            "format": card_format,
+            "card_image_path": card_image_path,
+            "first_scan": first_scan,
+            "last_scan": last_scan,
+            "scan_count": scan_count,
+            "name": name,
+            "detail": detail
+        }
+    
+    def _cache_payload(self, user_id: str, data: Dict):
+        """Remember a user's card data, evicting the least recently used"""
+        self._payloads[user_id] = data
+        self._payloads.move_to_end(user_id)
+        while len(self._payloads) > self.payload_cache_size:
+            self._payloads.popitem(last=False)
+    
+    def add_user(
+        self,
+        user_data: Dict,
+        card_format: str,
+        card_image_path: str = "",
+        save: bool = True,
+        payload_digest: Optional[str] = None
+    ) -> str:
         """
         Add or update a user in the database
         
@@ -72,66 +514,376 @@ class UserDatabase:
             user_data: Complete user data from card
             card_format: Format type (aurora_member or aether_soul)
             card_image_path: Path to the card image file
-            
+            save: If False, leave the transaction open (bulk imports call save())
+            payload_digest: Digest of the card payload user_data came from
+                            (None = unknown; the next rescan re-parses the card)
+        
         Returns:
             User ID
         """
         # Generate unique user ID based on card data
         user_id = self._generate_user_id(user_data, card_format)
+        now = datetime.now().isoformat()
+        name, detail = summarize_user(user_data, card_format)
         
-        # Check if user already exists
-        existing_user = self.get_user(user_id)
-        
-        if existing_user:
-            # Update existing user
-            for user in self.users["users"]:
-                if user["user_id"] == user_id:
-                    user["data"] = user_data
-                    user["format"] = card_format
-                    user["card_image_path"] = card_image_path
-                    user["last_scan"] = datetime.now().isoformat()
-                    user["scan_count"] = user.get("scan_count", 0) + 1
-                    break
-        else:
-            # Add new user
-            self.users["users"].append({
-                "user_id": user_id,
-                "data": user_data,
-                "format": card_format,
-                "card_image_path": card_image_path,
-                "first_scan": datetime.now().isoformat(),
-                "last_scan": datetime.now().isoformat(),
-                "scan_count": 1
-            })
+        # Single-row upsert; first_scan is kept and scan_count bumped on conflict
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO users ({self.COLUMNS}, name, detail, payload_digest) "
+                "VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "data = excluded.data, "
+                "format = excluded.format, "
+                "card_image_path = excluded.card_image_path, "
+                "last_scan = excluded.last_scan, "
+                "scan_count = users.scan_count + 1, "
+                "name = excluded.name, "
+                "detail = excluded.detail, "
+                "payload_digest = excluded.payload_digest",
+                (user_id, json.dumps(user_data, ensure_ascii=False), card_format,
+                 card_image_path, now, now, name, detail, payload_digest)
+            )
+            self._index_user(user_id, user_data, card_format)
+            self._register_export_columns(user_data)
+            
+            summary = self._summaries.get(user_id)
+            if summary:
+                summary.update({
+                    "format": card_format,
+                    "card_image_path": card_image_path,
+                    "last_scan": now,
+                    "scan_count": summary["scan_count"] + 1,
+                    "name": name,
+                    "detail": detail
+                })
+            else:
+                self._summaries[user_id] = {
+                    "user_id": user_id,
+                    "format": card_format,
+                    "card_image_path": card_image_path,
+                    "first_scan": now,
+                    "last_scan": now,
+                    "scan_count": 1,
+                    "name": name,
+                    "detail": detail
+                }
+            # Not cached here: a bulk scan would flush the LRU with users nobody opened
+            self._payloads.pop(user_id, None)
+            
+            if save:
+                self._save_database()
+        return user_id
+    
+    def find_user_by_digest(self, payload_digest: str) -> Optional[str]:
+        """
+        Find the user registered from a card payload
         
+        Args:
+            payload_digest: MutableCardSteganography.payload_digest() of a card
+        
+        Returns:
+            User ID, or None if no user was registered from that payload
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id FROM users WHERE payload_digest = ? LIMIT 1", (payload_digest,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def record_rescan(self, user_id: str, card_image_path: str = "", save: bool = True) -> bool:
+        """
+        Register another scan of an unchanged card
+        
+        Only last_scan, scan_count and card_image_path are updated; the stored
+        card data is left as is.
+        
+        Returns:
+            True if the user exists
+        """
+        now = datetime.now().isoformat()
+        
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE users SET last_scan = ?, scan_count = scan_count + 1, "
+                "card_image_path = ? WHERE user_id = ?",
+                (now, card_image_path, user_id)
+            )
+            if not cursor.rowcount:
+                return False
+            
+            summary = self._summaries.get(user_id)
+            if summary:
+                summary["last_scan"] = now
+                summary["scan_count"] += 1
+                summary["card_image_path"] = card_image_path
+            
+            if save:
+                self._save_database()
+        return True
+    
+    def save(self):
+        """Commit pending changes to the database file"""
         self._save_database()
-        return user_id
+    
+    def rollback(self):
+        """Discard changes made since the last save (e.g. a cancelled bulk import)"""
+        with self._lock:
+            self._conn.rollback()
+            self._load_summaries()
     
     def get_user(self, user_id: str) -> Optional[Dict]:
-        """Get user data by ID"""
-        for user in self.users["users"]:
-            if user["user_id"] == user_id:
-                return user
-        return None
+        """Get user data by ID (card data is loaded on demand)"""
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return None
+            
+            data = self._payloads.get(user_id)
+            if data is None:
+                row = self._conn.execute(
+                    "SELECT data FROM users WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                data = json.loads(row[0])
+            self._cache_payload(user_id, data)
+            
+            user = {k: v for k, v in summary.items() if k not in ("name", "detail")}
+            user["data"] = data
+            return user
+    
+    def get_user_summary(self, user_id: str) -> Optional[Dict]:
+        """Get a user's summary record (no card data)"""
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            return dict(summary) if summary else None
+    
+    def get_user_summaries(self) -> List[Dict]:
+        """
+        Get summary records for all users (in registration order)
+        
+        Each record has user_id, name, detail, format, card_image_path,
+        first_scan, last_scan and scan_count, but no card data.
+        """
+        with self._lock:
+            return [dict(summary) for summary in self._summaries.values()]
+    
+    def _summary_filter(self, search: Optional[str], card_format: Optional[str]) -> Tuple[str, list]:
+        """
+        Build the WHERE clause for summary queries
+        
+        A search is the search_users() range scan, limited to
+        SEARCH_RESULT_CAP users; only that bounded set is sorted and paged.
+        """
+        tokens = list(dict.fromkeys(search_tokens(search)))
+        if tokens:
+            sql, params = self._search_sql(tokens, card_format, self.SEARCH_RESULT_CAP)
+            return f" WHERE user_id IN ({sql})", params
+        if card_format:
+            return " WHERE format = ?", [card_format]
+        return "", []
+    
+    def query_user_summaries(
+        self,
+        offset: int = 0,
+        limit: int = 100,
+        sort_by: str = "registered",
+        descending: bool = False,
+        search: Optional[str] = None,
+        card_format: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get one page of user summaries straight from the database
+        
+        Args:
+            offset: Rows to skip
+            limit: Maximum rows to return
+            sort_by: One of SORT_COLUMNS ("registered" = registration order)
+            descending: Sort direction
+            search: Words to match as prefixes of name, email, tier, card ID,
+                    soul name or member/user ID (see search_users); at most
+                    SEARCH_RESULT_CAP matches are considered
+            card_format: Only users with this CardFormat value
+        
+        Returns:
+            Summary records (see get_user_summaries)
+        """
+        if sort_by not in self.SORT_COLUMNS:
+            raise ValueError(f"Cannot sort users by: {sort_by}")
+        
+        where, params = self._summary_filter(search, card_format)
+        order = "rowid" if sort_by == "registered" else sort_by
+        direction = "DESC" if descending else "ASC"
+        
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM users{where} "
+                f"ORDER BY {order} {direction}, rowid {direction} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [self._row_to_summary(row) for row in rows]
+    
+    def count_user_summaries(self, search: Optional[str] = None, card_format: Optional[str] = None) -> int:
+        """Number of users matching a query_user_summaries() filter (capped when searching)"""
+        where, params = self._summary_filter(search, card_format)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM users{where}", params).fetchone()[0]
+    
+    def search_users(
+        self,
+        query: str,
+        limit: int = 20,
+        card_format: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Find users by name, email, tier, card ID, soul name or member ID
+        
+        Matching is case- and accent-insensitive and word based: every word
+        of the query must be the start of some word in one of those fields,
+        so "ann gold" finds Ann Example on the Gold tier and "ann@ex" finds
+        ann@example.com. The most selective query word drives a range scan
+        over the term index that stops after `limit` users, so cost does not
+        grow with the member count; fast enough for type-ahead.
+        
+        Args:
+            query: Search text
+            limit: Maximum results
+            card_format: Only users with this CardFormat value
+        
+        Returns:
+            Summary records in term order (empty for a blank query)
+        """
+        tokens = list(dict.fromkeys(search_tokens(query)))
+        if not tokens:
+            return []
+        
+        with self._lock:
+            sql, params = self._search_sql(tokens, card_format, limit)
+            user_ids = [row[0] for row in self._conn.execute(sql, params)]
+            return [dict(self._summaries[u]) for u in user_ids if u in self._summaries]
+    
+    def _search_sql(self, tokens: List[str], card_format: Optional[str], limit: int) -> Tuple[str, list]:
+        """
+        Build the user ID query behind search_users()
+        
+        The most selective token drives a range scan over the term index;
+        the others are EXISTS checks per candidate, and LIMIT ends the scan.
+        """
+        if len(tokens) > 1:
+            with self._lock:
+                tokens = sorted(tokens, key=self._estimate_term_matches)
+        
+        sql = ["SELECT DISTINCT t.user_id FROM user_terms t"]
+        params = []
+        if card_format:
+            sql.append("JOIN users u ON u.user_id = t.user_id AND u.format = ?")
+            params.append(card_format)
+        sql.append("WHERE t.term >= ? AND t.term < ?")
+        params.extend([tokens[0], tokens[0] + _PREFIX_END])
+        
+        for token in tokens[1:]:
+            sql.append(
+                "AND EXISTS (SELECT 1 FROM user_terms o "
+                "WHERE o.user_id = t.user_id AND o.term >= ? AND o.term < ?)"
+            )
+            params.extend([token, token + _PREFIX_END])
+        sql.append("LIMIT ?")
+        params.append(limit)
+        return " ".join(sql), params
+    
+    def _estimate_term_matches(self, token: str, cap: int = 1000) -> int:
+        """Count index rows a query word prefix-matches, up to `cap`"""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM user_terms WHERE term >= ? AND term < ? LIMIT ?)",
+            (token, token + _PREFIX_END, cap)
+        ).fetchone()[0]
     
     def get_all_users(self) -> List[Dict]:
-        """Get all registered users"""
-        return self.users["users"]
+        """Get all registered users with full card data (in registration order)"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self.COLUMNS} FROM users ORDER BY rowid").fetchall()
+        return [self._row_to_user(row) for row in rows]
+    
+    def iter_users(self, batch_size: int = 500, since: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream all users with full card data (in registration order)
+        
+        Rows are fetched `batch_size` at a time by rowid, so memory stays flat
+        and the lock is not held between batches.
+        
+        Args:
+            batch_size: Rows fetched per query
+            since: Only users whose last_scan is after this ISO timestamp
+        """
+        where = "rowid > ?"
+        if since is not None:
+            where += " AND last_scan > ?"
+        
+        last_rowid = 0
+        while True:
+            params = (last_rowid, since, batch_size) if since is not None else (last_rowid, batch_size)
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {self.COLUMNS} FROM users WHERE {where} ORDER BY rowid LIMIT ?",
+                    params
+                ).fetchall()
+            if not rows:
+                return
+            
+            for row in rows:
+                yield self._row_to_user(row[1:])
+            last_rowid = rows[-1][0]
+    
+    def get_users_by_format(self, card_format: str) -> List[Dict]:
+        """Get all users with a card format"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM users WHERE format = ? ORDER BY rowid", (card_format,)
+            ).fetchall()
+        return [self._row_to_user(row) for row in rows]
+    
+    def get_recent_users(self, limit: int = 20) -> List[Dict]:
+        """Get the most recently scanned users"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM users ORDER BY last_scan DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_user(row) for row in rows]
+    
+    def count_users(self) -> int:
+        """Number of registered users"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
     
     def remove_user(self, user_id: str) -> bool:
         """Remove a user from database"""
-        initial_count = len(self.users["users"])
-        self.users["users"] = [u for u in self.users["users"] if u["user_id"] != user_id]
-        
-        if len(self.users["users"]) < initial_count:
-            self._save_database()
-            return True
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+            self._conn.execute("DELETE FROM user_terms WHERE user_id = ?", (user_id,))
+            self._summaries.pop(user_id, None)
+            self._payloads.pop(user_id, None)
+            if cursor.rowcount:
+                # Columns only this user had may remain; rebuilt on next export
+                self._set_meta("export_columns", "stale")
+                self._save_database()
+                return True
         return False
     
     def clear_database(self):
         """Clear all users (use with caution!)"""
-        self.users = {"users": [], "last_updated": None}
-        self._save_database()
+        with self._lock:
+            self._conn.execute("DELETE FROM users")
+            self._conn.execute("DELETE FROM user_terms")
+            self._conn.execute("DELETE FROM export_columns")
+            self._summaries.clear()
+            self._payloads.clear()
+            self._save_database()
+    
+    def close(self):
+        """Commit and close the database connection"""
+        with self._lock:
+            self._save_database()
+            self._conn.close()
     
     def _generate_user_id(self, user_data: Dict, card_format: str) -> str:
         """Generate unique user ID from card data"""
@@ -143,7 +895,7 @@ class UserDatabase:
             # Generate from profile data
             profile = user_data.get("member_profile", {})
             id_string = f"{profile.get('name', '')}_{profile.get('email', '')}"
-            
+        
         elif card_format == CardFormat.AETHER_SOUL:
             # Use soul_name + exported_at as unique identifier
             soul_name = user_data.get("soul_name", "unknown")
@@ -175,6 +927,7 @@ class CardScanner:
         self.database = UserDatabase(database_path)
         self.current_user = None
         self.current_format = None
+        self.current_user_id = None  # Database ID of current_user (None if unregistered)
     
     def scan_card(self, card_image_path: str, register_user: bool = True) -> Tuple[Dict, str]:
         """
@@ -183,10 +936,10 @@ class CardScanner:
         Args:
             card_image_path: Path to card image (with embedded data)
             register_user: If True, add user to database
-            
+        
         Returns:
             Tuple of (extracted_data, card_format)
-            
+        
         Raises:
             CorruptedDataError: If card data is corrupted
             FileNotFoundError: If card image doesn't exist
@@ -194,6 +947,28 @@ class CardScanner:
         if not Path(card_image_path).exists():
             raise FileNotFoundError(f"Card image not found: {card_image_path}")
         
+        # Digest the raw payload (read once; extract_data below hits the payload cache)
+        try:
+            digest = self.stego.payload_digest(card_image_path)
+        except ValueError as e:
+            raise CardDataError(f"Card does not contain valid embedded data: {e}")
+        
+        # Unchanged card of a known user: reuse the stored data (payload cache,
+        # else decoded from its row) - no card payload checksum, format
+        # detection or data rewrite
+        user_id = self.database.find_user_by_digest(digest)
+        user = self.database.get_user(user_id) if user_id else None
+        if user:
+            self.current_user = user["data"]
+            self.current_format = user["format"]
+            self.current_user_id = user_id
+            
+            if register_user:
+                self.database.record_rescan(user_id, str(Path(card_image_path).absolute()))
+                print(f"✓ User rescanned (unchanged): {user_id}")
+            
+            return (user["data"], user["format"])
+        
         # Extract embedded data
         try:
             raw_data = self.stego.extract_data(card_image_path)
@@ -206,45 +981,73 @@ class CardScanner:
         # Store current user
         self.current_user = raw_data
         self.current_format = card_format
+        self.current_user_id = None
         
         # Register user in database with card image path
         if register_user:
-            user_id = self.database.add_user(raw_data, card_format, str(Path(card_image_path).absolute()))
+            user_id = self.database.add_user(
+                raw_data, card_format, str(Path(card_image_path).absolute()),
+                payload_digest=digest
+            )
+            self.current_user_id = user_id
             print(f"✓ User registered/updated: {user_id}")
         
         return (raw_data, card_format)
     
+    def scan_many(
+        self,
+        card_image_paths: Iterable[str],
+        workers: Optional[int] = None,
+        register_users: bool = True
+    ) -> Iterator[ScanResult]:
+        """
+        Scan many cards in parallel
+        
+        Extraction runs in a process pool (see
+        MutableCardSteganography.extract_many); results stream back as they
+        complete, unordered. Unreadable cards yield a ScanResult with the
+        error instead of raising. Registrations are written to the database
+        once, when the scan finishes or the generator is closed.
+        
+        Args:
+            card_image_paths: Card images to scan
+            workers: Worker processes (None = CPU count, 1 = in-process)
+            register_users: If True, add each user to the database
+        
+        Yields:
+            ScanResult per card
+        """
+        registered = 0
+        try:
+            for result in self.stego.extract_many(card_image_paths, workers=workers):
+                if result.error is not None:
+                    yield ScanResult(result.path, None, None, result.error)
+                    continue
+                
+                card_format = self._identify_format(result.data)
+                
+                if register_users:
+                    self.database.add_user(
+                        result.data, card_format, str(Path(result.path).absolute()), save=False
+                    )
+                    registered += 1
+                
+                yield ScanResult(result.path, result.data, card_format, None)
+        finally:
+            if registered:
+                self.database.save()
+    
     def _identify_format(self, data: Dict) -> str:
         """
         Identify the card format from extracted data
         
         Args:
             data: Extracted card data
-            
+        
         Returns:
             Card format identifier
         """
-        # Check for Aurora Archive member card markers (full schema)
-        if "member_profile" in data and "subscription" in data:
-            return CardFormat.AURORA_MEMBER
-        
-        # Check for Aurora Archive member card markers (simplified/legacy)
-        if "member_id" in data and ("tier" in data or "subscription" in data):
-            return CardFormat.AURORA_MEMBER
-        
-        # Check for basic Aurora card markers
-        if "card_id" in data and data.get("card_id", "").startswith("aurora_"):
-            return CardFormat.AURORA_MEMBER
-        
-        # Check for AetherCards soul markers
-        if "soul_name" in data and ("species" in data or "archetype" in data):
-            return CardFormat.AETHER_SOUL
-        
-        # Check for SOUL_MANIFEST format (external file reference)
-        if "files" in data and "soul_data" in data.get("files", {}):
-            return CardFormat.AETHER_SOUL
-        
-        return CardFormat.UNKNOWN
+        return identify_card_format(data)
     
     def display_account_details(self, data: Dict = None, card_format: str = None) -> str:
         """
@@ -253,7 +1056,7 @@ class CardScanner:
         Args:
             data: Card data (uses current_user if None)
             card_format: Card format (uses current_format if None)
-            
+        
         Returns:
             Formatted string for display
         """
@@ -522,7 +1325,7 @@ class CardScanner:
         
         Args:
             user_id: ID of user to switch to
-            
+        
         Returns:
             True if switch successful
         """
@@ -530,6 +1333,7 @@ class CardScanner:
         if user:
             self.current_user = user["data"]
             self.current_format = user["format"]
+            self.current_user_id = user_id
             return True
         return False
     
@@ -537,10 +1341,20 @@ class CardScanner:
         """Clear current user (logout)"""
         self.current_user = None
         self.current_format = None
+        self.current_user_id = None
+    
+    def search_users(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Search registered users (see UserDatabase.search_users)
+        
+        Returns:
+            Summary records in term order
+        """
+        return self.database.search_users(query, limit=limit)
     
     def list_all_users(self) -> str:
         """Get formatted list of all registered users"""
-        users = self.database.get_all_users()
+        users = self.database.get_user_summaries()
         
         if not users:
             return "No users registered in database."
@@ -552,25 +1366,10 @@ class CardScanner:
         output.append("")
         
         for i, user in enumerate(users, 1):
-            user_data = user["data"]
-            
-            # Get display name based on format
-            if user["format"] == CardFormat.AURORA_MEMBER:
-                name = user_data.get("member_profile", {}).get("name", "Unknown")
-                tier = user_data.get("subscription", {}).get("tier", "N/A")
-                detail = f"Tier: {tier}"
-            elif user["format"] == CardFormat.AETHER_SOUL:
-                name = user_data.get("soul_name", user_data.get("name", "Unknown"))
-                species = user_data.get("species", "N/A")
-                detail = f"Species: {species}"
-            else:
-                name = "Unknown User"
-                detail = "Unknown Format"
-            
-            output.append(f"{i}. {name}")
+            output.append(f"{i}. {user['name']}")
             output.append(f"   User ID:      {user['user_id']}")
             output.append(f"   Format:       {user['format']}")
-            output.append(f"   {detail}")
+            output.append(f"   {user['detail']}")
             output.append(f"   Last Scan:    {user['last_scan']}")
             output.append(f"   Total Scans:  {user['scan_count']}")
             output.append("")
@@ -586,7 +1385,7 @@ def scan_and_display(card_image_path: str, register: bool = True) -> str:
     Args:
         card_image_path: Path to card image
         register: Register user in database
-        
+    
     Returns:
         Formatted account details
     """
@@ -619,7 +1418,7 @@ if __name__ == '__main__':
         print("All registered users:")
         print("─" * 60)
         print(scanner.list_all_users())
-        
+    
     except FileNotFoundError:
         print("❌ Test card not found. Please provide a valid card image path.")
     except CardDataError as e:
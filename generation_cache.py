@@ -0,0 +1,233 @@
+"""
+Aurora Archive - Generation Cache
+Disk LRU of rendered card images for deterministic (fixed-seed) requests
+
+With a fixed seed, Stable Diffusion renders the same image for the same
+request, so the result can be reused. A request key (hash over the full
+prompt, negative prompt, model, sampler, steps, CFG, size, hi-res settings
+and seed) maps to a content-addressed PNG:
+
+    data/generation_cache/
+        index.db            key -> image digest, last use; digest -> size
+        ab/abcdef....png    image named by the sha256 of its bytes
+
+Identical images reached from different keys are stored once. The total
+size of stored images is kept under a byte budget by evicting the least
+recently used keys.
+
+Callers must copy cached files before modifying them (cards get data
+embedded in place after generation).
+
+Python 3.10+
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# Request fields that change the rendered image
+CACHE_KEY_FIELDS = (
+    'prompt', 'negative_prompt', 'steps', 'cfg_scale', 'width', 'height',
+    'sampler_name', 'seed', 'enable_hr', 'hr_upscaler', 'hr_second_pass_steps',
+    'denoising_strength', 'hr_scale', 'clip_skip', 'override_settings',
+)
+
+
+def generation_cache_key(payload: Dict) -> str:
+    """
+    Cache key of a txt2img request
+    
+    Args:
+        payload: Stable Diffusion txt2img payload (with a fixed seed)
+    
+    Returns:
+        sha256 hex digest over the image-defining fields
+    """
+    fields = {name: payload.get(name) for name in CACHE_KEY_FIELDS}
+    canonical = json.dumps(fields, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """
+    Byte-budgeted, content-addressed disk LRU of generated images
+    
+    Thread-safe: used from the generation loop and executor threads.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+        CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest);
+        CREATE TABLE IF NOT EXISTS blobs (
+            digest TEXT PRIMARY KEY,
+            size INTEGER NOT NULL
+        );
+    """
+    
+    def __init__(self, cache_dir: str = "data/generation_cache", max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory for the index and image files
+            max_bytes: Budget for the total size of cached images
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+    
+    def _blob_path(self, digest: str) -> Path:
+        return self.cache_dir / digest[:2] / f"{digest}.png"
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached image
+        
+        Returns:
+            Path of the cached file (do not modify it), or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            path = self._blob_path(row[0])
+            if not path.exists():
+                # File removed behind our back - forget the entry
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._drop_blob_if_unused(row[0])
+                self._conn.commit()
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return str(path)
+    
+    def put_file(self, key: str, source_path: str) -> Optional[str]:
+        """
+        Store a copy of a rendered image under a request key
+        
+        Args:
+            key: generation_cache_key() of the request
+            source_path: Freshly generated image
+        
+        Returns:
+            Path of the cached file, or None if it exceeds the whole budget
+        """
+        with open(source_path, 'rb') as f:
+            image_bytes = f.read()
+        if len(image_bytes) > self.max_bytes:
+            return None
+        
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        path = self._blob_path(digest)
+        
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                temp_path = path.with_suffix('.part')
+                with open(temp_path, 'wb') as f:
+                    f.write(image_bytes)
+                os.replace(temp_path, path)
+            
+            old = self._conn.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(image_bytes))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, last_used) VALUES (?, ?, ?)",
+                (key, digest, time.time())
+            )
+            if old is not None and old[0] != digest:
+                self._drop_blob_if_unused(old[0])
+            
+            self._evict(keep_key=key)
+            self._conn.commit()
+        
+        return str(path)
+    
+    def total_bytes(self) -> int:
+        """Size of all cached images"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+    
+    def clear(self):
+        """Remove every cached image"""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute("SELECT digest FROM blobs")]
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM blobs")
+            self._conn.commit()
+            for digest in digests:
+                self._blob_path(digest).unlink(missing_ok=True)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    def _drop_blob_if_unused(self, digest: str):
+        """Delete an image no key refers to any more (caller holds the lock)"""
+        in_use = self._conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if in_use is None:
+            self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._blob_path(digest).unlink(missing_ok=True)
+    
+    def _evict(self, keep_key: str):
+        """Drop least recently used keys until the budget holds (caller holds the lock)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self._conn.execute(
+            "SELECT key, digest FROM entries WHERE key != ? ORDER BY last_used", (keep_key,)
+        ).fetchall()
+        for key, digest in rows:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            size = self._conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            self._drop_blob_if_unused(digest)
+            still_used = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if size is not None and still_used is None:
+                total -= size[0]
+            if total <= self.max_bytes:
+                return
+
+
+# Shared cache for CardGenerator
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """
+    Get the shared generation cache, creating it on first use
+    
+    Location and budget can be set in sd_config.env / .env:
+    GENERATION_CACHE_DIR and GENERATION_CACHE_MAX_MB.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache(
+                cache_dir=os.getenv('GENERATION_CACHE_DIR', 'data/generation_cache'),
+                max_bytes=int(float(os.getenv('GENERATION_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+            )
+        return _cache
@@ -0,0 +1,436 @@
+"""
+Aurora Archive - Generation Scheduler
+Tier-aware job queue for card generation with per-backend concurrency limits
+
+Generation jobs from every window run on one background event loop. Queued
+jobs are ordered by membership tier (Premium, then Standard, then Kids) and
+arrival time; a fixed pool of async workers always takes the first job whose
+backend has a free slot, so Grok jobs keep flowing while SD jobs wait their
+turn. The same per-backend limits also bound the requests themselves: each
+backend call holds a semaphore of the backend it actually goes to, so a Grok
+job that falls back to Stable Diffusion waits for an SD slot and the local
+WebUI never receives more requests than it can process. The loop
+lives as long as the scheduler, which keeps CardGenerator's pooled HTTP
+sessions warm between jobs.
+
+While a job waits, its progress callback receives its queue position and an
+ETA whenever the queue changes. ETAs come from a moving average of recent
+job durations per backend.
+
+Usage:
+    job = get_scheduler().submit(generator, prompt="mystical warrior",
+                                 progress_callback=on_progress)
+    result = job.result()  # blocks; raises CancelledError after job.cancel()
+
+Python 3.10+
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, CancelledError
+from typing import Callable, Dict, List, Optional
+
+from card_generation import CardGenerator, GenerationBackend, MembershipTier, close_sessions
+
+logger = logging.getLogger(__name__)
+
+# Queue order (lower runs first)
+TIER_PRIORITY = {
+    MembershipTier.PREMIUM: 0,
+    MembershipTier.STANDARD: 1,
+    MembershipTier.KIDS: 2,
+}
+
+# Jobs running at once per backend (the local SD WebUI renders one image at a time)
+DEFAULT_BACKEND_LIMITS = {
+    GenerationBackend.GROK: 4,
+    GenerationBackend.STABLE_DIFFUSION: 1,
+}
+
+# Assumed job duration in seconds until real timings are available
+DEFAULT_JOB_SECONDS = {
+    GenerationBackend.GROK: 20.0,
+    GenerationBackend.STABLE_DIFFUSION: 45.0,
+}
+
+# Weight of the newest timing in the per-backend moving average
+DURATION_SMOOTHING = 0.3
+
+# progress_callback(message, percentage) - same signature CardGenerator uses
+ProgressCallback = Callable[[str, int], None]
+
+
+def format_eta(seconds: float) -> str:
+    """Short human-readable duration (e.g. '45s', '3m 20s')"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    return f"{seconds // 60}m {seconds % 60:02d}s"
+
+
+class GenerationJob:
+    """
+    Handle for a submitted generation
+    
+    result() blocks until the card is generated and returns the
+    CardGenerator result dict. cancel() removes the job while it is still
+    queued; a job that has started runs to completion.
+    """
+    
+    def __init__(
+        self,
+        scheduler: 'GenerationScheduler',
+        sequence: int,
+        generator: CardGenerator,
+        request: Dict,
+        progress_callback: Optional[ProgressCallback] = None
+    ):
+        self.future = Future()
+        self.generator = generator
+        self.backend = generator.backend
+        self.sort_key = (TIER_PRIORITY.get(generator.tier, len(TIER_PRIORITY)), sequence)
+        self._scheduler = scheduler
+        self._request = request
+        self._progress_callback = progress_callback
+        self._queue_status = None
+    
+    def __lt__(self, other: 'GenerationJob') -> bool:
+        return self.sort_key < other.sort_key
+    
+    def cancel(self) -> bool:
+        """Drop the job from the queue (False if it already started)"""
+        if not self.future.cancel():
+            return False
+        self._scheduler._wake()
+        return True
+    
+    def result(self, timeout: Optional[float] = None) -> Dict:
+        """Wait for the generation result dict"""
+        return self.future.result(timeout)
+    
+    def done(self) -> bool:
+        return self.future.done()
+    
+    def report(self, message: str, percentage: int):
+        """Forward progress to the submitter's callback"""
+        if self._progress_callback is None:
+            return
+        try:
+            self._progress_callback(message, percentage)
+        except Exception as e:
+            logger.error(f"Progress callback failed: {e}")
+    
+    def _report_queued(self, position: int, total: int, eta: float):
+        """Report queue position and ETA (only when they change)"""
+        status = (position, total, int(round(eta)))
+        if status == self._queue_status:
+            return
+        self._queue_status = status
+        self.report(f"Queued: position {position} of {total} (ETA ~{format_eta(eta)})", 0)
+    
+    async def _run(self) -> Dict:
+        request = self._request
+        if request['animated']:
+            return await self.generator.generate_animated_card(
+                prompt=request['prompt'],
+                duration=request['duration'],
+                effects=request['effects'],
+                progress_callback=self.report
+            )
+        if request['count'] > 1:
+            return await self.generator.generate_batch(
+                prompt=request['prompt'],
+                count=request['count'],
+                style=request['style'],
+                color_palette=request['color_palette'],
+                progress_callback=self.report
+            )
+        return await self.generator.generate_static_card(
+            prompt=request['prompt'],
+            style=request['style'],
+            color_palette=request['color_palette'],
+            progress_callback=self.report
+        )
+
+
+class GenerationScheduler:
+    """
+    Priority queue of generation jobs served by a fixed async worker pool
+    
+    submit() may be called from any thread. Queue state is only touched on
+    the scheduler's event loop thread.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 4,
+        backend_limits: Optional[Dict[GenerationBackend, int]] = None
+    ):
+        """
+        Args:
+            workers: Async workers (upper bound on jobs running at once)
+            backend_limits: Jobs running at once per backend (merged over
+                DEFAULT_BACKEND_LIMITS)
+        """
+        self.workers = max(1, workers)
+        self.backend_limits = dict(DEFAULT_BACKEND_LIMITS)
+        if backend_limits:
+            self.backend_limits.update(backend_limits)
+        
+        self._pending: List[GenerationJob] = []  # Sorted by tier, then arrival
+        self._running = {backend: 0 for backend in GenerationBackend}
+        self._slots = None  # asyncio.Semaphore per backend, on the scheduler loop
+        self._durations = dict(DEFAULT_JOB_SECONDS)
+        self._sequence = itertools.count()
+        
+        self._loop = None
+        self._thread = None
+        self._changed = None  # asyncio.Condition on the scheduler loop
+        self._ready = threading.Event()
+        self._lock = threading.Lock()  # Guards start/shutdown
+    
+    # ============================================
+    # PUBLIC API
+    # ============================================
+    
+    def start(self):
+        """Start the scheduler thread (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(
+                target=self._run_loop, name="generation-scheduler", daemon=True
+            )
+            self._thread.start()
+        self._ready.wait()
+    
+    def submit(
+        self,
+        generator: CardGenerator,
+        prompt: str,
+        style: str = 'Fantasy',
+        color_palette: str = 'Crimson & Gold',
+        count: int = 1,
+        animated: bool = False,
+        duration: int = 5,
+        effects: Optional[List[str]] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> GenerationJob:
+        """
+        Queue a generation job
+        
+        Args:
+            generator: Configured generator (its tier sets the priority and
+                its backend the concurrency slot)
+            prompt: Character description
+            style: Art style (static cards)
+            color_palette: Color palette (static cards)
+            count: Variants to generate in one batch (static cards; the
+                result is then CardGenerator.generate_batch's dict)
+            animated: Generate an animated card instead of a static one
+            duration: Animation duration in seconds (animated cards)
+            effects: Animation effects (animated cards)
+            progress_callback: Called with (message, percentage) from the
+                scheduler thread, including queue position/ETA while waiting
+        
+        Returns:
+            Job handle
+        """
+        self.start()
+        job = GenerationJob(
+            self,
+            next(self._sequence),
+            generator,
+            {
+                'prompt': prompt,
+                'style': style,
+                'color_palette': color_palette,
+                'count': count,
+                'animated': animated,
+                'duration': duration,
+                'effects': effects,
+            },
+            progress_callback
+        )
+        self._loop.call_soon_threadsafe(self._enqueue, job)
+        return job
+    
+    def estimate_seconds(self, backend: GenerationBackend, ahead: int = 0) -> float:
+        """
+        Rough time until a job on `backend` finishes
+        
+        Running jobs and the `ahead` jobs queued before it fill the backend's
+        slots in waves of average job duration.
+        """
+        limit = self.backend_limits.get(backend, 1)
+        waves = (self._running[backend] + ahead) // limit
+        return (waves + 1) * self._durations[backend]
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the scheduler
+        
+        Queued jobs are cancelled, running jobs are interrupted and the pooled
+        HTTP sessions are closed.
+        """
+        with self._lock:
+            thread, loop = self._thread, self._loop
+            self._thread = None
+        if thread is None:
+            return
+        
+        loop.call_soon_threadsafe(self._stop)
+        if wait:
+            thread.join()
+    
+    # ============================================
+    # SCHEDULER LOOP
+    # ============================================
+    
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._changed = asyncio.Condition()
+        self._slots = {
+            backend: asyncio.Semaphore(self.backend_limits.get(backend, 1))
+            for backend in GenerationBackend
+        }
+        
+        tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._ready.set()
+        
+        try:
+            loop.run_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(close_sessions())
+            loop.close()
+    
+    def _stop(self):
+        for job in self._pending:
+            job.future.cancel()
+        self._pending.clear()
+        self._loop.stop()
+    
+    def _wake(self):
+        """Re-run dispatch and queue reports (callable from any thread)"""
+        loop = self._loop
+        if self._thread is None:
+            return  # Shutting down
+        try:
+            loop.call_soon_threadsafe(lambda: loop.create_task(self._notify()))
+        except RuntimeError:
+            pass  # Loop already closed
+    
+    def _enqueue(self, job: GenerationJob):
+        if job.future.cancelled():
+            return
+        bisect.insort(self._pending, job)
+        self._loop.create_task(self._notify())
+    
+    async def _notify(self):
+        async with self._changed:
+            self._prune_cancelled()
+            self._report_positions()
+            self._changed.notify_all()
+    
+    def _prune_cancelled(self):
+        if any(job.future.cancelled() for job in self._pending):
+            self._pending = [job for job in self._pending if not job.future.cancelled()]
+    
+    def _take_runnable(self) -> Optional[GenerationJob]:
+        """Pop the highest-priority job whose backend has a free slot"""
+        self._prune_cancelled()
+        for index, job in enumerate(self._pending):
+            if self._running[job.backend] >= self.backend_limits.get(job.backend, 1):
+                continue
+            # False if cancelled since the prune; it is dropped on the next pass
+            if job.future.set_running_or_notify_cancel():
+                del self._pending[index]
+                self._running[job.backend] += 1
+                self._report_positions()
+                return job
+        return None
+    
+    def _report_positions(self):
+        total = len(self._pending)
+        ahead = {backend: 0 for backend in GenerationBackend}
+        for position, job in enumerate(self._pending, start=1):
+            job._report_queued(position, total, self.estimate_seconds(job.backend, ahead[job.backend]))
+            ahead[job.backend] += 1
+    
+    def _record_duration(self, backend: GenerationBackend, seconds: float):
+        average = self._durations[backend]
+        self._durations[backend] = average + DURATION_SMOOTHING * (seconds - average)
+    
+    async def _next_job(self) -> GenerationJob:
+        async with self._changed:
+            while True:
+                job = self._take_runnable()
+                if job is not None:
+                    return job
+                await self._changed.wait()
+    
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            started = time.monotonic()
+            job.generator.backend_slots = self._slots
+            try:
+                result = await job._run()
+            except asyncio.CancelledError:
+                job.future.set_exception(CancelledError())
+                raise
+            except Exception as e:
+                logger.error(f"Generation job failed: {e}", exc_info=True)
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+                if result.get('success'):
+                    self._record_duration(job.backend, time.monotonic() - started)
+            finally:
+                self._running[job.backend] -= 1
+                self._wake()
+
+
+# Shared scheduler for the GUI
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> GenerationScheduler:
+    """
+    Get the shared scheduler, creating it on first use
+    
+    Limits can be set in sd_config.env / .env: GENERATION_WORKERS,
+    GROK_MAX_CONCURRENT_JOBS and SD_MAX_CONCURRENT_JOBS.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GenerationScheduler(
+                workers=int(os.getenv('GENERATION_WORKERS', '4')),
+                backend_limits={
+                    GenerationBackend.GROK: int(os.getenv('GROK_MAX_CONCURRENT_JOBS', '4')),
+                    GenerationBackend.STABLE_DIFFUSION: int(os.getenv('SD_MAX_CONCURRENT_JOBS', '1')),
+                }
+            )
+        return _scheduler
+
+
+def shutdown_scheduler(wait: bool = True):
+    """Stop the shared scheduler if it was started"""
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown(wait=wait)
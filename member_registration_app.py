@@ -30,30 +30,35 @@ class TestGenerationWorker(QThread):
         self.generator = generator
         self.prompt = prompt
         self.member_data = member_data
+        self.job = None
         self._is_cancelled = False
     
     def cancel(self):
         self._is_cancelled = True
+        if self.job is not None:
+            self.job.cancel()
     
     def run(self):
         try:
-            import asyncio
+            from concurrent.futures import CancelledError
+            from generation_scheduler import get_scheduler
             
-            # Create event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Run the async generation
-            result = loop.run_until_complete(
-                self.generator.generate_static_card(
-                    prompt=self.prompt,
-                    style="Fantasy",
-                    color_palette="azure_silver",
-                    progress_callback=self.on_progress
-                )
+            # Queue on the shared scheduler (tier priority, backend limits)
+            self.job = get_scheduler().submit(
+                self.generator,
+                prompt=self.prompt,
+                style="Fantasy",
+                color_palette="azure_silver",
+                progress_callback=self.on_progress
             )
+            if self._is_cancelled:
+                self.job.cancel()
             
-            loop.close()
+            try:
+                result = self.job.result()
+            except CancelledError:
+                self.error.emit("Generation cancelled by user")
+                return
             
             if self._is_cancelled:
                 self.error.emit("Generation cancelled by user")
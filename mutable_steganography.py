@@ -3,31 +3,55 @@ Aurora Archive - Mutable Steganography System
 Advanced card data management with overwrite and async edit capabilities
 
 Python 3.10+
-Dependencies: Pillow, aiofiles
+Dependencies: Pillow, numpy, aiofiles
 """
 
+import os
 import json
 import hashlib
 import asyncio
 import aiofiles
+import numpy as np
 from PIL import Image
-from typing import Dict, Optional, Callable, Any
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Optional, Callable, Any, Tuple, Union, Iterable, Iterator, List, NamedTuple
 from pathlib import Path
 from datetime import datetime
 from contextlib import asynccontextmanager
 
+from stego_codec import (
+    LENGTH_HEADER_BITS, RegionReader, open_region, open_layout, load_region,
+    image_crop, embed_layout, frame_payload, unframe_payload,
+    read_chunk_payload, write_chunk_payload
+)
+from payload_format import (
+    PAYLOAD_V1, PAYLOAD_V2, COMPRESSION_ZLIB, FRAME_V2_MAGIC,
+    is_v2_frame, encode_frame, decode_frame
+)
+from stego_cache import payload_cache, file_identity
+
 
 class CardLockError(Exception):
     """Raised when attempting to modify a locked card"""
     pass
 
 
+class ExtractResult(NamedTuple):
+    """One card's outcome from extract_many()"""
+    path: str
+    data: Optional[Dict]   # Extracted data (None on error)
+    error: Optional[str]   # "ExceptionType: message" (None on success)
+
+
 class MutableCardSteganography:
     """
     Advanced steganography system with:
     - Overwrite capability (embed new data regardless of existing data)
     - Async read-modify-write operations
     - Card locking for concurrent access control
+    - Coalesced bulk updates (one re-embed per card)
+    - Process-pool bulk extraction
     - Edit history tracking
     """
     
@@ -35,9 +59,21 @@ class MutableCardSteganography:
     EMBED_REGION_SIZE = 100
     VERSION = "1.0"
     
-    def __init__(self):
+    def __init__(self, payload_version: int = PAYLOAD_V1, compression: str = COMPRESSION_ZLIB):
+        """
+        Args:
+            payload_version: Frame format writes use (PAYLOAD_V1 or PAYLOAD_V2);
+                             reads detect either
+            compression: v2 body compression ("zlib", "zstd" or "none")
+        """
+        if payload_version not in (PAYLOAD_V1, PAYLOAD_V2):
+            raise ValueError(f"Unknown payload version: {payload_version}")
+        
+        self.payload_version = payload_version
+        self.compression = compression
         self._locks = {}  # Card path -> asyncio.Lock
         self._edit_history = {}  # Card path -> list of edits
+        self._update_queue = CardUpdateQueue(self)
     
     # ============================================
     # BASIC OPERATIONS (Sync)
@@ -72,8 +108,6 @@ class MutableCardSteganography:
         
         # Load image (fresh, ignoring any existing LSB data)
         img = Image.open(image_path).convert('RGB')
-        pixels = img.load()
-        width, height = img.size
         
         # Add metadata
         data_with_meta = {
@@ -85,126 +119,181 @@ class MutableCardSteganography:
             }
         }
         
-        # Prepare payload
-        json_data = json.dumps(data_with_meta, separators=(',', ':'))
-        checksum = hashlib.md5(json_data.encode()).hexdigest()[:8]
-        full_data = f"{self.MAGIC_HEADER}{checksum}{json_data}"
-        
-        # Convert to binary
-        binary_data = ''.join(format(ord(char), '08b') for char in full_data)
-        length_header = format(len(json_data), '032b')
-        full_binary = length_header + binary_data
+        return self._write_card(img, data_with_meta, output_path or image_path)
+    
+    def open_session(self, image_path: str) -> 'CardSession':
+        """
+        Open a single-decode read-modify-write session on a card
         
-        # Check capacity
-        max_region_width = min(self.EMBED_REGION_SIZE, width)
-        max_region_height = min(self.EMBED_REGION_SIZE, height)
-        available_bits = max_region_width * max_region_height * 3
+        Args:
+            image_path: Path to card image
+            
+        Returns:
+            CardSession holding the decoded pixels, data and _aurora_meta
+        """
+        return CardSession(self, image_path)
+    
+    def _write_card(
+        self,
+        img: Image.Image,
+        data_with_meta: Dict,
+        output_path: str,
+        region: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        Encode a payload into an already-decoded image and save it
         
-        if len(full_binary) > available_bits:
-            raise ValueError(
-                f"Data too large: {len(full_binary)} bits needed, {available_bits} available"
-            )
+        Args:
+            img: RGB image to write into
+            data_with_meta: Full data dict including _aurora_meta
+            output_path: Where to save
+            region: Embed region array already loaded from img (optional)
+            
+        Returns:
+            Path to output image
+        """
+        # Prepare payload
+        frame, payload = self._build_frame(data_with_meta)
         
-        # CRITICAL: Clear the entire embed region first
+        # CRITICAL: Clear each region written (header region + any spill tiles)
         # This ensures old data doesn't bleed through
-        for y in range(max_region_height):
-            for x in range(max_region_width):
-                r, g, b = pixels[x, y]
-                # Clear LSBs (set all to 0)
-                r = r & 0xFE
-                g = g & 0xFE
-                b = b & 0xFE
-                pixels[x, y] = (r, g, b)
-        
-        # Embed new data
-        data_index = 0
-        for y in range(max_region_height):
-            for x in range(max_region_width):
-                if data_index >= len(full_binary):
-                    break
-                
-                r, g, b = pixels[x, y]
-                
-                # Set LSB to data bits
-                if data_index < len(full_binary):
-                    r = (r & 0xFE) | int(full_binary[data_index])
-                    data_index += 1
-                if data_index < len(full_binary):
-                    g = (g & 0xFE) | int(full_binary[data_index])
-                    data_index += 1
-                if data_index < len(full_binary):
-                    b = (b & 0xFE) | int(full_binary[data_index])
-                    data_index += 1
-                
-                pixels[x, y] = (r, g, b)
-            
-            if data_index >= len(full_binary):
-                break
+        try:
+            embed_layout(img, frame, self.EMBED_REGION_SIZE, clear=True, region=region)
+        except ValueError as e:
+            raise ValueError(f"Data too large: {e}")
         
         # Save
-        if output_path is None:
-            output_path = image_path
-        
         if not output_path.lower().endswith('.png'):
             output_path += '.png'
         
         img.save(output_path, 'PNG', optimize=False)
         
+        # Replace any cached payload for this file with the one just written
+        payload_cache.invalidate(output_path)
+        payload_cache.put(file_identity(output_path), self.EMBED_REGION_SIZE, payload)
+        
         return output_path
     
-    def extract_data(self, image_path: str) -> Dict:
+    def _write_chunk_card(self, source_path: str, data_with_meta: Dict, output_path: str) -> str:
         """
-        Extract embedded data from image
+        Store a payload in the auRa chunk of a card, leaving the pixels untouched
         
         Args:
-            image_path: Path to card image
-            
+            source_path: Card image to copy from
+            data_with_meta: Full data dict including _aurora_meta
+            output_path: Where to save
+        
         Returns:
-            Dictionary of embedded data (without _aurora_meta)
+            Path to output image
         """
-        img = Image.open(image_path).convert('RGB')
-        pixels = img.load()
-        width, height = img.size
-        
-        max_region_width = min(self.EMBED_REGION_SIZE, width)
-        max_region_height = min(self.EMBED_REGION_SIZE, height)
-        
-        # Extract binary data
-        binary_data = ''
-        for y in range(max_region_height):
-            for x in range(max_region_width):
-                r, g, b = pixels[x, y]
-                binary_data += str(r & 1)
-                binary_data += str(g & 1)
-                binary_data += str(b & 1)
-        
-        # Read length header
-        if len(binary_data) < 32:
-            raise ValueError("No embedded data found")
+        frame, payload = self._build_frame(data_with_meta)
         
-        data_length = int(binary_data[:32], 2)
+        if not output_path.lower().endswith('.png'):
+            output_path += '.png'
         
-        # Extract payload
-        expected_chars = 12 + 8 + data_length  # magic + checksum + data
-        expected_bits = expected_chars * 8
-        total_bits = 32 + expected_bits
+        write_chunk_payload(source_path, output_path, frame)
+        
+        payload_cache.invalidate(output_path)
+        payload_cache.put(file_identity(output_path), self.EMBED_REGION_SIZE, payload)
         
-        if len(binary_data) < total_bits:
+        return output_path
+    
+    def _build_frame(self, data_with_meta: Dict) -> Tuple[bytes, Union[str, bytes]]:
+        """
+        Serialize a data dict into a payload frame
+        
+        Returns:
+            (frame bytes, payload as readers return it - v1 text or v2 body)
+        """
+        if self.payload_version == PAYLOAD_V2:
+            body = json.dumps(data_with_meta, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            return encode_frame(body, self.compression), body
+        
+        json_data = json.dumps(data_with_meta, separators=(',', ':'))
+        checksum = hashlib.md5(json_data.encode()).hexdigest()[:8]
+        full_data = f"{self.MAGIC_HEADER}{checksum}{json_data}"
+        return frame_payload(len(json_data), full_data.encode('latin-1')), full_data
+    
+    def _read_payload(self, image_path: str) -> Union[str, bytes]:
+        """
+        Header-first payload read
+        
+        Reads the length header and magic (first 43 pixels) and stops there
+        for non-Aurora images; otherwise reads only the pixels the payload spans.
+        PNGs only inflate the scanlines covering those pixels.
+        
+        Returns:
+            v1 payload text (magic + checksum + JSON) or v2 body bytes (JSON)
+        """
+        # Repeated reads of an unchanged card are served from the payload cache
+        identity = file_identity(image_path)
+        payload = payload_cache.get(identity, self.EMBED_REGION_SIZE)
+        if payload is not None:
+            if isinstance(payload, str) and not payload.startswith(self.MAGIC_HEADER):
+                raise ValueError("Invalid Aurora card - magic header mismatch")
+            return payload
+        
+        # Chunk-stored payloads are found without touching pixel data
+        payload = self._read_chunk_payload(image_path)
+        
+        if payload is None:
+            with open_region(image_path, self.EMBED_REGION_SIZE) as reader:
+                payload = self._read_region_payload(reader)
+        
+        payload_cache.put(identity, self.EMBED_REGION_SIZE, payload)
+        return payload
+    
+    def _read_chunk_payload(self, image_path: str) -> Optional[Union[str, bytes]]:
+        """Read and magic-check the payload from the auRa chunk, if present"""
+        frame = read_chunk_payload(image_path)
+        if frame is None:
+            return None
+        
+        if is_v2_frame(frame):
+            return decode_frame(frame)
+        
+        data_length, data = unframe_payload(frame)
+        payload = data.decode('latin-1')
+        
+        if not payload.startswith(self.MAGIC_HEADER):
+            raise ValueError("Invalid Aurora card - magic header mismatch")
+        if len(payload) != 12 + 8 + data_length:
             raise ValueError("Incomplete embedded data")
         
-        payload_binary = binary_data[32:total_bits]
+        return payload
+    
+    def _read_region_payload(self, reader: RegionReader) -> Union[str, bytes]:
+        """Read and magic-check the payload from an embed region"""
+        # Read length header + magic
+        magic_bits = LENGTH_HEADER_BITS + len(self.MAGIC_HEADER) * 8
+        if reader.capacity_bits < magic_bits:
+            raise ValueError("No embedded data found")
+        
+        if is_v2_frame(reader.read_bytes(0, len(FRAME_V2_MAGIC))):
+            return reader.read_frame_v2()
         
-        # Convert to text
-        payload = ''
-        for i in range(0, len(payload_binary), 8):
-            byte = payload_binary[i:i+8]
-            if len(byte) == 8:
-                payload += chr(int(byte, 2))
+        data_length = reader.read_length_header()
         
         # Verify magic header
-        if not payload.startswith(self.MAGIC_HEADER):
+        magic = reader.read_bytes(LENGTH_HEADER_BITS, len(self.MAGIC_HEADER))
+        if magic.decode('latin-1') != self.MAGIC_HEADER:
             raise ValueError("Invalid Aurora card - magic header mismatch")
         
+        # Extract payload
+        expected_chars = 12 + 8 + data_length  # magic + checksum + data
+        total_bits = LENGTH_HEADER_BITS + expected_chars * 8
+        
+        if reader.capacity_bits < total_bits:
+            raise ValueError("Incomplete embedded data")
+        
+        return reader.read_bytes(LENGTH_HEADER_BITS, expected_chars).decode('latin-1')
+    
+    def _parse_payload(self, payload: Union[str, bytes]) -> Dict:
+        """Verify the checksum and parse the JSON (including _aurora_meta)"""
+        # v2 bodies were CRC-checked when the frame was read
+        if isinstance(payload, bytes):
+            return json.loads(payload.decode('utf-8'))
+        
         # Extract components
         checksum = payload[12:20]
         json_data = payload[20:]
@@ -215,7 +304,19 @@ class MutableCardSteganography:
             raise ValueError(f"Data corrupted - checksum mismatch")
         
         # Parse JSON
-        full_data = json.loads(json_data)
+        return json.loads(json_data)
+    
+    def extract_data(self, image_path: str) -> Dict:
+        """
+        Extract embedded data from image
+        
+        Args:
+            image_path: Path to card image
+            
+        Returns:
+            Dictionary of embedded data (without _aurora_meta)
+        """
+        full_data = self._parse_payload(self._read_payload(image_path))
         
         # Return data without metadata
         return {k: v for k, v in full_data.items() if k != '_aurora_meta'}
@@ -228,46 +329,119 @@ class MutableCardSteganography:
         except (ValueError, json.JSONDecodeError):
             return False
     
+    def probe_header(self, image_path: str) -> bool:
+        """
+        Cheap check for an Aurora payload header
+        
+        Reads only the auRa chunk or the length header and magic at the start
+        of the embed region (a few dozen pixels); nothing is decoded or
+        checksummed, so a True result can still fail extraction.
+        """
+        magic = self.MAGIC_HEADER.encode('latin-1')
+        header_bytes = LENGTH_HEADER_BITS // 8
+        
+        try:
+            frame = read_chunk_payload(image_path)
+            if frame is not None:
+                return is_v2_frame(frame) or frame[header_bytes:header_bytes + len(magic)] == magic
+            
+            with open_region(image_path, self.EMBED_REGION_SIZE) as reader:
+                if reader.capacity_bits < (header_bytes + len(magic)) * 8:
+                    return False
+                head = reader.read_bytes(0, header_bytes + len(magic))
+                return is_v2_frame(head) or head[header_bytes:] == magic
+        except (OSError, ValueError):
+            return False
+    
+    def payload_digest(self, image_path: str) -> str:
+        """
+        SHA-256 of the raw embedded payload
+        
+        The payload is read (or served from the payload cache) but not
+        checksummed or parsed, so callers can recognise an unchanged card
+        without validating and decoding its payload.
+        
+        Returns:
+            Hex digest
+        
+        Raises:
+            ValueError: If the image holds no Aurora payload
+        """
+        payload = self._read_payload(image_path)
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+    
     def get_metadata(self, image_path: str) -> Optional[Dict]:
         """Get Aurora metadata from card"""
         try:
-            img = Image.open(image_path).convert('RGB')
-            pixels = img.load()
-            width, height = img.size
+            payload = self._read_payload(image_path)
             
-            max_region_width = min(self.EMBED_REGION_SIZE, width)
-            max_region_height = min(self.EMBED_REGION_SIZE, height)
-            
-            # Extract binary data
-            binary_data = ''
-            for y in range(max_region_height):
-                for x in range(max_region_width):
-                    r, g, b = pixels[x, y]
-                    binary_data += str(r & 1)
-                    binary_data += str(g & 1)
-                    binary_data += str(b & 1)
-            
-            data_length = int(binary_data[:32], 2)
-            expected_chars = 12 + 8 + data_length
-            expected_bits = expected_chars * 8
-            total_bits = 32 + expected_bits
-            
-            payload_binary = binary_data[32:total_bits]
-            
-            payload = ''
-            for i in range(0, len(payload_binary), 8):
-                byte = payload_binary[i:i+8]
-                if len(byte) == 8:
-                    payload += chr(int(byte, 2))
-            
-            json_data = payload[20:]
-            full_data = json.loads(json_data)
+            if isinstance(payload, bytes):
+                full_data = json.loads(payload.decode('utf-8'))
+            else:
+                json_data = payload[20:]
+                full_data = json.loads(json_data)
             
             return full_data.get('_aurora_meta')
             
         except:
             return None
     
+    # ============================================
+    # BULK OPERATIONS
+    # ============================================
+    
+    def extract_many(
+        self,
+        paths: Iterable[str],
+        workers: Optional[int] = None,
+        batch_size: int = 16
+    ) -> Iterator[ExtractResult]:
+        """
+        Extract many cards across a process pool
+        
+        Decoding is CPU-bound and holds the GIL, so cards are fanned out to
+        worker processes in small batches. Results stream back as batches
+        complete (unordered); a failing card yields an ExtractResult with
+        its error instead of stopping the run. Only a bounded number of
+        batches is in flight, so `paths` may be a lazy iterator.
+        
+        Args:
+            paths: Card image paths
+            workers: Worker processes (None = CPU count, 1 = extract in-process)
+            batch_size: Cards per worker task
+        
+        Yields:
+            ExtractResult per card, in completion order
+        """
+        if workers == 1:
+            for path in paths:
+                yield _extract_result(self, path)
+            return
+        
+        batches = _batched(paths, batch_size)
+        max_in_flight = (workers or os.cpu_count() or 1) * 4
+        pool = ProcessPoolExecutor(max_workers=workers)
+        
+        try:
+            pending = set()
+            for batch in batches:
+                pending.add(pool.submit(_extract_batch, batch))
+                
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            # Closing the generator early drops batches not yet started
+            pool.shutdown(wait=True, cancel_futures=True)
+    
     # ============================================
     # ASYNC OPERATIONS
     # ============================================
@@ -313,11 +487,12 @@ class MutableCardSteganography:
         lock = self._locks[image_path]
         
         async with lock:
-            # Load current data
-            data = await self.async_extract_data(image_path)
+            # Decode pixels and payload once for the whole read-modify-write
+            loop = asyncio.get_event_loop()
+            session = await loop.run_in_executor(None, self.open_session, image_path)
             
             # Create editable wrapper
-            editor = CardDataEditor(data, image_path, self)
+            editor = CardDataEditor(session.data, image_path, self)
             
             try:
                 yield editor
@@ -325,23 +500,18 @@ class MutableCardSteganography:
                 # Save changes if modified
                 if editor.is_modified:
                     # Update edit count
-                    metadata = self.get_metadata(image_path) or {}
+                    metadata = session.meta
                     edit_count = metadata.get('edit_count', 0) + 1
                     
-                    data['_aurora_meta'] = {
+                    meta = {
                         "version": self.VERSION,
                         "embedded_at": metadata.get('embedded_at', datetime.utcnow().isoformat()),
                         "last_modified": datetime.utcnow().isoformat(),
                         "edit_count": edit_count
                     }
                     
-                    # Save
-                    await self.async_embed_data(
-                        image_path,
-                        editor.data,
-                        output_path=image_path,
-                        force_overwrite=True
-                    )
+                    # Save (re-encodes from the session's in-memory pixels)
+                    await loop.run_in_executor(None, session.commit, editor.data, meta)
                     
                     # Track edit history
                     if image_path not in self._edit_history:
@@ -376,6 +546,22 @@ class MutableCardSteganography:
                 card[key] = value
             return card.data
     
+    async def queue_update(self, image_path: str, updates: Dict[str, Any]) -> Dict:
+        """
+        Update fields through the coalescing queue
+        
+        Updates queued for the same card while it is waiting for (or holding)
+        its lock are merged and written with a single re-embed.
+        
+        Args:
+            image_path: Card to update
+            updates: Dict of field -> new value
+        
+        Returns:
+            Card data after the merged edit that included these updates
+        """
+        return await self._update_queue.submit(image_path, updates)
+    
     async def batch_update(
         self,
         updates: list[tuple[str, Dict]]
@@ -383,23 +569,103 @@ class MutableCardSteganography:
         """
         Update multiple cards concurrently
         
+        Every update for the same card is merged in submission order and
+        applied with one decode and one re-embed, so the cost scales with the
+        number of distinct cards rather than the number of updates.
+        
         Args:
             updates: List of (image_path, updates_dict) tuples
             
         Returns:
-            List of updated data dicts
+            List of updated data dicts (entries for the same card all hold its final data)
         """
-        tasks = [
-            self.update_fields(image_path, update_dict)
+        futures = [
+            self._update_queue.submit(image_path, update_dict)
             for image_path, update_dict in updates
         ]
-        return await asyncio.gather(*tasks)
+        return await asyncio.gather(*futures)
     
     def get_edit_history(self, image_path: str) -> list[Dict]:
         """Get edit history for a card"""
         return self._edit_history.get(image_path, [])
 
 
+class CardSession:
+    """
+    Single-decode read-modify-write handle on a card
+    
+    The image is decoded once; the payload is read from the in-memory embed
+    region, and commit() re-encodes from the same pixel array instead of
+    reopening the file. Cards storing their payload in the auRa chunk are
+    never decoded - commit() splices a new chunk in.
+    
+    Usage:
+        session = stego.open_session("card.png")
+        session.data['tier'] = 'Premium'
+        session.commit()
+    """
+    
+    def __init__(self, stego: MutableCardSteganography, image_path: str):
+        self.image_path = image_path
+        self._stego = stego
+        
+        self.image = None
+        self.region = None
+        payload = stego._read_chunk_payload(image_path)
+        
+        if payload is None:
+            # One full decode - the pixels are needed again for the write
+            self.image = Image.open(image_path).convert('RGB')
+            width, height = self.image.size
+            region_width = min(stego.EMBED_REGION_SIZE, width)
+            region_height = min(stego.EMBED_REGION_SIZE, height)
+            self.region = load_region(self.image, region_width, region_height)
+            
+            reader = open_layout(width, height, stego.EMBED_REGION_SIZE, image_crop(self.image))
+            payload = stego._read_region_payload(reader)
+        
+        full_data = stego._parse_payload(payload)
+        
+        self.meta = full_data.pop('_aurora_meta', None) or {}
+        self.data = full_data
+    
+    def commit(
+        self,
+        data: Optional[Dict] = None,
+        meta: Optional[Dict] = None,
+        output_path: Optional[str] = None
+    ) -> str:
+        """
+        Re-encode the card from the in-memory pixels (or splice its payload chunk) and save it
+        
+        Args:
+            data: New card data (default: session.data)
+            meta: New _aurora_meta (default: session.meta)
+            output_path: Where to save (None = overwrite source)
+            
+        Returns:
+            Path to output image
+        """
+        if data is not None:
+            self.data = data
+        if meta is not None:
+            self.meta = meta
+        
+        data_with_meta = {**self.data, "_aurora_meta": self.meta}
+        
+        if self.image is None:
+            return self._stego._write_chunk_card(
+                self.image_path, data_with_meta, output_path or self.image_path
+            )
+        
+        return self._stego._write_card(
+            self.image,
+            data_with_meta,
+            output_path or self.image_path,
+            region=self.region
+        )
+
+
 class CardDataEditor:
     """
     Wrapper for card data that tracks modifications
@@ -449,6 +715,94 @@ class CardDataEditor:
         return len(self.changes) > 0
 
 
+def _batched(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Split an iterable of paths into lists of at most `size`"""
+    iterator = iter(paths)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _extract_result(stego: MutableCardSteganography, path: str) -> ExtractResult:
+    """Extract one card, capturing any error as text (exceptions may not pickle)"""
+    try:
+        return ExtractResult(path, stego.extract_data(path), None)
+    except Exception as e:
+        return ExtractResult(path, None, f"{type(e).__name__}: {e}")
+
+
+_worker_stego = None  # One instance per worker process
+
+
+def _extract_batch(paths: List[str]) -> List[ExtractResult]:
+    """Process-pool task for extract_many()"""
+    global _worker_stego
+    if _worker_stego is None:
+        _worker_stego = MutableCardSteganography()
+    
+    return [_extract_result(_worker_stego, path) for path in paths]
+
+
+class CardUpdateQueue:
+    """
+    Write-coalescing queue of field updates
+    
+    submit() parks an update under its card path and schedules one flush task
+    per card. The flush takes the card's edit lock, then drains everything
+    pending for that card, applies it in submission order inside a single
+    edit_card() and resolves every caller's future with the final data.
+    Updates arriving during a write are picked up by the next flush.
+    """
+    
+    def __init__(self, stego: MutableCardSteganography):
+        self._stego = stego
+        self._pending = {}  # Card path -> list of (updates, future)
+        self._flushing = {}  # Card path -> flush task
+    
+    def submit(self, image_path: str, updates: Dict[str, Any]) -> asyncio.Future:
+        """
+        Queue an update (must be called from the event loop)
+        
+        Returns:
+            Future resolving to the card data after the merged edit
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(image_path, []).append((updates, future))
+        
+        if image_path not in self._flushing:
+            self._flushing[image_path] = loop.create_task(self._flush(image_path))
+        
+        return future
+    
+    async def _flush(self, image_path: str):
+        """Apply pending updates for one card until none are left"""
+        try:
+            while self._pending.get(image_path):
+                batch = None
+                try:
+                    async with self._stego.edit_card(image_path) as card:
+                        # Drain after the lock is held so waiting updates join this edit
+                        batch = self._pending.pop(image_path, [])
+                        for updates, _ in batch:
+                            card.update(updates)
+                        data = card.data
+                except Exception as e:
+                    if batch is None:
+                        batch = self._pending.pop(image_path, [])
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(dict(data))
+        finally:
+            del self._flushing[image_path]
+
+
 # Convenience functions
 async def quick_embed(image_path: str, data: Dict) -> str:
     """Quick async embed"""
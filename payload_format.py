@@ -0,0 +1,223 @@
+"""
+Aurora Archive - Payload Format
+Binary v2 payload frame shared by CardSteganography and MutableCardSteganography
+
+v1 (still read and written):
+
+    [32-bit big-endian JSON length]["415552524152"][8 hex chars of MD5][JSON]
+
+v2:
+
+    [magic 0x89 'AU2'][version][flags][varint body length][CRC32C of body][body]
+
+The v2 body is UTF-8 JSON, zlib- or zstd-compressed when that makes it smaller.
+The magic's first byte is never the top byte of a plausible v1 length, so
+readers tell the two apart from the first four bytes.
+
+Python 3.10+
+Dependencies: zstandard (optional), crc32c (optional, faster checksums)
+"""
+
+import zlib
+from typing import Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from crc32c import crc32c as _native_crc32c
+except ImportError:
+    _native_crc32c = None
+
+PAYLOAD_V1 = 1
+PAYLOAD_V2 = 2
+
+FRAME_V2_MAGIC = b'\x89AU2'
+
+# Flags byte
+FLAG_ZLIB = 0x01
+FLAG_ZSTD = 0x02
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+COMPRESSION_ZSTD = "zstd"
+
+# magic + version + flags + longest varint (5 bytes) + CRC32C
+MAX_FRAME_HEADER_SIZE = len(FRAME_V2_MAGIC) + 2 + 5 + 4
+
+
+class PayloadFormatError(ValueError):
+    """Raised when a v2 frame is malformed or fails its CRC"""
+    pass
+
+
+def _build_crc32c_table() -> list:
+    """Table for the reflected Castagnoli polynomial"""
+    table = []
+    for n in range(256):
+        crc = n
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _build_crc32c_table()
+
+
+def crc32c(data: bytes) -> int:
+    """CRC-32C (Castagnoli) of a byte string"""
+    if _native_crc32c is not None:
+        return _native_crc32c(data)
+    
+    crc = 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def encode_varint(value: int) -> bytes:
+    """Unsigned LEB128"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """
+    Decode an unsigned LEB128 value
+    
+    Returns:
+        (value, offset just past the varint)
+    """
+    value = 0
+    for shift in range(0, 35, 7):
+        if offset >= len(data):
+            break
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise PayloadFormatError("Invalid length varint in payload frame")
+
+
+def is_v2_frame(head: bytes) -> bool:
+    """Check whether the first bytes of a payload belong to a v2 frame"""
+    return head[:len(FRAME_V2_MAGIC)] == FRAME_V2_MAGIC
+
+
+def encode_frame(body: bytes, compression: str = COMPRESSION_ZLIB) -> bytes:
+    """
+    Build a v2 frame
+    
+    Args:
+        body: Payload bytes (UTF-8 JSON, or ciphertext)
+        compression: COMPRESSION_ZLIB, COMPRESSION_ZSTD or COMPRESSION_NONE;
+                     the body is stored raw when compressing does not shrink it
+    
+    Returns:
+        Complete frame bytes
+    """
+    flags = 0
+    stored = body
+    
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise PayloadFormatError("zstd compression requires the 'zstandard' package")
+        packed = zstandard.ZstdCompressor(level=19).compress(body)
+        if len(packed) < len(body):
+            flags, stored = FLAG_ZSTD, packed
+    elif compression == COMPRESSION_ZLIB:
+        packed = zlib.compress(body, 9)
+        if len(packed) < len(body):
+            flags, stored = FLAG_ZLIB, packed
+    elif compression != COMPRESSION_NONE:
+        raise PayloadFormatError(f"Unknown compression: {compression}")
+    
+    return b''.join([
+        FRAME_V2_MAGIC,
+        bytes([PAYLOAD_V2, flags]),
+        encode_varint(len(stored)),
+        crc32c(stored).to_bytes(4, 'big'),
+        stored,
+    ])
+
+
+def parse_frame_header(head: bytes) -> Tuple[int, int, int, int]:
+    """
+    Parse the fixed part of a v2 frame
+    
+    Args:
+        head: At least the first MAX_FRAME_HEADER_SIZE bytes of the frame
+              (fewer is fine when the frame itself is shorter)
+    
+    Returns:
+        (flags, stored body length, CRC32C, header size in bytes)
+    """
+    if not is_v2_frame(head):
+        raise PayloadFormatError("Not a v2 payload frame")
+    
+    offset = len(FRAME_V2_MAGIC)
+    if len(head) < offset + 2:
+        raise PayloadFormatError("Truncated payload frame header")
+    
+    version, flags = head[offset], head[offset + 1]
+    if version != PAYLOAD_V2:
+        raise PayloadFormatError(f"Unsupported payload version {version}")
+    
+    body_length, offset = decode_varint(head, offset + 2)
+    if len(head) < offset + 4:
+        raise PayloadFormatError("Truncated payload frame header")
+    
+    crc = int.from_bytes(head[offset:offset + 4], 'big')
+    return flags, body_length, crc, offset + 4
+
+
+def decode_body(flags: int, stored: bytes, crc: int) -> bytes:
+    """
+    Verify and decompress a v2 frame body
+    
+    Returns:
+        Original body bytes
+    """
+    if crc32c(stored) != crc:
+        raise PayloadFormatError("CRC mismatch - payload corrupted")
+    
+    if flags & FLAG_ZSTD and zstandard is None:
+        raise PayloadFormatError("zstd-compressed payload requires the 'zstandard' package")
+    
+    try:
+        if flags & FLAG_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(stored)
+        if flags & FLAG_ZLIB:
+            return zlib.decompress(stored)
+    except Exception as e:
+        raise PayloadFormatError(f"Cannot decompress payload: {e}")
+    
+    return stored
+
+
+def decode_frame(frame: bytes) -> bytes:
+    """
+    Decode a complete v2 frame
+    
+    Returns:
+        Original body bytes
+    """
+    flags, body_length, crc, header_size = parse_frame_header(frame[:MAX_FRAME_HEADER_SIZE])
+    stored = frame[header_size:header_size + body_length]
+    
+    if len(stored) < body_length:
+        raise PayloadFormatError("Incomplete payload frame")
+    
+    return decode_body(flags, stored, crc)
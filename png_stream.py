@@ -0,0 +1,333 @@
+"""
+Aurora Archive - PNG Stream Reader
+Decodes only the top scanlines of a PNG card
+
+Card payloads live in the top-left embed region, so reading them never needs
+the full artwork. PNGRowSource walks the chunk stream, inflates IDAT data only
+as far as the requested rows, and hands those raw scanlines to Pillow as a
+truncated PNG for unfiltering. Extract cost and memory then depend on the
+region height, not on the card resolution.
+
+find_chunk() and replace_chunk() read and splice ancillary chunks without
+inflating IDAT at all.
+
+Python 3.10+
+Dependencies: Pillow, numpy
+"""
+
+import io
+import os
+import math
+import shutil
+import struct
+import tempfile
+import zlib
+import numpy as np
+from PIL import Image
+from typing import Iterator, Tuple, Optional, BinaryIO
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Samples per pixel for each PNG color type
+CHANNELS_BY_COLOR_TYPE = {
+    0: 1,  # Grayscale
+    2: 3,  # RGB
+    3: 1,  # Palette index
+    4: 2,  # Grayscale + alpha
+    6: 4,  # RGBA
+}
+
+# Chunks needed to interpret the scanlines (copied into the truncated PNG)
+INTERPRETATION_CHUNKS = (b'PLTE', b'tRNS')
+
+
+class PNGStreamError(ValueError):
+    """Raised when a file cannot be streamed as a PNG"""
+    pass
+
+
+def iter_chunks(stream: BinaryIO, verify_crc: bool = True) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Iterate over PNG chunks without reading the whole file
+    
+    Args:
+        stream: Binary file object positioned at the PNG signature
+        verify_crc: If True, check each chunk's CRC
+    
+    Yields:
+        Tuples of (chunk_type, chunk_data), ending with IEND
+    """
+    if stream.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+        raise PNGStreamError("Not a PNG file")
+    
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            raise PNGStreamError("Truncated PNG - missing IEND")
+        
+        length, chunk_type = struct.unpack('>I4s', header)
+        data = stream.read(length)
+        crc = stream.read(4)
+        
+        if len(data) < length or len(crc) < 4:
+            raise PNGStreamError(f"Truncated {chunk_type!r} chunk")
+        
+        if verify_crc and struct.unpack('>I', crc)[0] != zlib.crc32(chunk_type + data):
+            raise PNGStreamError(f"CRC mismatch in {chunk_type!r} chunk")
+        
+        yield chunk_type, data
+        
+        if chunk_type == b'IEND':
+            return
+
+
+def build_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Serialize a chunk with its length prefix and CRC"""
+    return (
+        struct.pack('>I', len(data)) + chunk_type + data +
+        struct.pack('>I', zlib.crc32(chunk_type + data))
+    )
+
+
+class PNGRowSource:
+    """
+    Lazily inflates the top scanlines of a PNG
+    
+    Usage:
+        with PNGRowSource("card.png") as source:
+            pixels = source.crop((0, 0, 100, 3))  # inflates 3 rows only
+    """
+    
+    def __init__(self, image_path: str):
+        """
+        Open a PNG and parse its header chunks
+        
+        Raises:
+            PNGStreamError: If the file is not a streamable PNG (e.g. interlaced)
+            FileNotFoundError: If the file does not exist
+        """
+        self._file = open(image_path, 'rb')
+        try:
+            self._chunks = iter_chunks(self._file)
+            self._parse_header()
+        except Exception:
+            self._file.close()
+            raise
+        
+        self._inflater = zlib.decompressobj()
+        self._raw = bytearray()
+        self._decoded: Optional[Image.Image] = None
+    
+    def _parse_header(self):
+        """Read IHDR and the chunks preceding the first IDAT"""
+        chunk_type, ihdr = next(self._chunks)
+        if chunk_type != b'IHDR' or len(ihdr) != 13:
+            raise PNGStreamError("PNG does not start with IHDR")
+        
+        (self.width, self.height, self.bit_depth, self.color_type,
+         _compression, _filter, interlace) = struct.unpack('>IIBBBBB', ihdr)
+        
+        if interlace:
+            raise PNGStreamError("Interlaced PNGs cannot be streamed row by row")
+        if self.color_type not in CHANNELS_BY_COLOR_TYPE:
+            raise PNGStreamError(f"Unsupported PNG color type {self.color_type}")
+        
+        self._ihdr = ihdr
+        self._extra_chunks = []
+        self._pending = b''
+        
+        for chunk_type, data in self._chunks:
+            if chunk_type == b'IDAT':
+                self._pending = data
+                break
+            if chunk_type == b'IEND':
+                raise PNGStreamError("PNG has no image data")
+            if chunk_type in INTERPRETATION_CHUNKS:
+                self._extra_chunks.append(build_chunk(chunk_type, data))
+        
+        bits_per_row = self.width * CHANNELS_BY_COLOR_TYPE[self.color_type] * self.bit_depth
+        self._stride = 1 + math.ceil(bits_per_row / 8)  # filter byte + samples
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Full image size (width, height)"""
+        return (self.width, self.height)
+    
+    @property
+    def rows_inflated(self) -> int:
+        """Number of scanlines inflated so far"""
+        return len(self._raw) // self._stride
+    
+    def _inflate_rows(self, rows: int):
+        """Inflate IDAT data until the first `rows` scanlines are available"""
+        needed = min(rows, self.height) * self._stride
+        
+        while len(self._raw) < needed:
+            if self._inflater.unconsumed_tail:
+                data = self._inflater.unconsumed_tail
+            elif self._pending:
+                data, self._pending = self._pending, b''
+            else:
+                chunk_type, data = next(self._chunks, (b'IEND', b''))
+                if chunk_type == b'IEND':
+                    raise PNGStreamError("Truncated image data")
+                if chunk_type != b'IDAT':
+                    continue
+            
+            try:
+                self._raw += self._inflater.decompress(data, needed - len(self._raw))
+            except zlib.error as e:
+                raise PNGStreamError(f"Corrupted image data: {e}")
+    
+    def read_rows(self, rows: int) -> Image.Image:
+        """
+        Decode the first `rows` scanlines
+        
+        Args:
+            rows: Number of rows to decode (clamped to the image height)
+        
+        Returns:
+            Image of size (width, rows) in the PNG's native mode
+        """
+        rows = min(rows, self.height)
+        self._inflate_rows(rows)
+        
+        # Re-wrap the raw scanlines as a small PNG and let Pillow unfilter them
+        ihdr = struct.pack('>II', self.width, rows) + self._ihdr[8:]
+        raw = bytes(self._raw[:rows * self._stride])
+        truncated = b''.join([
+            PNG_SIGNATURE,
+            build_chunk(b'IHDR', ihdr),
+            *self._extra_chunks,
+            build_chunk(b'IDAT', zlib.compress(raw, 0)),
+            build_chunk(b'IEND', b''),
+        ])
+        
+        img = Image.open(io.BytesIO(truncated))
+        img.load()
+        return img
+    
+    def crop(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Get RGB pixels for a (left, upper, right, lower) box
+        
+        Rows already decoded are reused; otherwise decoding extends to `lower`.
+        """
+        lower = box[3]
+        if self._decoded is None or self._decoded.size[1] < lower:
+            self._decoded = self.read_rows(lower)
+        
+        block = self._decoded.crop(box)
+        if block.mode != 'RGB':
+            block = block.convert('RGB')
+        return np.asarray(block, dtype=np.uint8)
+    
+    def close(self):
+        """Release the underlying file"""
+        self._file.close()
+        self._decoded = None
+    
+    def __enter__(self) -> 'PNGRowSource':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def find_chunk(image_path: str, chunk_type: bytes) -> Optional[bytes]:
+    """
+    Read the first chunk of a type that precedes the image data
+    
+    Only chunk headers are read on the way; chunk bodies are skipped with seeks
+    and the walk stops at the first IDAT.
+    
+    Args:
+        image_path: Path to PNG file
+        chunk_type: Four-byte chunk type, e.g. b'auRa'
+    
+    Returns:
+        Chunk data, or None if the chunk is not present
+    
+    Raises:
+        PNGStreamError: If the file is not a PNG or the chunk is corrupted
+    """
+    with open(image_path, 'rb') as f:
+        if f.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            raise PNGStreamError("Not a PNG file")
+        
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            
+            length, found_type = struct.unpack('>I4s', header)
+            
+            if found_type == chunk_type:
+                data = f.read(length)
+                crc = f.read(4)
+                if len(data) < length or len(crc) < 4:
+                    raise PNGStreamError(f"Truncated {chunk_type!r} chunk")
+                if struct.unpack('>I', crc)[0] != zlib.crc32(chunk_type + data):
+                    raise PNGStreamError(f"CRC mismatch in {chunk_type!r} chunk")
+                return data
+            
+            if found_type in (b'IDAT', b'IEND'):
+                return None
+            
+            f.seek(length + 4, io.SEEK_CUR)
+
+
+def replace_chunk(source_path: str, output_path: str, chunk_type: bytes, data: Optional[bytes]):
+    """
+    Splice a chunk into a PNG without touching the image data
+    
+    Every existing chunk of the type is dropped and the new one is inserted
+    right before the first IDAT. All other chunks are copied byte for byte,
+    so no zlib work is done.
+    
+    Args:
+        source_path: PNG to copy from
+        output_path: Where to write (may be the same file)
+        chunk_type: Four-byte chunk type
+        data: New chunk data (None = only remove the chunk)
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(suffix='.png', dir=output_dir)
+    
+    try:
+        with open(source_path, 'rb') as src, os.fdopen(fd, 'wb') as out:
+            if src.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+                raise PNGStreamError("Not a PNG file")
+            out.write(PNG_SIGNATURE)
+            
+            inserted = data is None
+            while True:
+                header = src.read(8)
+                if len(header) < 8:
+                    raise PNGStreamError("Truncated PNG - missing IEND")
+                
+                length, found_type = struct.unpack('>I4s', header)
+                
+                if found_type == chunk_type:
+                    src.seek(length + 4, io.SEEK_CUR)
+                    continue
+                
+                if not inserted and found_type in (b'IDAT', b'IEND'):
+                    out.write(build_chunk(chunk_type, data))
+                    inserted = True
+                
+                body = src.read(length + 4)
+                if len(body) < length + 4:
+                    raise PNGStreamError(f"Truncated {found_type!r} chunk")
+                out.write(header)
+                out.write(body)
+                
+                if found_type == b'IEND':
+                    break
+        
+        shutil.copymode(source_path, temp_path)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
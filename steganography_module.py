@@ -2,16 +2,32 @@
 Aurora Archive - Steganography Module
 Embeds and extracts member data from card images using LSB steganography
 
+Payloads can optionally be stored in a private PNG chunk (auRa) instead, so
+rewriting card metadata is a chunk splice rather than a full PNG re-encode.
+Payloads are written as v1 (hex magic + MD5 + JSON) or v2 (payload_format);
+readers detect either.
+
 Python 3.10+
-Dependencies: Pillow, cryptography (optional for encryption)
+Dependencies: Pillow, numpy, cryptography (optional for encryption)
 """
 
 import json
 import hashlib
 from PIL import Image
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 from pathlib import Path
 
+from stego_codec import (
+    LENGTH_HEADER_BITS, STORAGE_LSB, STORAGE_CHUNK, open_region, load_region,
+    store_region, frame_payload, unframe_payload, bytes_to_bits, embed_bits,
+    embed_layout, read_chunk_payload, write_chunk_payload
+)
+from payload_format import (
+    PAYLOAD_V1, PAYLOAD_V2, COMPRESSION_ZLIB, FRAME_V2_MAGIC, PayloadFormatError,
+    is_v2_frame, encode_frame, decode_frame
+)
+from stego_cache import payload_cache, file_identity
+
 card_image_path = Path("Desktop/Authunder/test_card_embedded.png")
 
 
@@ -44,13 +60,32 @@ class CardSteganography:
     # Embed in first N pixels for fast extraction (100x100 = 30KB capacity)
     EMBED_REGION_SIZE = 100
     
-    def __init__(self, use_encryption: bool = False):
+    def __init__(
+        self,
+        use_encryption: bool = False,
+        storage: str = STORAGE_LSB,
+        payload_version: int = PAYLOAD_V1,
+        compression: str = COMPRESSION_ZLIB
+    ):
         """
         Initialize steganography system
         
         Args:
             use_encryption: If True, encrypt data before embedding (requires cryptography lib)
+            storage: Where embeds write the payload - STORAGE_LSB (pixels) or
+                     STORAGE_CHUNK (auRa PNG chunk). Reads always check both.
+            payload_version: Frame format embeds write (PAYLOAD_V1 or PAYLOAD_V2).
+                             Reads detect either.
+            compression: v2 body compression ("zlib", "zstd" or "none")
         """
+        if storage not in (STORAGE_LSB, STORAGE_CHUNK):
+            raise ValueError(f"Unknown storage mode: {storage}")
+        if payload_version not in (PAYLOAD_V1, PAYLOAD_V2):
+            raise ValueError(f"Unknown payload version: {payload_version}")
+        
+        self.storage = storage
+        self.payload_version = payload_version
+        self.compression = compression
         self.use_encryption = use_encryption
         self.cipher = None
         
@@ -69,7 +104,8 @@ class CardSteganography:
         card_image_path: str = ["Desktop/Authunder/test_card.png"],
         member_data: Dict = {},
         output_path: Optional[str] = None,
-        region_only: bool = True
+        region_only: bool = True,
+        storage: Optional[str] = None
     ) -> str:
         """
         Embed member data into a card image
@@ -79,6 +115,7 @@ class CardSteganography:
             member_data: Dictionary containing member information
             output_path: Where to save modified image (default: auto-generate)
             region_only: If True, only embed in top-left region for speed
+            storage: Override the instance storage mode for this embed
             
         Returns:
             Path to the output image with embedded data
@@ -88,75 +125,34 @@ class CardSteganography:
             SteganographyError: If embedding fails
         """
         try:
-            # Load image
-            img = Image.open(card_image_path).convert('RGB')
-            pixels = img.load()
-            width, height = img.size
+            storage = storage or self.storage
             
-            # Prepare data
-            json_data = json.dumps(member_data, separators=(',', ':'))
-            
-            # Add checksum for corruption detection
-            checksum = hashlib.md5(json_data.encode()).hexdigest()[:8]
-            
-            # Build full payload: MAGIC + LENGTH + CHECKSUM + DATA
-            full_data = f"{self.MAGIC_HEADER}{checksum}{json_data}"
-            
-            # Optional encryption
-            if self.use_encryption:
-                full_data = self._encrypt(full_data)
-            
-            # Convert to binary
-            binary_data = ''.join(format(ord(char), '08b') for char in full_data)
-            data_length = len(binary_data)
-            
-            # Add 32-bit length header
-            length_header = format(len(json_data), '032b')
-            full_binary = length_header + binary_data
-            
-            # Check capacity
-            max_region_width = min(self.EMBED_REGION_SIZE, width)
-            max_region_height = min(self.EMBED_REGION_SIZE, height)
-            
-            if region_only:
-                available_bits = max_region_width * max_region_height * 3
+            if self.payload_version == PAYLOAD_V2:
+                # UTF-8 JSON body; the frame adds compression and a CRC32C
+                json_data = json.dumps(member_data, separators=(',', ':'), ensure_ascii=False)
+                
+                if self.use_encryption:
+                    payload = self._encrypt(json_data).encode('latin-1')
+                else:
+                    payload = json_data.encode('utf-8')
+                
+                frame = encode_frame(payload, self.compression)
             else:
-                available_bits = width * height * 3
-            
-            if len(full_binary) > available_bits:
-                raise InsufficientCapacityError(
-                    f"Data requires {len(full_binary)} bits but only {available_bits} available"
-                )
-            
-            # Embed data
-            data_index = 0
-            embed_height = max_region_height if region_only else height
-            embed_width = max_region_width if region_only else width
-            
-            for y in range(embed_height):
-                for x in range(embed_width):
-                    if data_index >= len(full_binary):
-                        break
-                    
-                    r, g, b = pixels[x, y]
-                    
-                    # Modify LSB of each channel
-                    if data_index < len(full_binary):
-                        r = (r & 0xFE) | int(full_binary[data_index])
-                        data_index += 1
-                    if data_index < len(full_binary):
-                        g = (g & 0xFE) | int(full_binary[data_index])
-                        data_index += 1
-                    if data_index < len(full_binary):
-                        b = (b & 0xFE) | int(full_binary[data_index])
-                        data_index += 1
-                    
-                    pixels[x, y] = (r, g, b)
+                # Prepare data
+                json_data = json.dumps(member_data, separators=(',', ':'))
+                
+                # Add checksum for corruption detection
+                checksum = hashlib.md5(json_data.encode()).hexdigest()[:8]
                 
-                if data_index >= len(full_binary):
-                    break
+                # Build full payload: MAGIC + LENGTH + CHECKSUM + DATA
+                payload = f"{self.MAGIC_HEADER}{checksum}{json_data}"
+                
+                # Optional encryption
+                if self.use_encryption:
+                    payload = self._encrypt(payload)
+                
+                frame = frame_payload(len(json_data), payload.encode('latin-1'))
             
-            # Save image
             if output_path is None:
                 output_path = self._generate_output_path(card_image_path)
             
@@ -164,13 +160,62 @@ class CardSteganography:
             if not output_path.lower().endswith('.png'):
                 output_path += '.png'
             
-            img.save(output_path, 'PNG', optimize=False)
+            if storage == STORAGE_CHUNK:
+                # Splice the payload chunk in - IDAT is copied without recompression
+                write_chunk_payload(card_image_path, output_path, frame)
+            else:
+                self._embed_lsb(card_image_path, output_path, frame, region_only)
+            
+            # Replace any cached payload for this file with the one just written
+            payload_cache.invalidate(output_path)
+            payload_cache.put(
+                file_identity(output_path),
+                self.EMBED_REGION_SIZE if region_only else None,
+                payload
+            )
             
             return output_path
             
         except Exception as e:
             raise SteganographyError(f"Failed to embed data: {str(e)}")
     
+    def _embed_lsb(
+        self,
+        card_image_path: str,
+        output_path: str,
+        frame: bytes,
+        region_only: bool
+    ):
+        """Encode a payload frame into the channel LSBs and save as PNG"""
+        # Load image
+        img = Image.open(card_image_path).convert('RGB')
+        width, height = img.size
+        
+        if region_only:
+            # Frames larger than the embed region spill into extra tiles
+            # listed in an index, so readers never decode the whole image
+            try:
+                embed_layout(img, frame, self.EMBED_REGION_SIZE)
+            except ValueError as e:
+                raise InsufficientCapacityError(str(e))
+        else:
+            # Convert to binary (MSB first)
+            full_binary = bytes_to_bits(frame)
+            available_bits = width * height * 3
+            
+            if full_binary.size > available_bits:
+                raise InsufficientCapacityError(
+                    f"Data requires {full_binary.size} bits but only {available_bits} available"
+                )
+            
+            region = load_region(img, width, height)
+            embed_bits(region, full_binary)
+            store_region(img, region)
+        
+        # Pillow does not carry the auRa chunk over, so a stale chunk payload
+        # cannot shadow the new LSB one
+        img.save(output_path, 'PNG', optimize=False)
+    
     def extract_member_data(
         self, 
         card_image_path: str,
@@ -193,53 +238,56 @@ class CardSteganography:
             SteganographyError: If extraction fails
         """
         try:
-            # Load image
-            img = Image.open(card_image_path).convert('RGB')
-            pixels = img.load()
-            width, height = img.size
-            
-            # Determine extraction region
-            max_region_width = min(self.EMBED_REGION_SIZE, width)
-            max_region_height = min(self.EMBED_REGION_SIZE, height)
-            
-            extract_height = max_region_height if region_only else height
-            extract_width = max_region_width if region_only else width
-            
-            # Extract binary data
-            binary_data = ''
-            for y in range(extract_height):
-                for x in range(extract_width):
-                    r, g, b = pixels[x, y]
+            # Repeated reads of an unchanged card are served from the payload cache
+            region_size = self.EMBED_REGION_SIZE if region_only else None
+            identity = file_identity(card_image_path)
+            payload = payload_cache.get(identity, region_size)
+            
+            if payload is None:
+                payload = self._read_chunk(card_image_path)
+            
+            if payload is None:
+                # Header-first read of the embed region: only the pixels the payload
+                # occupies are touched, and PNGs only inflate the rows they need
+                with open_region(card_image_path, region_size) as reader:
+                    available_bits = reader.capacity_bits
                     
-                    # Extract LSB from each channel
-                    binary_data += str(r & 1)
-                    binary_data += str(g & 1)
-                    binary_data += str(b & 1)
-            
-            # Read length header (first 32 bits)
-            if len(binary_data) < 32:
-                raise CorruptedDataError("Insufficient data in image")
-            
-            data_length = int(binary_data[:32], 2)
-            
-            # Calculate expected bits (length header + magic + checksum + data)
-            # Magic = 12 chars, Checksum = 8 chars, Data = data_length chars
-            expected_chars = 12 + 8 + data_length
-            expected_bits = expected_chars * 8
-            total_bits_needed = 32 + expected_bits
-            
-            if len(binary_data) < total_bits_needed:
-                raise CorruptedDataError("Image does not contain complete data")
-            
-            # Extract full payload
-            payload_binary = binary_data[32:total_bits_needed]
+                    # Read length header (first 32 bits)
+                    if available_bits < LENGTH_HEADER_BITS:
+                        raise CorruptedDataError("Insufficient data in image")
+                    
+                    if is_v2_frame(reader.read_bytes(0, len(FRAME_V2_MAGIC))):
+                        payload = reader.read_frame_v2()
+                    else:
+                        data_length = reader.read_length_header()
+                        
+                        # Reject non-Aurora images before reading the rest of the payload
+                        # (encrypted payloads can only be checked after decryption)
+                        magic_bits = LENGTH_HEADER_BITS + len(self.MAGIC_HEADER) * 8
+                        if not self.use_encryption and available_bits >= magic_bits:
+                            magic = reader.read_bytes(LENGTH_HEADER_BITS, len(self.MAGIC_HEADER))
+                            if magic.decode('latin-1') != self.MAGIC_HEADER:
+                                raise CorruptedDataError("Invalid magic header - not an Aurora card or data corrupted")
+                        
+                        # Calculate expected bits (length header + magic + checksum + data)
+                        # Magic = 12 chars, Checksum = 8 chars, Data = data_length chars
+                        expected_chars = 12 + 8 + data_length
+                        expected_bits = expected_chars * 8
+                        total_bits_needed = LENGTH_HEADER_BITS + expected_bits
+                        
+                        if available_bits < total_bits_needed:
+                            raise CorruptedDataError("Image does not contain complete data")
+                        
+                        # Extract full payload and convert to text (one character per byte)
+                        payload = reader.read_bytes(LENGTH_HEADER_BITS, expected_chars).decode('latin-1')
+                
+            payload_cache.put(identity, region_size, payload)
             
-            # Convert binary to text
-            payload = ''
-            for i in range(0, len(payload_binary), 8):
-                byte = payload_binary[i:i+8]
-                if len(byte) == 8:
-                    payload += chr(int(byte, 2))
+            if isinstance(payload, bytes):
+                # v2 body - its CRC32C was verified when the frame was read
+                if self.use_encryption:
+                    return json.loads(self._decrypt(payload.decode('latin-1')))
+                return json.loads(payload.decode('utf-8'))
             
             # Optional decryption
             if self.use_encryption:
@@ -269,11 +317,35 @@ class CardSteganography:
             
         except json.JSONDecodeError as e:
             raise CorruptedDataError(f"Invalid JSON data: {str(e)}")
+        except PayloadFormatError as e:
+            raise CorruptedDataError(str(e))
         except Exception as e:
             if isinstance(e, (CorruptedDataError, SteganographyError)):
                 raise
             raise SteganographyError(f"Failed to extract data: {str(e)}")
     
+    def _read_chunk(self, card_image_path: str) -> Optional[Union[str, bytes]]:
+        """
+        Read a payload stored in the auRa chunk
+        
+        Returns:
+            v1 payload text or decoded v2 body, or None if the card has no payload chunk
+        """
+        frame = read_chunk_payload(card_image_path)
+        if frame is None:
+            return None
+        
+        if is_v2_frame(frame):
+            return decode_frame(frame)
+        
+        data_length, data = unframe_payload(frame)
+        
+        # Encrypted payloads are longer than the plaintext the header counts
+        if not self.use_encryption and len(data) != 12 + 8 + data_length:
+            raise CorruptedDataError("Payload chunk does not contain complete data")
+        
+        return data.decode('latin-1')
+    
     def verify_card(self, card_image_path: str) -> bool:
         """
         Check if an image contains valid Aurora card data
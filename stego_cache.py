@@ -0,0 +1,144 @@
+"""
+Aurora Archive - Payload Cache
+Process-wide LRU of decoded card payloads
+
+A single card is read many times in one user flow (RedSeal check, data
+viewer, scanner, Obelisk validation). Entries are keyed by file identity
+(realpath, inode, size, mtime_ns), so any rewrite of the file is a miss, and
+every embed invalidates its output path explicitly.
+
+Python 3.10+
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+# (realpath, inode, size, mtime_ns)
+FileIdentity = Tuple[str, int, int, int]
+
+
+def file_identity(image_path: str) -> Optional[FileIdentity]:
+    """
+    Get the cache identity of a file
+    
+    Returns:
+        (realpath, inode, size, mtime_ns), or None if the file cannot be stat'ed
+    """
+    try:
+        real_path = os.path.realpath(image_path)
+        st = os.stat(real_path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return (real_path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class PayloadCache:
+    """
+    Size-bounded LRU mapping (file identity, embed region) -> raw payload
+    
+    Bounded by total payload bytes as well as entry count: a tiled payload
+    can approach 1 MB, so an entry cap alone does not bound memory.
+    
+    Thread-safe: reads run in executor threads as well as on the GUI thread.
+    """
+    
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached payloads
+            max_bytes: Maximum total payload size; larger payloads are not cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (realpath, region_size) -> (identity, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, identity: Optional[FileIdentity], region_size: Optional[int]) -> Optional[Union[str, bytes]]:
+        """
+        Look up a payload
+        
+        Args:
+            identity: Result of file_identity() taken before reading
+            region_size: Embed region the payload was read from (None = whole image)
+        
+        Returns:
+            Cached payload, or None on a miss
+        """
+        if identity is None:
+            return None
+        
+        key = (identity[0], region_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != identity:
+                # Stale entries (file rewritten) are dropped on sight
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, identity: Optional[FileIdentity], region_size: Optional[int], payload: Union[str, bytes]):
+        """
+        Store a payload
+        
+        Args:
+            identity: Result of file_identity() taken before reading (or after writing)
+            region_size: Embed region the payload lives in (None = whole image)
+            payload: v1 payload text (magic + checksum + data) or decoded v2 body
+        """
+        if identity is None:
+            return
+        
+        key = (identity[0], region_size)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(payload) > self.max_bytes:
+                return
+            
+            self._entries[key] = (identity, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+    
+    def _remove(self, key):
+        """Drop one entry and its bytes (caller holds the lock)"""
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+    
+    def invalidate(self, image_path: str):
+        """Drop every cached payload for a file (call after writing it)"""
+        real_path = os.path.realpath(image_path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == real_path]:
+                self._remove(key)
+    
+    def clear(self):
+        """Drop all cached payloads"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+    
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the cached payloads"""
+        return self._bytes
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by CardSteganography and MutableCardSteganography
+payload_cache = PayloadCache()
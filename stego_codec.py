@@ -0,0 +1,529 @@
+"""
+Aurora Archive - LSB Codec
+Vectorized bit packing shared by CardSteganography and MutableCardSteganography
+
+The embed region is handled as a numpy uint8 array of shape (rows, cols, 3).
+Flattening it row-major gives the same R, G, B, R, G, B... channel order the
+original pixel-by-pixel loops walked, so the on-disk format is unchanged:
+
+    [32-bit big-endian length][payload bytes, MSB first]
+
+v2 frames (payload_format) are written to the same bit positions and start
+with their own magic in place of the length header.
+
+Payloads too large for the top-left region spill into extra tiles of the
+same size. The region then starts with a layout index instead of a frame:
+
+    [magic 0x89 'AUL'][version][tile count][(column, row) per tile][frame...]
+
+and the frame continues through the listed tiles in order. Tiles are picked
+left to right along the top band first, so streamed PNG reads still inflate
+as few scanlines as possible.
+
+Either frame can instead live in a private ancillary PNG chunk (auRa), which
+is rewritten by splicing the chunk stream rather than re-encoding pixels.
+
+Python 3.10+
+Dependencies: numpy, Pillow
+"""
+
+import numpy as np
+from PIL import Image
+from typing import Callable, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+
+from png_stream import PNG_SIGNATURE, PNGRowSource, PNGStreamError, find_chunk, replace_chunk
+from payload_format import MAX_FRAME_HEADER_SIZE, PayloadFormatError, parse_frame_header, decode_body
+
+# Width of the length header that precedes every payload
+LENGTH_HEADER_BITS = 32
+
+# Private, ancillary, safe-to-copy chunk holding a payload frame
+PAYLOAD_CHUNK_TYPE = b'auRa'
+
+# Multi-tile layout index
+LAYOUT_MAGIC = b'\x89AUL'
+LAYOUT_VERSION = 1
+MAX_LAYOUT_TILES = 255
+MAX_TILE_COORD = 255  # Index entries store column and row in one byte each
+
+# Payload storage backends
+STORAGE_LSB = "lsb"      # Channel LSBs of the embed region
+STORAGE_CHUNK = "chunk"  # auRa chunk - rewrites never touch pixel data
+
+
+def load_region(img: Image.Image, width: int, height: int) -> np.ndarray:
+    """
+    Copy the top-left block of an RGB image into a writable array
+    
+    Args:
+        img: Source image (must already be in RGB mode)
+        width: Number of columns to copy
+        height: Number of rows to copy
+    
+    Returns:
+        uint8 array of shape (height, width, 3)
+    """
+    if (width, height) == img.size:
+        return np.array(img, dtype=np.uint8)
+    return np.array(img.crop((0, 0, width, height)), dtype=np.uint8)
+
+
+def store_region(img: Image.Image, region: np.ndarray, origin: Tuple[int, int] = (0, 0)):
+    """Write a modified region back into an image (top-left corner by default)"""
+    img.paste(Image.fromarray(region, 'RGB'), origin)
+
+
+def image_crop(img: Image.Image) -> Callable[[Tuple[int, int, int, int]], np.ndarray]:
+    """Build a crop callable returning RGB pixels of a PIL image (any mode)"""
+    def crop(box):
+        block = img.crop(box)
+        if block.mode != 'RGB':
+            block = block.convert('RGB')
+        return np.asarray(block, dtype=np.uint8)
+    
+    return crop
+
+
+def frame_payload(length: int, payload: bytes) -> bytes:
+    """Prefix a payload with its 32-bit big-endian length header"""
+    return length.to_bytes(LENGTH_HEADER_BITS // 8, 'big') + payload
+
+
+def unframe_payload(frame: bytes) -> Tuple[int, bytes]:
+    """Split a v1 frame into (length header value, payload bytes)"""
+    header_bytes = LENGTH_HEADER_BITS // 8
+    return int.from_bytes(frame[:header_bytes], 'big'), frame[header_bytes:]
+
+
+def bytes_to_bits(data: bytes) -> np.ndarray:
+    """Unpack bytes into a 0/1 array (MSB first)"""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def encode_bits(length: int, payload: bytes) -> np.ndarray:
+    """
+    Build the bit stream for a payload
+    
+    Args:
+        length: Value stored in the 32-bit length header
+        payload: Raw payload bytes (magic + checksum + data)
+    
+    Returns:
+        uint8 array of 0/1 values, header first
+    """
+    return bytes_to_bits(frame_payload(length, payload))
+
+
+def embed_bits(region: np.ndarray, bits: np.ndarray, clear: bool = False):
+    """
+    Write bits into the channel LSBs of a region in place
+    
+    Args:
+        region: uint8 array returned by load_region()
+        bits: 0/1 array from encode_bits()
+        clear: If True, zero every LSB in the region before writing
+    """
+    channels = region.reshape(-1)
+    
+    if bits.size > channels.size:
+        raise ValueError(
+            f"Data requires {bits.size} bits but only {channels.size} available"
+        )
+    
+    if clear:
+        channels &= 0xFE
+    
+    head = channels[:bits.size]
+    head &= 0xFE
+    head |= bits
+
+
+def bits_to_bytes(bits: np.ndarray) -> bytes:
+    """Pack a 0/1 array (MSB first) into bytes"""
+    return np.packbits(bits).tobytes()
+
+
+class RegionReader:
+    """
+    Lazily reads channel LSBs from an embed region in raster order
+    
+    Only the pixels covering the requested bit span are materialized, so a
+    caller can check the length header and magic first and bail out on
+    non-Aurora images after touching a few dozen pixels.
+    """
+    
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        crop: Callable[[Tuple[int, int, int, int]], np.ndarray],
+        origin: Tuple[int, int] = (0, 0)
+    ):
+        """
+        Args:
+            width: Region width in pixels
+            height: Region height in pixels
+            crop: Callable returning the RGB pixels of a (left, upper, right, lower) box
+            origin: Image coordinates of the region's top-left pixel
+        """
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self._crop = crop
+        self._channels = np.empty(0, dtype=np.uint8)
+    
+    @classmethod
+    def from_image(cls, img: Image.Image, width: int, height: int) -> 'RegionReader':
+        """Build a reader over the top-left block of a PIL image (any mode)"""
+        return cls(width, height, image_crop(img))
+    
+    @property
+    def capacity_bits(self) -> int:
+        """Total LSBs available in the region"""
+        return self.width * self.height * 3
+    
+    @property
+    def pixels_read(self) -> int:
+        """Number of pixels materialized so far"""
+        return self._channels.size // 3
+    
+    def _load_pixels(self, count: int):
+        """Extend the materialized span to the first `count` pixels"""
+        count = min(count, self.width * self.height)
+        position = self.pixels_read
+        pieces = [self._channels]
+        
+        # At most three crops: tail of a partial row, whole rows, head of a row
+        while position < count:
+            y, x = divmod(position, self.width)
+            if x == 0 and count - position >= self.width:
+                rows = (count - position) // self.width
+                box = (0, y, self.width, y + rows)
+                position += rows * self.width
+            else:
+                x_end = min(self.width, x + count - position)
+                box = (x, y, x_end, y + 1)
+                position += x_end - x
+            x0, y0 = self.origin
+            pieces.append(self._crop((box[0] + x0, box[1] + y0, box[2] + x0, box[3] + y0)).reshape(-1))
+        
+        if len(pieces) > 1:
+            self._channels = np.concatenate(pieces)
+    
+    def read_bits(self, start: int, stop: int) -> np.ndarray:
+        """Read the LSBs of channels [start, stop), clamped to the region"""
+        stop = min(stop, self.capacity_bits)
+        self._load_pixels(-(-stop // 3))
+        return self._channels[start:stop] & 1
+    
+    def read_bytes(self, start_bit: int, count: int) -> bytes:
+        """Read `count` bytes starting at a bit offset"""
+        return bits_to_bytes(self.read_bits(start_bit, start_bit + count * 8))
+    
+    def read_length_header(self) -> int:
+        """Decode the 32-bit length header (first 11 pixels)"""
+        return int.from_bytes(self.read_bytes(0, LENGTH_HEADER_BITS // 8), 'big')
+    
+    def read_frame_v2(self) -> bytes:
+        """
+        Read and decode a v2 frame starting at bit 0
+        
+        Only the header and the stored body span are read.
+        
+        Returns:
+            Original body bytes
+        """
+        head = self.read_bytes(0, min(MAX_FRAME_HEADER_SIZE, self.capacity_bits // 8))
+        flags, body_length, crc, header_size = parse_frame_header(head)
+        
+        if self.capacity_bits < (header_size + body_length) * 8:
+            raise PayloadFormatError("Incomplete payload frame")
+        
+        return decode_body(flags, self.read_bytes(header_size * 8, body_length), crc)
+
+
+class TiledReader(RegionReader):
+    """
+    Presents the header region and its listed tiles as one bit stream
+    
+    Bit 0 is the first bit after the layout index, so frame parsing works
+    exactly as on a single region. Tiles are only read once the requested
+    span reaches them.
+    """
+    
+    def __init__(self, regions: List[RegionReader], skip_bits: int):
+        """
+        Args:
+            regions: Header region reader followed by one reader per tile
+            skip_bits: Size of the layout index at the start of the header region
+        """
+        self._regions = regions
+        self._skip_bits = skip_bits
+    
+    @property
+    def capacity_bits(self) -> int:
+        return sum(r.capacity_bits for r in self._regions) - self._skip_bits
+    
+    @property
+    def pixels_read(self) -> int:
+        return sum(r.pixels_read for r in self._regions)
+    
+    @property
+    def tiles(self) -> List[Tuple[int, int, int, int]]:
+        """Boxes of the spill tiles, in stream order"""
+        return [
+            (r.origin[0], r.origin[1], r.origin[0] + r.width, r.origin[1] + r.height)
+            for r in self._regions[1:]
+        ]
+    
+    def read_bits(self, start: int, stop: int) -> np.ndarray:
+        stop = min(stop, self.capacity_bits)
+        start += self._skip_bits
+        stop += self._skip_bits
+        
+        pieces = []
+        offset = 0
+        for region in self._regions:
+            end = offset + region.capacity_bits
+            if start < end and stop > offset:
+                pieces.append(region.read_bits(max(start, offset) - offset, min(stop, end) - offset))
+            offset = end
+            if offset >= stop:
+                break
+        
+        if not pieces:
+            return np.empty(0, dtype=np.uint8)
+        return np.concatenate(pieces)
+
+
+def tile_box(column: int, row: int, tile_size: int, width: int, height: int) -> Tuple[int, int, int, int]:
+    """Image box of a layout tile, clipped to the image"""
+    left, upper = column * tile_size, row * tile_size
+    return (left, upper, min(left + tile_size, width), min(upper + tile_size, height))
+
+
+def layout_index_size(tile_count: int) -> int:
+    """Bytes taken by a layout index listing `tile_count` tiles"""
+    return len(LAYOUT_MAGIC) + 2 + 2 * tile_count
+
+
+def plan_layout(width: int, height: int, tile_size: int, frame_bits: int) -> List[Tuple[int, int]]:
+    """
+    Pick the spill tiles a frame needs
+    
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Side of the header region and of each tile
+        frame_bits: Size of the payload frame in bits
+    
+    Returns:
+        (column, row) of each spill tile, in stream order - empty when the
+        frame fits the header region alone (plain single-region layout)
+    
+    Raises:
+        ValueError: If the image cannot hold the frame in MAX_LAYOUT_TILES
+            tiles whose coordinates fit the index (0..MAX_TILE_COORD)
+    """
+    header_box = tile_box(0, 0, tile_size, width, height)
+    capacity = (header_box[2] * header_box[3]) * 3
+    if frame_bits <= capacity:
+        return []
+    
+    tiles = []
+    columns = -(-width // tile_size)
+    rows = -(-height // tile_size)
+    
+    # Top band first: those tiles share the header region's scanlines
+    for row in range(rows):
+        for column in range(columns):
+            if (column, row) == (0, 0):
+                continue
+            if len(tiles) == MAX_LAYOUT_TILES:
+                break
+            if column > MAX_TILE_COORD or row > MAX_TILE_COORD:
+                break
+            
+            left, upper, right, lower = tile_box(column, row, tile_size, width, height)
+            capacity += (right - left) * (lower - upper) * 3
+            tiles.append((column, row))
+            
+            if frame_bits + layout_index_size(len(tiles)) * 8 <= capacity:
+                return tiles
+    
+    raise ValueError(
+        f"Data requires {frame_bits} bits but only "
+        f"{capacity - layout_index_size(len(tiles)) * 8} available"
+    )
+
+
+def embed_layout(
+    img: Image.Image,
+    frame: bytes,
+    tile_size: int,
+    clear: bool = False,
+    region: Optional[np.ndarray] = None
+) -> int:
+    """
+    Write a frame into the header region, spilling into tiles when needed
+    
+    Args:
+        img: RGB image to write into
+        frame: Payload frame bytes
+        tile_size: Side of the header region and of each tile
+        clear: If True, zero every LSB of each region written
+        region: Header region array already loaded from img (optional)
+    
+    Returns:
+        Number of spill tiles used (0 = plain single-region layout)
+    
+    Raises:
+        ValueError: If the image cannot hold the frame
+    """
+    width, height = img.size
+    tiles = plan_layout(width, height, tile_size, len(frame) * 8)
+    
+    if tiles:
+        index = LAYOUT_MAGIC + bytes([LAYOUT_VERSION, len(tiles)])
+        index += b''.join(bytes(tile) for tile in tiles)
+        frame = index + frame
+    
+    bits = bytes_to_bits(frame)
+    boxes = [tile_box(0, 0, tile_size, width, height)]
+    boxes += [tile_box(column, row, tile_size, width, height) for column, row in tiles]
+    
+    position = 0
+    for i, box in enumerate(boxes):
+        if i == 0 and region is not None:
+            block = region
+        else:
+            block = np.array(img.crop(box), dtype=np.uint8)
+        
+        take = min(block.size, bits.size - position)
+        embed_bits(block, bits[position:position + take], clear=clear)
+        store_region(img, block, box[:2])
+        position += take
+    
+    return len(tiles)
+
+
+def open_layout(
+    width: int,
+    height: int,
+    tile_size: int,
+    crop: Callable[[Tuple[int, int, int, int]], np.ndarray]
+) -> RegionReader:
+    """
+    Build a reader over a card's payload stream
+    
+    Reads the first 11 pixels of the header region to look for a layout
+    index; plain cards get a single-region reader.
+    
+    Args:
+        width: Image width
+        height: Image height
+        tile_size: Side of the header region and of each tile
+        crop: Callable returning RGB pixels of an image box
+    
+    Returns:
+        RegionReader (or TiledReader) whose bit 0 is the start of the frame
+    """
+    header = RegionReader(min(tile_size, width), min(tile_size, height), crop)
+    
+    index_head = layout_index_size(0)
+    if header.capacity_bits < index_head * 8 or header.read_bytes(0, len(LAYOUT_MAGIC)) != LAYOUT_MAGIC:
+        return header
+    
+    version, count = header.read_bytes(len(LAYOUT_MAGIC) * 8, 2)
+    if version != LAYOUT_VERSION:
+        raise ValueError(f"Unsupported layout version {version}")
+    
+    coords = header.read_bytes(index_head * 8, 2 * count)
+    regions = [header]
+    for column, row in zip(coords[0::2], coords[1::2]):
+        left, upper, right, lower = tile_box(column, row, tile_size, width, height)
+        if right <= left or lower <= upper:
+            raise ValueError("Layout index lists a tile outside the image")
+        regions.append(RegionReader(right - left, lower - upper, crop, origin=(left, upper)))
+    
+    return TiledReader(regions, layout_index_size(count) * 8)
+
+
+@contextmanager
+def open_region(image_path: str, region_size: Optional[int]) -> Iterator[RegionReader]:
+    """
+    Open the embed region of a card image for reading
+    
+    PNGs are streamed so only the scanlines covering the region are inflated;
+    interlaced PNGs and other formats fall back to a full Pillow decode.
+    Cards with a layout index yield a reader over the region plus its tiles.
+    
+    Args:
+        image_path: Path to card image
+        region_size: Side of the top-left embed region (None = whole image)
+    
+    Yields:
+        RegionReader over the payload stream
+    """
+    try:
+        source = PNGRowSource(image_path)
+    except PNGStreamError:
+        source = None
+    
+    if source is not None:
+        with source:
+            width, height = source.size
+            if region_size is None:
+                yield RegionReader(width, height, source.crop)
+            else:
+                yield open_layout(width, height, region_size, source.crop)
+    else:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if region_size is None:
+                yield RegionReader.from_image(img, width, height)
+            else:
+                yield open_layout(width, height, region_size, image_crop(img))
+
+
+def read_chunk_payload(image_path: str) -> Optional[bytes]:
+    """
+    Probe a card for a payload frame stored in the auRa chunk
+    
+    Only the chunk headers before the image data are read.
+    
+    Returns:
+        Frame bytes (v1 or v2), or None if there is no chunk
+    """
+    try:
+        frame = find_chunk(image_path, PAYLOAD_CHUNK_TYPE)
+    except PNGStreamError:
+        return None
+    
+    if frame is None or len(frame) < LENGTH_HEADER_BITS // 8:
+        return None
+    return frame
+
+
+def write_chunk_payload(source_path: str, output_path: str, frame: bytes):
+    """
+    Store a payload frame in the auRa chunk
+    
+    PNG sources are spliced byte for byte; other formats are converted to PNG
+    once (at output_path) and then spliced in place.
+    
+    Args:
+        source_path: Card image to copy from
+        output_path: Where to write the PNG (may be the source)
+        frame: v1 frame from frame_payload() or v2 frame from encode_frame()
+    """
+    with open(source_path, 'rb') as f:
+        is_png = f.read(len(PNG_SIGNATURE)) == PNG_SIGNATURE
+    
+    if not is_png:
+        with Image.open(source_path) as img:
+            img.convert('RGB').save(output_path, 'PNG', optimize=False)
+        source_path = output_path
+    
+    replace_chunk(source_path, output_path, PAYLOAD_CHUNK_TYPE, frame)
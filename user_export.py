@@ -0,0 +1,116 @@
+"""
+Aurora Archive - User Export
+Streaming export of the registered users database
+
+The CSV header comes from the column schema UserDatabase keeps up to date on
+every upsert, so no pass over the card data is needed before writing. Users
+are then streamed from the database and written in chunks; only one chunk
+of flattened rows is in memory at a time, whatever the member count.
+
+No Qt dependency: CardScannerDialog runs this from a worker thread.
+
+Python 3.10+
+"""
+
+import os
+import csv
+from typing import Callable, Dict, List, Optional
+
+from card_scanner import UserDatabase, flatten_card_data
+
+# Scanner metadata columns (prefixed with _ so they sort ahead of card fields)
+SCANNER_FIELDS = {
+    '_user_id': 'user_id',
+    '_card_format': 'format',
+    '_card_image_path': 'card_image_path',
+    '_first_scan': 'first_scan',
+    '_last_scan': 'last_scan',
+    '_scan_count': 'scan_count',
+}
+
+# progress_callback(done, total, message)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def export_columns(database: UserDatabase) -> List[str]:
+    """Sorted CSV header: flattened card fields plus scanner metadata"""
+    return sorted(set(database.get_export_columns()) | set(SCANNER_FIELDS))
+
+
+def export_row(user: Dict) -> Dict:
+    """Flatten one user record into a CSV row"""
+    row = flatten_card_data(user.get('data', {}))
+    for column, key in SCANNER_FIELDS.items():
+        row[column] = user.get(key, '')
+    return row
+
+
+def export_users_csv(
+    database: UserDatabase,
+    filepath: str,
+    chunk_size: int = 500,
+    progress_callback: Optional[ProgressCallback] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None
+) -> Dict:
+    """
+    Write every registered user to a CSV file
+    
+    The file is written to a temporary name next to `filepath` and moved
+    into place when complete, so a cancelled or failed export never leaves
+    a truncated CSV behind.
+    
+    Args:
+        database: User database to export
+        filepath: Destination CSV path
+        chunk_size: Users flattened and written per batch
+        progress_callback: Called with (done, total, message) after each chunk
+        is_cancelled: Polled between chunks; True stops without writing the file
+    
+    Returns:
+        Dict with users (rows written), columns and cancelled
+    """
+    columns = export_columns(database)
+    total = database.count_users()
+    written = 0
+    
+    temp_path = filepath + '.part'
+    cancelled = False
+    
+    try:
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            # Missing fields are filled with empty strings
+            writer = csv.DictWriter(f, fieldnames=columns, restval='', extrasaction='ignore')
+            writer.writeheader()
+            
+            chunk = []
+            for user in database.iter_users(batch_size=chunk_size):
+                chunk.append(export_row(user))
+                if len(chunk) < chunk_size:
+                    continue
+                
+                if is_cancelled and is_cancelled():
+                    cancelled = True
+                    break
+                writer.writerows(chunk)
+                written += len(chunk)
+                chunk.clear()
+                if progress_callback:
+                    progress_callback(written, total, f"Exported {written} of {total} users")
+            else:
+                writer.writerows(chunk)
+                written += len(chunk)
+        
+        if cancelled:
+            os.remove(temp_path)
+            return {"users": written, "columns": len(columns), "cancelled": True}
+        
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    if progress_callback:
+        progress_callback(written, total, f"Exported {written} users")
+    
+    return {"users": written, "columns": len(columns), "cancelled": False}